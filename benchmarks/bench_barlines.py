@@ -0,0 +1,43 @@
+"""Compare expanding tie chains with and without an active MeasureMap.
+
+Without the map every bar boundary is a `beats_to_measures` call to
+REAPER; with it, barlines of all events are bisected from one array.
+
+    python benchmarks/bench_barlines.py 2000
+"""
+import sys
+import time
+
+import reapy_boost as rpr
+
+from rea_score.dom import Voice
+from rea_score.primitives import Event, Length, MeasureMap, Pitch, Position
+
+
+def make_voice(notes: int) -> Voice:
+    return Voice().extend(
+        (Position(idx * 20.5), Event(Length(20.5), Pitch(60)))
+        for idx in range(notes)
+    )
+
+
+@rpr.inside_reaper()
+def main(notes: int) -> None:
+    start = time.perf_counter()
+    expanded = len(make_voice(notes).expand().events)
+    print(
+        f'per-event queries: {expanded} events, '
+        f'{time.perf_counter() - start:.3f}s'
+    )
+    start = time.perf_counter()
+    measures = MeasureMap.from_project(end_beats=notes * 20.5)
+    with measures.activated():
+        expanded = len(make_voice(notes).expand().events)
+    print(
+        f'measure map:       {expanded} events, '
+        f'{time.perf_counter() - start:.3f}s'
+    )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
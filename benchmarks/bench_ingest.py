@@ -0,0 +1,54 @@
+"""Compare per-note `voice[pos].append` ingest with `Voice.extend`.
+
+Run with REAPER reachable through reapy_boost, e.g.:
+
+    python benchmarks/bench_ingest.py 20000
+"""
+from copy import deepcopy
+import random
+import sys
+import time
+import typing as ty
+
+import reapy_boost as rpr
+
+from rea_score.dom import Voice
+from rea_score.primitives import Event, Length, Pitch, Position
+
+
+def make_take(notes: int, seed: int = 0) -> ty.List[ty.Tuple[Position, Event]]:
+    rnd = random.Random(seed)
+    out: ty.List[ty.Tuple[Position, Event]] = []
+    pos = 0.0
+    while len(out) < notes:
+        length = rnd.choice((0.25, 0.5, 0.5, 1.0, 1.5, 2.0, 6.0))
+        position = Position(pos)
+        for idx in range(rnd.choice((1, 1, 2, 3))):
+            out.append((position, Event(Length(length), Pitch(60 + idx * 4))))
+        pos += length
+    return out
+
+
+def per_note(events: ty.List[ty.Tuple[Position, Event]]) -> Voice:
+    voice = Voice()
+    for position, event in events:
+        voice[position].append(event)
+    return voice
+
+
+def bulk(events: ty.List[ty.Tuple[Position, Event]]) -> Voice:
+    return Voice().extend(events)
+
+
+@rpr.inside_reaper()
+def main(notes: int) -> None:
+    events = make_take(notes)
+    for func in (per_note, bulk):
+        data = deepcopy(events)
+        start = time.perf_counter()
+        func(data)
+        print(f'{func.__name__:>10}: {time.perf_counter() - start:.3f}s')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
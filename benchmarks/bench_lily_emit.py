@@ -0,0 +1,64 @@
+"""Peak memory and time of rendering a long part to a file.
+
+`render_part` builds the whole part as one string, `write_part` streams
+it to the file event by event.
+
+    python benchmarks/bench_lily_emit.py 5000
+"""
+import contextlib
+import copy
+import io
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import reapy_boost as rpr
+
+from rea_score.dom import Staff, TrackType, Voice
+from rea_score.lily_convert import (
+    duration_cache_hit_rate, render_part, write_part
+)
+from rea_score.lily_export import LyWriter
+from rea_score.primitives import Event, Length, Pitch, Position
+
+
+def make_staves(notes: int) -> list:
+    voice = Voice().extend(
+        (Position(idx * 0.75), Event(Length(0.75), Pitch(48 + idx % 24)))
+        for idx in range(notes)
+    )
+    staff = Staff(1)
+    staff.append(voice)
+    return [staff]
+
+
+@rpr.inside_reaper()
+def main(notes: int) -> None:
+    staves = make_staves(notes)
+    for name, render in (('render_part', True), ('write_part', False)):
+        parts = copy.deepcopy(staves)
+        tracemalloc.start()
+        start = time.perf_counter()
+        with tempfile.TemporaryFile('w') as out, \
+                contextlib.redirect_stdout(io.StringIO()):
+            if render:
+                out.write(
+                    render_part('Part', parts, TrackType.default,
+                                0)['definition']
+                )
+            else:
+                writer = LyWriter(out)
+                write_part(writer, 'Part', parts, TrackType.default, 0)
+                writer.flush()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(
+            f'{name}: {time.perf_counter() - start:.3f}s, '
+            f'peak {peak / 1e6:.1f} MB'
+        )
+    print(f'duration token cache hit rate: {duration_cache_hit_rate():.1%}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,64 @@
+"""Compare laying out LilyPond source while emitting with the regex pass.
+
+The first run emits a part without layout and formats the result with
+`format_lines`, the second one emits it through `LyWriter` directly.
+
+    python benchmarks/bench_ly_format.py 5000
+"""
+import contextlib
+import copy
+import io
+import sys
+import time
+
+import reapy_boost as rpr
+
+from rea_score.dom import Staff, TrackType, Voice
+from rea_score.lily_convert import write_part
+from rea_score.lily_export import LyWriter, format_lines
+from rea_score.primitives import Event, Length, Pitch, Position
+
+
+def make_staves(notes: int) -> list:
+    staves = []
+    for nr in (1, 2):
+        voice = Voice().extend(
+            (Position(idx * 0.75), Event(Length(0.75), Pitch(48 + idx % 24)))
+            for idx in range(notes)
+        )
+        staff = Staff(nr)
+        staff.append(voice)
+        staves.append(staff)
+    return staves
+
+
+def emit(staves: list, out: LyWriter) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        write_part(out, 'Part', staves, TrackType.default, 0)
+    out.flush()
+    return time.perf_counter() - start
+
+
+@rpr.inside_reaper()
+def main(notes: int) -> None:
+    staves = make_staves(notes)
+    raw = io.StringIO()
+    emitted = emit(copy.deepcopy(staves), LyWriter(raw, 10**9, ''))
+    start = time.perf_counter()
+    lines = format_lines(raw.getvalue())
+    formatted = time.perf_counter() - start
+    print(
+        f'emit + format_lines: {emitted:.3f}s + {formatted:.3f}s, '
+        f'{len(lines)} lines'
+    )
+    laid_out = io.StringIO()
+    emitted = emit(copy.deepcopy(staves), LyWriter(laid_out))
+    print(
+        f'LyWriter:            {emitted:.3f}s, '
+        f'{laid_out.getvalue().count(chr(10))} lines'
+    )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
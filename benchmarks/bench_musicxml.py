@@ -0,0 +1,56 @@
+"""Time of writing a long part as MusicXML and as LilyPond source.
+
+Neither is compiled, PDF generation by lilypond comes on top of the
+LilyPond figure.
+
+    python benchmarks/bench_musicxml.py 5000
+"""
+import contextlib
+import copy
+import io
+import sys
+import time
+
+import reapy_boost as rpr
+
+from rea_score.dom import Staff, TrackType, Voice
+from rea_score.export import ScorePart, write_musicxml
+from rea_score.lily_convert import write_part
+from rea_score.lily_export import LyWriter
+from rea_score.primitives import Event, Length, Pitch, Position
+
+
+def make_staves(notes: int) -> list:
+    voice = Voice().extend(
+        (Position(idx * 0.75), Event(Length(0.75), Pitch(48 + idx % 24)))
+        for idx in range(notes)
+    )
+    staff = Staff(1)
+    staff.append(voice)
+    return [staff]
+
+
+@rpr.inside_reaper()
+def main(notes: int) -> None:
+    staves = make_staves(notes)
+    out = io.StringIO()
+    start = time.perf_counter()
+    write_musicxml(out, [ScorePart('Part', copy.deepcopy(staves))])
+    print(
+        f'MusicXML: {time.perf_counter() - start:.3f}s, '
+        f'{len(out.getvalue()) / 1e6:.1f} MB'
+    )
+    out = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        writer = LyWriter(out)
+        write_part(writer, 'Part', copy.deepcopy(staves), TrackType.default, 0)
+        writer.flush()
+    print(
+        f'LilyPond: {time.perf_counter() - start:.3f}s, '
+        f'{len(out.getvalue()) / 1e6:.1f} MB'
+    )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,49 @@
+"""Size and decoding time of notation events in both formats.
+
+Every event carries a few typical tokens; the same events are packed in
+format 1 (``ReaScore|voice:2|...``) and format 2 (``RS2|v:2|...``) and
+decoded back with `NotationPitch.from_midibuf`.
+
+    python benchmarks/bench_notation_codec.py 20000
+"""
+import sys
+import time
+
+import reapy_boost as rpr
+
+from rea_score.notations_pitch import (
+    NotationArticulation, NotationBeamGroupBegin, NotationStaff,
+    NotationVoice
+)
+from rea_score.primitives import NotationPitch, Pitch
+
+
+@rpr.inside_reaper()
+def main(count: int) -> None:
+    bufs = {}
+    for version in 1, 2:
+        bufs[version] = []
+        for idx in range(count):
+            pitch = Pitch(48 + idx % 24)
+            events = [
+                NotationVoice(pitch, 2),
+                NotationStaff(pitch, 2),
+                NotationArticulation(pitch, 'staccato'),
+                NotationBeamGroupBegin(pitch),
+            ][:1 + idx % 4]
+            bufs[version].append(
+                NotationPitch.to_midi_buf(events, pitch, version=version)
+            )
+    for version, version_bufs in bufs.items():
+        size = sum(len(buf) for buf in version_bufs)
+        start = time.perf_counter()
+        for buf in version_bufs:
+            NotationPitch.from_midibuf(buf)
+        print(
+            f'format {version}: {count} events, {size} bytes, '
+            f'decoded in {time.perf_counter() - start:.3f}s'
+        )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
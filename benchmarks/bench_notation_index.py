@@ -0,0 +1,51 @@
+"""Read a take, dense with notation events, with and without the index.
+
+Measures `NoteTable.from_midi` on in-memory MIDI: decoding every event
+(cold), with the cached index of unchanged MIDI (warm, what
+`NoteTable.from_take` does after `MIDI_GetHash`), and with one event
+changed, reusing the previous index.
+
+    python benchmarks/bench_notation_index.py 20000
+"""
+import sys
+import time
+from typing import List
+
+import reapy_boost as rpr
+
+from rea_score.notation_index import NotationIndex
+from rea_score.note_table import NoteTable
+
+
+def make_midi(notes: int) -> List[dict]:
+    midi = []
+    for idx in range(notes):
+        pitch = 48 + idx % 24
+        text = f'NOTE 0 {pitch} text RS2|v:{1 + idx % 2}|s:{1 + idx % 3}'
+        midi.append(dict(ppq=idx * 240, buf=[0x90, pitch, 90], cc_shape=0,
+                         muted=False, selected=False))
+        midi.append(dict(ppq=idx * 240, buf=[0xff, 0x0f, *text.encode()],
+                         cc_shape=0, muted=False, selected=False))
+        midi.append(dict(ppq=idx * 240 + 200, buf=[0x80, pitch, 0],
+                         cc_shape=0, muted=False, selected=False))
+    return midi
+
+
+@rpr.inside_reaper()
+def main(notes: int) -> None:
+    midi = make_midi(notes)
+    index = NotationIndex.from_midi(midi)
+    changed = [dict(event) for event in midi]
+    changed[1]['buf'] = [0xff, 0x0f, *b'NOTE 0 48 text RS2|v:2|g']
+    for name, get_index in (
+        ('cold', lambda: None),
+        ('warm', lambda: index),
+        ('changed', lambda: NotationIndex.from_midi(changed, previous=index)),
+    ):
+        start = time.perf_counter()
+        NoteTable.from_midi(midi, lambda ppq: ppq / 960, get_index())
+        print(f'{name:8} {notes} notes: {time.perf_counter() - start:.3f}s')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
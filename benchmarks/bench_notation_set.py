@@ -0,0 +1,95 @@
+"""Tag selected notes of a take, dense with notation events.
+
+Compares the indexed `NotationPitchInspector.set` with scanning every
+notation event per note, on an in-memory take, so only Python work is
+measured (the REAPER side is one get_midi and one set_midi either way).
+
+    python benchmarks/bench_notation_set.py 10000 2000
+"""
+from copy import deepcopy
+import sys
+import time
+from typing import List
+
+import reapy_boost as rpr
+
+from rea_score.inspector import NotationPitchInspector
+from rea_score.notations_pitch import NotationStaff, NotationVoice
+from rea_score.primitives import NotationPitch, Pitch
+
+
+class MemoryTake:
+
+    def __init__(self, notations: int) -> None:
+        self.midi = []
+        for idx in range(notations):
+            text = f'NOTE 0 {48 + idx % 24} text ReaScore|voice:2'
+            self.midi.append(
+                dict(ppq=idx * 240, buf=[0x90, 48 + idx % 24, 90],
+                     cc_shape=0, muted=False, selected=True)
+            )
+            self.midi.append(
+                dict(ppq=idx * 240, buf=[0xff, 0x0f, *text.encode()],
+                     cc_shape=0, muted=False, selected=False)
+            )
+
+    def get_midi(self) -> List[dict]:
+        return [dict(event) for event in self.midi]
+
+    def set_midi(self, midi: List[dict], sort: bool = True) -> None:
+        pass
+
+
+class MemoryNote:
+
+    def __init__(self, ppq: int, pitch: int) -> None:
+        self.infos = dict(channel=0, ppq_position=ppq, pitch=pitch)
+
+
+def scan_set(take: MemoryTake, notes: List[MemoryNote],
+             events: List[NotationPitch]) -> None:
+    """Previous algorithm: parse every notation event for every note."""
+    midi = take.get_midi()
+    notations = [e for e in midi if NotationPitch.is_reascore_event(e)]
+    for note in notes:
+        ppq, pitch = note.infos['ppq_position'], note.infos['pitch']
+        note_events = deepcopy(events)
+        for note_event in note_events:
+            note_event.pitch = Pitch(pitch)
+        for notation in notations:
+            if notation['ppq'] != ppq:
+                continue
+            parsed = NotationPitch.from_midibuf(notation['buf'])
+            if parsed[0].pitch.midi_pitch != pitch:
+                continue
+            note_events = NotationPitchInspector.merged(parsed, note_events)
+        midi.append(dict(ppq=ppq, buf=NotationPitch.to_midi_buf(
+            note_events, Pitch(pitch)), cc_shape=0, muted=False,
+            selected=False))
+    take.set_midi(sorted(midi, key=lambda d: d['ppq']), sort=True)
+
+
+@rpr.inside_reaper()
+def main(notations: int, selected: int) -> None:
+    take = MemoryTake(notations)
+    notes = [
+        MemoryNote(idx * 240, 48 + idx % 24)
+        for idx in range(0, notations, max(notations // selected, 1))
+    ][:selected]
+    events = [NotationStaff(Pitch(127), 2), NotationVoice(Pitch(127), 1)]
+    for name, func in (
+        ('indexed', NotationPitchInspector().set), ('scan', scan_set)
+    ):
+        start = time.perf_counter()
+        func(take, notes, events)  # type:ignore
+        print(
+            f'{name:8} {len(notes)} notes, {notations} notations: '
+            f'{time.perf_counter() - start:.3f}s'
+        )
+
+
+if __name__ == '__main__':
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 2000,
+    )
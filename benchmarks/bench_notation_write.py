@@ -0,0 +1,47 @@
+"""Delta against bulk writes of notation edits, to tune DELTA_WRITE_SHARE.
+
+Edits the active take of the first selected item, so run it on a scratch
+project: a long take with dense CC and some notes. For growing numbers of
+edited notes both writes are timed, with the share of
+(text events + edits) in all events of the take, at which
+`NotationTransaction` would switch from delta to bulk.
+
+    python benchmarks/bench_notation_write.py 5
+"""
+import sys
+import time
+
+import reapy_boost as rpr
+
+from rea_score.inspector import NotationTransaction, TakeTextEvents
+from rea_score.notations_pitch import NotationVoice
+from rea_score.primitives import Pitch
+
+
+@rpr.inside_reaper()
+def main(steps: int) -> None:
+    take = rpr.Project().selected_items[0].active_take
+    notes = list(take.notes)
+    texts, total = TakeTextEvents(take).counts()
+    print(f'{len(notes)} notes, {texts} text events, {total} events')
+    count = 1
+    for step in range(steps):
+        edited = notes[:count]
+        times = []
+        for delta in (True, False):
+            start = time.perf_counter()
+            with NotationTransaction(take, delta=delta) as transaction:
+                transaction.set(edited, [NotationVoice(Pitch(127), 1 + step)])
+            times.append(time.perf_counter() - start)
+        texts = TakeTextEvents(take).counts()[0]
+        print(
+            f'{len(edited):6} edits, share {(texts + len(edited)) / total:.3f}: '
+            f'delta {times[0]:.3f}s, bulk {times[1]:.3f}s'
+        )
+        if count >= len(notes):
+            break
+        count *= 10
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,59 @@
+"""Size and speed of the binary format against pickle.
+
+    python benchmarks/bench_serialize.py 5000
+"""
+import pickle
+import sys
+import time
+
+import reapy_boost as rpr
+
+from rea_score import serialize
+from rea_score.dom import Staff, Voice
+from rea_score.note_table import NoteTable
+from rea_score.primitives import Event, Length, Pitch, Position
+
+
+def make_staves(notes: int) -> list:
+    voice = Voice().extend(
+        (Position(idx * 0.75), Event(Length(0.75), Pitch(48 + idx % 24)))
+        for idx in range(notes)
+    )
+    staff = Staff(1)
+    staff.append(voice.finalized())
+    return [staff]
+
+
+def make_table(notes: int) -> NoteTable:
+    table = NoteTable()
+    for idx in range(notes):
+        table.append(idx * 0.75, 0.75, 48 + idx % 24, velocity=90)
+    return table
+
+
+def compare(name: str, obj: object) -> None:
+    for fmt, dumps, loads in (
+        ('pickle', lambda o: pickle.dumps(o, pickle.HIGHEST_PROTOCOL),
+         pickle.loads),
+        ('binary', serialize.dumps, serialize.loads),
+    ):
+        start = time.perf_counter()
+        data = dumps(obj)
+        dumped = time.perf_counter() - start
+        start = time.perf_counter()
+        loads(data)
+        loaded = time.perf_counter() - start
+        print(
+            f'{name} {fmt}: {len(data) / 1e3:.0f} kB, '
+            f'dump {dumped:.3f}s, load {loaded:.3f}s'
+        )
+
+
+@rpr.inside_reaper()
+def main(notes: int) -> None:
+    compare('staves', make_staves(notes))
+    compare('table ', make_table(notes))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,41 @@
+"""Count objects and memory held by a voice of long tied notes.
+
+Every note lasts five bars. Before `Voice.expand` the voice keeps one
+event per note; the tied pieces exist only after it.
+
+    python benchmarks/bench_tie_chains.py 2000
+"""
+import sys
+import time
+import tracemalloc
+
+import reapy_boost as rpr
+
+from rea_score.dom import Voice
+from rea_score.primitives import Event, Length, Pitch, Position
+
+
+@rpr.inside_reaper()
+def main(notes: int) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    voice = Voice().extend(
+        (Position(idx * 20.5), Event(Length(20.5), Pitch(60)))
+        for idx in range(notes)
+    )
+    placed = tracemalloc.get_traced_memory()[0]
+    print(
+        f'placed:   {len(voice.events)} events, {placed / 1e6:.1f} MB, '
+        f'{time.perf_counter() - start:.3f}s'
+    )
+    start = time.perf_counter()
+    voice.expand()
+    expanded = tracemalloc.get_traced_memory()[0]
+    print(
+        f'expanded: {len(voice.events)} events, {expanded / 1e6:.1f} MB, '
+        f'{time.perf_counter() - start:.3f}s'
+    )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,38 @@
+"""Time rendering of a part made of continuous sixteenth-note triplets.
+
+Run with REAPER reachable through reapy_boost, e.g.:
+
+    python benchmarks/bench_tuplets.py 4000
+"""
+import sys
+import time
+
+import reapy_boost as rpr
+
+from rea_score.dom import Voice
+from rea_score.lily_convert import KEY, render_tuplet
+from rea_score.primitives import Event, Length, Pitch, Position
+
+
+def triplets(notes: int) -> Voice:
+    voice = Voice()
+    for idx in range(notes):
+        voice.events[Position(idx / 6)] = Event(
+            Length(1 / 6), Pitch(60 + idx % 12)
+        )
+    return voice.with_tuplets()
+
+
+@rpr.inside_reaper()
+def main(notes: int) -> None:
+    voice = triplets(notes)
+    start = time.perf_counter()
+    for event in voice.events.values():
+        render_tuplet(event, KEY, 0)
+        event.rate
+        event.events
+    print(f'{notes} triplet notes: {time.perf_counter() - start:.3f}s')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 4000)
@@ -0,0 +1,109 @@
+"""Command line of ReaScore.
+
+usage: python -m rea_score render SOURCE [-o DIR] [--no-compile] [-j N]
+       python -m rea_score batch DIR [-o OUTPUT] [--no-compile] [-j N] [-f]
+
+SOURCE is a snapshot, written inside REAPER, or a .RPP file.
+"""
+import argparse
+from pathlib import Path
+import sys
+from typing import List, Optional
+
+from rea_score.batch import load_source, run_batch, summary
+from rea_score.snapshot import render_snapshot
+
+
+def render(args: argparse.Namespace) -> int:
+    snapshot = load_source(args.source)
+    pdfs = render_snapshot(
+        snapshot, args.output, compile_ly=args.compile, jobs=args.jobs
+    )
+    for track, pdf in zip(snapshot.tracks, pdfs):
+        print(f'{track.part_name}: {pdf}')
+    return 0
+
+
+def batch(args: argparse.Namespace) -> int:
+    output = args.output or args.directory.joinpath('score')
+    results = run_batch(
+        args.directory,
+        output,
+        compile_ly=args.compile,
+        jobs=args.jobs,
+        force=args.force
+    )
+    print()
+    for line in summary(results):
+        print(line)
+    return 1 if any(result.error for result in results) else 0
+
+
+def parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m rea_score')
+    commands = parser.add_subparsers(dest='command', required=True)
+    render_cmd = commands.add_parser(
+        'render', help='render snapshot or .RPP file, without REAPER'
+    )
+    render_cmd.add_argument('source', type=Path)
+    render_cmd.add_argument(
+        '-o',
+        '--output',
+        type=Path,
+        default=None,
+        help='directory for .ly and .pdf files, '
+        'defaults to export paths of the tracks'
+    )
+    render_cmd.add_argument(
+        '--no-compile',
+        dest='compile',
+        action='store_false',
+        help='write .ly files only'
+    )
+    render_cmd.add_argument(
+        '-j', '--jobs', type=int, default=1, help='tracks rendered at once'
+    )
+    render_cmd.set_defaults(func=render)
+
+    batch_cmd = commands.add_parser(
+        'batch', help='export every project or snapshot in the directory'
+    )
+    batch_cmd.add_argument('directory', type=Path)
+    batch_cmd.add_argument(
+        '-o',
+        '--output',
+        type=Path,
+        default=None,
+        help='every project is exported to OUTPUT/<project name>, '
+        'defaults to DIRECTORY/score'
+    )
+    batch_cmd.add_argument(
+        '--no-compile',
+        dest='compile',
+        action='store_false',
+        help='write .ly files only'
+    )
+    batch_cmd.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=None,
+        help='projects exported at once, defaults to number of CPUs'
+    )
+    batch_cmd.add_argument(
+        '-f',
+        '--force',
+        action='store_true',
+        help='export projects, that are up to date'
+    )
+    batch_cmd.set_defaults(func=batch)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
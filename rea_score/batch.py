@@ -0,0 +1,193 @@
+"""Export of many projects at once, without REAPER.
+
+Every project (.RPP file or snapshot) found in the directory is exported
+to ``OUTPUT/<relative path>/<project name>/``: a .ly (and .pdf) file per
+score track and, if there are several tracks, the full score
+``<project name>.ly``. Projects are exported in a process pool. If all
+outputs, listed in the manifest of the last export, are newer than the
+project file, the project is skipped.
+
+usage: python -m rea_score batch DIR [-o OUTPUT] [-j N] [--no-compile]
+                                     [--force]
+"""
+from dataclasses import dataclass, field
+import os
+from pathlib import Path
+import sys
+import time
+from typing import Iterator, List, Optional, Sequence, TextIO
+
+from rea_score.rpp import read_project
+from rea_score.snapshot import (
+    SUFFIX, Snapshot, export_names, load, render_full_score, render_track
+)
+
+SOURCE_SUFFIXES = ('.rpp', SUFFIX)
+MANIFEST = '.rea_score_outputs'
+
+
+@dataclass
+class ProjectResult:
+    source: Path
+    name: str
+    outputs: List[Path] = field(default_factory=list)
+    seconds: float = 0
+    skipped: bool = False
+    error: str = ''
+
+    @property
+    def status(self) -> str:
+        if self.error:
+            return 'FAIL'
+        return 'skip' if self.skipped else 'ok'
+
+
+def load_source(path: Path) -> Snapshot:
+    """Load snapshot, or read it from .RPP file."""
+    if path.suffix.lower() == '.rpp':
+        return read_project(path)
+    return load(path)
+
+
+def find_sources(directory: Path,
+                 exclude: Optional[Path] = None) -> List[Path]:
+    """Projects and snapshots in the directory and its subdirectories.
+
+    Files inside `exclude` directory are skipped.
+    """
+    return sorted(
+        path for path in directory.rglob('*')
+        if path.suffix.lower() in SOURCE_SUFFIXES and path.is_file() and (
+            exclude is None or exclude not in path.parents
+        )
+    )
+
+
+def up_to_date(source: Path, out_dir: Path) -> bool:
+    """If every output of the last export is newer than the source."""
+    manifest = out_dir.joinpath(MANIFEST)
+    if not manifest.exists():
+        return False
+    mtime = source.stat().st_mtime
+    for name in manifest.read_text().splitlines():
+        path = out_dir.joinpath(name)
+        if not path.exists() or path.stat().st_mtime < mtime:
+            return False
+    return True
+
+
+def export_project(
+    source: Path, out_dir: Path, compile_ly: bool = True
+) -> List[Path]:
+    """Export every track and the full score of the project.
+
+    Track files are named by `export_names`, unique in the project.
+
+    Returns
+    -------
+    List[Path]
+        written .ly files, and .pdf files if compiled
+    """
+    snapshot = load_source(source)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    outputs: List[Path] = []
+    full_score = len(snapshot.tracks) > 1
+    names = export_names(
+        snapshot.tracks, reserved=[source.stem] if full_score else []
+    )
+    with snapshot.measure_map().activated():
+        staves = [track.staves() for track in snapshot.tracks]
+        for track, track_staves, name in zip(snapshot.tracks, staves, names):
+            pdf, _ = render_track(
+                track, out_dir, compile_ly, staves=track_staves, name=name
+            )
+            outputs.append(pdf.with_suffix('.ly'))
+            if compile_ly:
+                outputs.append(pdf)
+        if full_score:
+            score = out_dir.joinpath(f'{source.stem}.ly')
+            pdf = render_full_score(
+                snapshot.tracks, score, compile_ly, staves=staves
+            )
+            outputs.append(score)
+            if compile_ly:
+                outputs.append(pdf)
+    out_dir.joinpath(MANIFEST).write_text(
+        '\n'.join(path.name for path in outputs)
+    )
+    return outputs
+
+
+def _export_job(
+    source: Path, name: str, out_dir: Path, compile_ly: bool, force: bool
+) -> ProjectResult:
+    result = ProjectResult(source, name)
+    if not force and up_to_date(source, out_dir):
+        result.skipped = True
+        return result
+    start = time.perf_counter()
+    try:
+        result.outputs = export_project(source, out_dir, compile_ly)
+    except Exception as exc:
+        result.error = f'{type(exc).__name__}: {exc}'
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def run_batch(
+    directory: Path,
+    output: Path,
+    compile_ly: bool = True,
+    jobs: Optional[int] = None,
+    force: bool = False,
+    log: TextIO = sys.stdout,
+) -> List[ProjectResult]:
+    """Export projects in `jobs` processes, logging every finished one.
+
+    Returns
+    -------
+    List[ProjectResult]
+        in order of project paths
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    jobs = jobs or os.cpu_count() or 1
+    directory, output = directory.resolve(), output.resolve()
+    sources = find_sources(directory, exclude=output)
+    results = {}
+    with ProcessPoolExecutor(jobs) as pool:
+        futures = {}
+        for source in sources:
+            relative = source.relative_to(directory).with_suffix('')
+            futures[pool.submit(
+                _export_job, source, str(relative), output.joinpath(relative),
+                compile_ly, force
+            )] = source
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            log.write(f'{result.status:4} {result.seconds:8.2f}s  '
+                      f'{result.name}\n')
+            if result.error:
+                log.write(f'     {result.error}\n')
+            log.flush()
+    return [results[source] for source in sources]
+
+
+def summary(results: Sequence[ProjectResult]) -> Iterator[str]:
+    """Lines of the summary table."""
+    width = max([len('project'), *(len(result.name) for result in results)])
+    yield f'{"project":{width}}  status   seconds  outputs'
+    yield f'{"-" * width}  ------  --------  -------'
+    for result in results:
+        yield (
+            f'{result.name:{width}}  {result.status:6}  '
+            f'{result.seconds:8.2f}  {len(result.outputs):7}'
+        )
+    done = sum(1 for result in results if result.status == 'ok')
+    skipped = sum(1 for result in results if result.skipped)
+    failed = sum(1 for result in results if result.error)
+    total = sum(result.seconds for result in results)
+    yield (
+        f'{len(results)} projects: {done} exported, {skipped} up to date, '
+        f'{failed} failed, {total:.2f}s of work'
+    )
@@ -1,20 +1,29 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from copy import copy
 from enum import Enum
-from typing import Dict, Iterable, Iterator, List, Optional, TypeVar
-import reapy_boost as rpr
-from reapy_boost.core.item.midi_event import MIDIEventDict
+from fractions import Fraction
+from typing import (
+    TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple,
+    TypeVar
+)
 
 from rea_score.primitives import (
-    Attachment, Chord, Clef, Event, GlobalNotationEvent, Grace, Length,
-    NotationMarker, NotationPitch, NotationEvent, Pitch, Position, Fractured,
-    TimeSignature, Tuplet
+    LIMIT_DENOMINATOR, Attachment, Chord, Clef, Event, GlobalNotationEvent,
+    Grace, Length, MeasureMap, NotationMarker, NotationPitch, NotationEvent,
+    Pitch, Position, Fractured, TimeSignature, Tuplet, measure_info
 )
 from rea_score.notations_pitch import (
     NotationGraceBegin, NotationGraceEnd, NotationIgnore, NotationTupletBegin,
     NotationTupletEnd
 )
 from rea_score.notation_events import NotationText, NotationTimeSignature
+from rea_score.note_table import NoteFlag, NoteTable
+from rea_score.reaper import inside_reaper
 
-from pprint import pformat, pprint
+if TYPE_CHECKING:
+    import reapy_boost as rpr
+    from reapy_boost.core.item.midi_event import MIDIEventDict
 
 EventT = TypeVar('EventT', NotationEvent, Event, covariant=True)
 
@@ -45,71 +54,142 @@ class EventPackager:
         self.key = key
 
     def append(self, event: Event) -> None:
-        if event.length == 0:
-            return
-        if self.voice._grace and not self.voice._grace_opened:
-            event.prefix.append(self.voice._grace)
-            # print('grace to event:', event)
-            self.voice._grace = None
-        grace_opened = self.voice._grace_opened
-        for notation in event.prefix:
-            if isinstance(notation, NotationGraceBegin):
-                self.voice._grace = Grace()
-                self.voice._grace_opened = True
-                grace_opened = True
-                # print('opened grace with:', event)
-        if self.voice._grace_opened and self.voice._grace:
-            event.length = Length.from_fraction(1 / 8)
-            self.voice._grace.append(event)
-        for notation in event.postfix:
-            if isinstance(notation, NotationGraceEnd):
-                # print('close grace')
-                self.voice._grace_opened = False
-        if grace_opened:
-            # print('grace opened, return')
-            return
-
-        if self.key not in self.voice.events:
-            if self.key.bar_position == 0:
-                barcheck = BarCheck(self.key.bar)
-                if self.key.position != 0 and barcheck not in event.prefix:
-                    event.prefix.append(barcheck)
-            return self.split_by_position(event)
-        self.voice.append_to_chord(self.key, event)
+        self.voice.place(self.key, event)
 
     def split_by_position(self, event: Event) -> None:
-        if self.key.bar_end_distance < event.length:
-            left, append_part = event.split(
-                Length(float(self.key.bar_end_distance) * 4), tie=True
-            )
-        else:
-            left = event
-        parts = Fractured.normalized(self.key.bar_end_distance)
-        final_events = {}
-        if event.unnormalized:
-            self.voice.events[self.key] = left
-            current_pos = Position.from_fraction(self.key + left.length)
-        else:
-            current_pos = self.key
-            for part in parts:
-                if left.length <= part:
-                    self.voice.events[current_pos] = left
-                    current_pos = Position(
-                        current_pos.position + left.length.length
-                    )
-                    break
-                left, right = left.split(Length.from_fraction(part), tie=True)
-                if right.length.length == 0:
+        self.voice.split_by_position(self.key, event)
+
+
+class TieChain:
+    """One logical note, and the points where it is tied when written.
+
+    Split points are offsets from the note start: barlines, and
+    boundaries of normalized lengths inside every bar (unless the event
+    is unnormalized). They are computed on the first access, and tied
+    pieces are made only by `pieces`.
+
+    If barlines are given (see `split_at_barlines`), split points are
+    computed from them; otherwise every bar is looked up by Position.
+    """
+
+    def __init__(
+        self,
+        position: Position,
+        event: Event,
+        barlines: Optional[Sequence[Tuple[int, Fraction]]] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        position : Position
+        event : Event
+        barlines : Optional[Sequence[Tuple[int, Fraction]]]
+            (bar number, offset from position) of every barline after
+            the position, up to the first one at or after the event end
+        """
+        self.position = position
+        self.event = event
+        self.barlines = barlines
+        self._split_points: Optional[List[Fraction]] = None
+
+    def __repr__(self) -> str:
+        return f'<TieChain at {self.position}, {self.split_points}, {self.event}>'
+
+    def _normalized_points(
+        self, offset: Fraction, head: Fraction, bar_end: Fraction
+    ) -> List[Fraction]:
+        if self.event.unnormalized:
+            return [offset + head]
+        points = []
+        for part in Fractured.normalized(bar_end):
+            if head <= part:
+                break
+            offset += part
+            points.append(offset)
+            head -= part
+        points.append(offset + head)
+        return points
+
+    @property
+    def split_points(self) -> List[Fraction]:
+        if self._split_points is not None:
+            return self._split_points
+        points: List[Fraction] = []
+        length = self.event.length.fraction
+        offset = Fraction(0)
+        if self.barlines is not None:
+            for _, barline in self.barlines:
+                bar_end = barline - offset
+                head = min(length - offset, bar_end)
+                points.extend(self._normalized_points(offset, head, bar_end))
+                offset += head
+                if offset >= length:
                     break
-                final_events[current_pos] = left
-                current_pos = Position(current_pos.position + left.length.length)
-                left = right
-        if self.key.bar_end_distance < event.length:
-            final_events[current_pos] = append_part
-        for pos, event in final_events.items():
-            if event.length == 0:
-                continue
-            self.voice[pos].append(event)
+        else:
+            start = self.position.fraction
+            key = self.position
+            while offset < length:
+                bar_end = key.bar_end_distance
+                head = min(length - offset, bar_end)
+                points.extend(self._normalized_points(offset, head, bar_end))
+                offset += head
+                key = Position.from_fraction(start + offset)
+        self._split_points = points[:-1]
+        return self._split_points
+
+    def pieces(self) -> List[Tuple[Position, Event]]:
+        """Tied pieces of the event, with BarCheck at every barline.
+
+        Every piece is a shallow copy of the event with its own length
+        and pitches. Prefix goes to the first piece, postfix to the last.
+        """
+        start = self.position.fraction
+        points = [Fraction(0), *self.split_points,
+                  self.event.length.fraction]
+        out: List[Tuple[Position, Event]] = []
+        for idx in range(len(points) - 1):
+            position = self.position if idx == 0 else Position.from_fraction(
+                start + points[idx]
+            )
+            last = idx == len(points) - 2
+            out.append(
+                (
+                    position,
+                    self._piece(points[idx + 1] - points[idx], idx, last)
+                )
+            )
+        if self.barlines is not None:
+            bars = {offset: bar for bar, offset in self.barlines}
+            for (position, piece), offset in zip(out[1:], points[1:]):
+                if offset in bars:
+                    barcheck = BarCheck(bars[offset])
+                    if barcheck not in piece.prefix:
+                        piece.prefix.append(barcheck)
+            return out
+        for position, piece in out[1:]:
+            if position.bar_position == 0:
+                barcheck = BarCheck(position.bar)
+                if barcheck not in piece.prefix:
+                    piece.prefix.append(barcheck)
+        return out
+
+    def _piece(self, length: Fraction, idx: int, last: bool) -> Event:
+        event = self.event
+        if idx == 0 and last:
+            return event
+        piece = copy(event)
+        piece.length = Length.from_fraction(length)
+        piece.prefix = event.prefix if idx == 0 else []
+        piece.postfix = event.postfix if last else []
+        piece.pitch = copy(event.pitch)
+        if not last and event.pitch.midi_pitch is not None:
+            piece.pitch.tie = True
+        if isinstance(event, Chord):
+            piece.pitches = [copy(pitch) for pitch in event.pitches]
+            if not last:
+                for pitch in piece.pitches:
+                    pitch.tie = True
+        return piece
 
 
 class Voice:
@@ -129,6 +209,140 @@ class Voice:
     def __getitem__(self, key: Position) -> EventPackager:
         return EventPackager(self, key)
 
+    def place(self, key: Position, event: Event) -> None:
+        """Put event at position, making chords and graces.
+
+        Same as `voice[key].append(event)`, but without the packager.
+        Event is kept whole: barline and normalization splits are made
+        by `expand`.
+        """
+        if event.length == 0:
+            return
+        if self._grace and not self._grace_opened:
+            event.prefix.append(self._grace)
+            # print('grace to event:', event)
+            self._grace = None
+        grace_opened = self._grace_opened
+        for notation in event.prefix:
+            if isinstance(notation, NotationGraceBegin):
+                self._grace = Grace()
+                self._grace_opened = True
+                grace_opened = True
+                # print('opened grace with:', event)
+        if self._grace_opened and self._grace:
+            event.length = Length.from_fraction(1 / 8)
+            self._grace.append(event)
+        for notation in event.postfix:
+            if isinstance(notation, NotationGraceEnd):
+                # print('close grace')
+                self._grace_opened = False
+        if grace_opened:
+            # print('grace opened, return')
+            return
+
+        if key not in self.events:
+            if key.bar_position == 0:
+                barcheck = BarCheck(key.bar)
+                if key.position != 0 and barcheck not in event.prefix:
+                    event.prefix.append(barcheck)
+            self.events[key] = event
+            return
+        self.append_to_chord(key, event)
+
+    def split_by_position(
+        self,
+        key: Position,
+        event: Event,
+        barlines: Optional[Sequence[Tuple[int, Fraction]]] = None
+    ) -> None:
+        """Put tied pieces of event, split at barlines and normalized."""
+        if isinstance(event, Chord):
+            event = event.simplified()
+        for position, piece in TieChain(key, event, barlines).pieces():
+            self.events[position] = piece
+
+    def expand(self) -> 'Voice':
+        """Replace every event by its tied pieces.
+
+        Until this, every note is kept whole at its start position,
+        however many bars it lasts. If a MeasureMap is active, barlines
+        of all events are found in one pass over its bar starts.
+        """
+        events = self.events
+        self.events = {}
+        measures = MeasureMap.active
+        if measures is None:
+            for position, event in events.items():
+                self.split_by_position(position, event)
+            return self
+        positions = list(events)
+        onsets = array('d', (pos.position for pos in positions))
+        offsets = array(
+            'd', (
+                pos.position + event.length.length
+                for pos, event in events.items()
+            )
+        )
+        starts = measures.starts
+        for position, (first, stop) in zip(
+            positions, split_at_barlines(onsets, offsets, starts)
+        ):
+            barlines: Optional[List[Tuple[int, Fraction]]] = None
+            if stop <= len(starts):
+                start = position.fraction
+                barlines = [
+                    (
+                        idx + 1,
+                        Fraction(starts[idx] / 4
+                                 ).limit_denominator(LIMIT_DENOMINATOR) -
+                        start
+                    ) for idx in range(first, stop)
+                ]
+            self.split_by_position(position, events[position], barlines)
+        return self
+
+    def extend(self, events: Iterable[Tuple[Position, Event]]) -> 'Voice':
+        """Place a stream of (position, event) pairs, sorted by position.
+
+        Plain notes of the same length, starting at the same position,
+        are packed into one Chord before placing, so chord merging is
+        done once per chord instead of once per note. Everything else
+        goes through `place`.
+        """
+        group: List[Event] = []
+        group_pos: Optional[Position] = None
+        for position, event in events:
+            if group and position == group_pos:
+                group.append(event)
+                continue
+            if group_pos is not None:
+                self._place_group(group_pos, group)
+            group_pos, group = position, [event]
+        if group_pos is not None:
+            self._place_group(group_pos, group)
+        return self
+
+    def _place_group(self, position: Position, group: List[Event]) -> None:
+        if len(group) == 1:
+            return self.place(position, group[0])
+        head = group[0]
+        if not self._grace_opened and all(
+            event.length == head.length and event.length != 0
+            and event.pitch.midi_pitch is not None
+            and not isinstance(event, (Chord, Tuplet, Grace))
+            and not any(
+                isinstance(item, NotationGraceBegin) for item in event.prefix
+            ) and not any(
+                isinstance(item, NotationGraceEnd) for item in event.postfix
+            ) for event in group
+        ):
+            chord = head.make_chord()
+            for event in group[1:]:
+                chord.append(event)
+            return self.place(position, chord)
+        for event in group:
+            self.place(position, event)
+
     def __setitem__(self, key: Position, value: Event) -> None:
         self.events[key] = value
 
@@ -136,6 +350,7 @@ class Voice:
         return key in self.events
 
     def __repr__(self) -> str:
+        from pprint import pformat
         return f"<Voice {self.voice_nr}: \n   {pformat(self.events,3)}>"
 
     def append_to_chord(self, position: Position, event: Event) -> None:
@@ -159,7 +374,7 @@ class Voice:
         if right.length == 0:
             return
         key = Position(position.position + left.length.length)
-        self[key].append(right)
+        self.place(key, right)
 
     def sort(self) -> 'Voice':
         """Sort events by their position, fixing overlaps."""
@@ -176,76 +391,104 @@ class Voice:
                 )
                 if right.length.length == 0:
                     break
+                tied_point = r_pos.fraction - pos.fraction in TieChain(
+                    pos, ev
+                ).split_points
                 self.events[pos] = left
-                self[r_pos].append(right)
+                self.place(r_pos, right)
+                if tied_point:
+                    self._tied_first(r_pos, right)
                 return self.sort()
         return self
 
+    def _tied_first(self, position: Position, tied: Event) -> None:
+        """Move pitches of tied continuation to the chord start.
+
+        `place` appends them. At barline and normalization splits the
+        held note comes first, as when notes were split on placing.
+        """
+        chord = self.events.get(position)
+        if not isinstance(chord, Chord) or chord is tied:
+            return
+        count = len(tied.pitches) if isinstance(tied, Chord) else 1
+        if count < len(chord.pitches):
+            chord.pitches = chord.pitches[-count:] + chord.pitches[:-count]
+
     def with_rests(self) -> 'Voice':
-        out = Voice(self.voice_nr)
+        placed: List[Tuple[Position, Event]] = []
         last = Position(0)
         for position, event in sorted(self.events.items()):
             if position < last:
-                _last_pos = list(out.events)[-1]
                 raise ValueError(
                     "overlapping events found: {}, {}".format(
-                        (_last_pos, out.events[_last_pos]), (position, event)
+                        placed[-1], (position, event)
                     )
                 )
             if distance := position.percize_distance(last):
                 left, bars, right = distance
+                first_bar = last.bar
                 if left:
-                    out[last].append(
-                        Event(left, Pitch(), voice_nr=self.voice_nr)
+                    placed.append(
+                        (last, Event(left, Pitch(), voice_nr=self.voice_nr))
                     )
+                    # bar of the last event is completed by the rest above
+                    first_bar += 1
+                    bars -= 1
                 for bar_nr in range(bars):
-                    bar = last.bar + bar_nr
-                    bar_info = rpr.Project().measure_info(bar)
+                    bar = first_bar + bar_nr
+                    bar_info = measure_info(bar)
                     bar_pos = Position(bar_info['start'])
                     bar_length = Length(
                         bar_info['end'] - bar_info['start'], full_bar=True
                     )
-                    out[bar_pos].append(
-                        Event(bar_length, Pitch(), voice_nr=self.voice_nr)
+                    placed.append(
+                        (
+                            bar_pos,
+                            Event(bar_length, Pitch(), voice_nr=self.voice_nr)
+                        )
                     )
                 if right:
-                    out[Position(position.position - right.length)].append(
-                        Event(right, Pitch(), voice_nr=self.voice_nr)
+                    placed.append(
+                        (
+                            Position(position.position - right.length),
+                            Event(right, Pitch(), voice_nr=self.voice_nr)
+                        )
                     )
-            out[position].append(event)
+            placed.append((position, event))
             last = Position(position.position + event.length.length)
+        out = Voice(self.voice_nr)
+        for position, event in placed:
+            out.place(position, event)
         return out
 
     def with_tuplets(self) -> 'Voice':
-        new_events = {}
-        tuplet = None
-        tuplet_opened = False
-        for position, event in self.events.items():
-            p_denom = position.fraction.denominator
-            l_denom = event.length.fraction.denominator
-            tuplet_length = l_denom != Fractured.closest_power_of_two(l_denom)
-            tuplet_pos = p_denom != Fractured.closest_power_of_two(p_denom)
-            for item in event.prefix:
-                if isinstance(item, NotationTupletBegin):
-                    tuplet_opened = True
-            # print(tuplet_pos, tuplet_length, tuplet_opened)
-            if (tuplet_pos or tuplet_length or tuplet_opened):
-                # print(f"p_denom={p_denom}, l_denom={l_denom}")
-                # print(f"appending {event} to tuplet")
-                if tuplet is None:
-                    tuplet = Tuplet(Length(0))
-                    new_events[position] = tuplet
-                tuplet.append(event)
-                for item in event.postfix:
-                    if isinstance(item, NotationTupletEnd):
-                        tuplet_opened = False
-                        tuplet = None
+        positions = list(self.events)
+        events = list(self.events.values())
+        flags = tuplet_mask(
+            array('l', (pos.fraction.denominator for pos in positions)),
+            array('l', (ev.length.fraction.denominator for ev in events)),
+        )
+        begins = [
+            any(isinstance(item, NotationTupletBegin) for item in ev.prefix)
+            for ev in events
+        ]
+        ends = [
+            any(isinstance(item, NotationTupletEnd) for item in ev.postfix)
+            for ev in events
+        ]
+        new_events: Dict[Position, Event] = {}
+        spans = iter(tuplet_spans(flags, begins, ends))
+        span = next(spans, None)
+        for idx, (position, event) in enumerate(zip(positions, events)):
+            if span is None or idx < span[0]:
+                new_events[position] = event
                 continue
-            if tuplet is not None and not tuplet_length and not tuplet_pos:
-                # print(f"tuplet {tuplet} is complete")
-                tuplet = None
-            # print(f"appending {event} to dict")
-            new_events[position] = event
+            if idx == span[0]:
+                tuplet = Tuplet(Length(0))
+                new_events[position] = tuplet
+            tuplet.append(event)
+            if idx == span[1] - 1:
+                span = next(spans, None)
 
         self.events = new_events
         return self
@@ -290,13 +533,15 @@ class Voice:
         self.events = new
         return self
 
-    def finalized(self) -> 'Voice':
+    def finalized(self, compress_rests: bool = True) -> 'Voice':
         self.sort()
-        with_rests = self.with_rests()
+        with_rests = self.with_rests().expand()
         with_tuples = with_rests.with_tuplets()
         with_globals = with_tuples.apply_global_events(
             self.globals, forced=True
         )
+        if not compress_rests:
+            return with_globals
         compressed_rests = with_globals.with_compressed_rests()
         return compressed_rests
 
@@ -358,13 +603,12 @@ def get_time_signature_betveen_bounds(
     begin_s: float, end_s: float
 ) -> Dict[Position, List[NotationTimeSignature]]:
     times = {}
-    pr = rpr.Project()
     i = 0
     num = 0
     denom = 0
     while True:
         i += 1
-        info = pr.measure_info(i)
+        info = measure_info(i)
         # print(info)
         if info['start'] < begin_s and info['start'] != 0:
             continue
@@ -403,6 +647,7 @@ def get_global_events(
     events = update_events(
         events, get_time_signature_betveen_bounds(begin_s, end_s)
     )
+    import reapy_boost as rpr
     pr = rpr.Project()
     for marker in pr.markers:
         # print(f'resolving marker {marker.name}')
@@ -415,7 +660,7 @@ def get_global_events(
 
 
 def notes_from_take(
-    take: rpr.Take, pitch_type: TrackPitchType, note_names: List[str]
+    take: 'rpr.Take', pitch_type: TrackPitchType, note_names: List[str]
 ) -> Dict[Position, List[Event]]:
     events: Dict[Position, List[Event]] = {}
     for note in take.notes:
@@ -441,12 +686,12 @@ def notes_from_take(
     return events
 
 
-def _filter_notations(event: MIDIEventDict) -> bool:
+def _filter_notations(event: 'MIDIEventDict') -> bool:
     return NotationPitch.is_reascore_event(event)
 
 
 def pitch_notations_from_take(
-    take: rpr.Take
+    take: 'rpr.Take'
 ) -> Dict[Position, List[NotationPitch]]:
     events: Dict[Position, List[NotationPitch]] = {}
 
@@ -459,12 +704,12 @@ def pitch_notations_from_take(
     return events
 
 
-def _filter_text(event: MIDIEventDict) -> bool:
+def _filter_text(event: 'MIDIEventDict') -> bool:
     return NotationText.is_text_event(event)
 
 
 def staff_notations_from_take(
-    take: rpr.Take
+    take: 'rpr.Take'
 ) -> Dict[Position, List[NotationEvent]]:
     events: Dict[Position, List[NotationEvent]] = {}
 
@@ -490,42 +735,120 @@ def filer_ignored_notes(
     return new
 
 
-@rpr.inside_reaper()
+def _table_rows(
+    table: NoteTable, pitch_type: TrackPitchType, note_names: List[str]
+) -> Tuple[NoteTable, List[int], Dict[int, List[NotationEvent]],
+           Optional[List[str]]]:
+    names = note_names if pitch_type == TrackPitchType.note_names else None
+    rows = table.indices(
+        without=NoteFlag.muted | NoteFlag.ignored, note_names=names
+    )
+    table, rows, texts = table.bind_texts(rows)
+    return table, table.argsort('onset', indices=rows), texts, names
+
+
+def events_from_table(
+    table: NoteTable, pitch_type: TrackPitchType, note_names: List[str]
+) -> Dict[Position, List[Event]]:
+    table, rows, texts, names = _table_rows(table, pitch_type, note_names)
+    events: Dict[Position, List[Event]] = {}
+    for pos, event in table.materialize(rows, names, texts):
+        if pos not in events:
+            events[pos] = []
+        events[pos].append(event)
+    return events
+
+
+@inside_reaper
 def events_from_take(
-    take: rpr.Take, pitch_type: TrackPitchType, note_names: List[str]
+    take: 'rpr.Take', pitch_type: TrackPitchType, note_names: List[str]
 ) -> Dict[Position, List[Event]]:
-    # events: Dict[Position, List[Event]] = {}
-    note_events = notes_from_take(take, pitch_type, note_names)
-    pitch_notations = pitch_notations_from_take(take)
-    staff_notations = staff_notations_from_take(take)
-    for pos, notes in note_events.items():
-        for note in notes:
-            if pos in pitch_notations:
-                for notation in pitch_notations[pos]:
-                    if notation.pitch.midi_pitch == note.pitch.midi_pitch:
-                        notation.apply_to_event(note)
-    for pos, n_events in staff_notations.items():
-        if pos not in note_events:
-            note_events[pos] = [Event(Length.from_fraction(1 / 16), Pitch())]
-        for n_event in n_events:
-            n_event.apply_to_event(note_events[pos][0])
-    note_events = filer_ignored_notes(note_events)
-    return note_events
+    return events_from_table(NoteTable.from_take(take), pitch_type, note_names)
+
+
+def split_at_barlines(
+    onsets: Sequence[float], offsets: Sequence[float],
+    barlines: Sequence[float]
+) -> List[Tuple[int, int]]:
+    """Find barlines, that every event has to be split at.
+
+    Parameters
+    ----------
+    onsets : Sequence[float]
+        event starts in quarter notes
+    offsets : Sequence[float]
+        event ends in quarter notes
+    barlines : Sequence[float]
+        sorted bar starts in quarter notes
+
+    Returns
+    -------
+    List[Tuple[int, int]]
+        for every event, [first, stop) range of barlines after its onset,
+        up to and including the first one at or after its offset
+    """
+    return [
+        (bisect_right(barlines, onset), bisect_left(barlines, offset) + 1)
+        for onset, offset in zip(onsets, offsets)
+    ]
+
+
+def tuplet_mask(position_denoms: Sequence[int],
+                length_denoms: Sequence[int]) -> List[bool]:
+    """Flag events whose position or length denominator is not 2**n."""
+    return [
+        bool(p_den & (p_den - 1) or l_den & (l_den - 1))
+        for p_den, l_den in zip(position_denoms, length_denoms)
+    ]
+
+
+def tuplet_spans(
+    flags: Sequence[bool], begins: Sequence[bool], ends: Sequence[bool]
+) -> List[Tuple[int, int]]:
+    """Group contiguous tuplet events into [start, stop) index spans.
+
+    Parameters
+    ----------
+    flags : Sequence[bool]
+        events, that can not be written without tuplet
+    begins : Sequence[bool]
+        events with NotationTupletBegin, which force tuplet up to the
+        next event with NotationTupletEnd
+    ends : Sequence[bool]
+        events with NotationTupletEnd, which close the current tuplet
+    """
+    spans: List[Tuple[int, int]] = []
+    start: Optional[int] = None
+    opened = False
+    for idx, flag in enumerate(flags):
+        if begins[idx]:
+            opened = True
+        if flag or opened:
+            if start is None:
+                start = idx
+            if ends[idx]:
+                opened = False
+                spans.append((start, idx + 1))
+                start = None
+        elif start is not None:
+            spans.append((start, idx))
+            start = None
+    if start is not None:
+        spans.append((start, len(flags)))
+    return spans
 
 
 def split_by_voice(events: Dict[Position, List[Event]]) -> Dict[int, Voice]:
-    voices: Dict[int, Voice] = {}
+    streams: Dict[int, List[Tuple[Position, Event]]] = {}
     for position, event_list in events.items():
         for event in event_list:
             key = event.voice_nr
-            if key not in voices:
-                voices[key] = Voice(key)
-            voice = voices[key]
-            voice[position].append(event)
-    temp = voices
-    voices = {}
-    for nr in sorted(temp):
-        voices[nr] = temp[nr]
+            if key not in streams:
+                streams[key] = []
+            streams[key].append((position, event))
+    voices: Dict[int, Voice] = {}
+    for nr in sorted(streams):
+        voices[nr] = Voice(nr).extend(streams[nr])
     for voice in voices.values():
         voice.sort()
     # pprint(voices)
@@ -552,6 +875,28 @@ def split_by_staff(events: Dict[Position, List[Event]]) -> List[Staff]:
     return staffs
 
 
+def split_table_by_staff(
+    table: NoteTable, pitch_type: TrackPitchType, note_names: List[str]
+) -> List[Staff]:
+    """Same as split_by_staff, but partitions rows of the table.
+
+    Events are made per voice, right before they are placed.
+    """
+    table, rows, texts, names = _table_rows(table, pitch_type, note_names)
+    positions: Dict[float, Position] = {}
+    staffs: List[Staff] = []
+    for nr, staff_rows in table.partition('staff', rows).items():
+        staff = Staff(nr)
+        for voice_nr, voice_rows in table.partition('voice',
+                                                    staff_rows).items():
+            voice = Voice(voice_nr).extend(
+                table.materialize(voice_rows, names, texts, positions)
+            )
+            staff.append(voice.sort())
+        staffs.append(staff)
+    return staffs
+
+
 class BarCheck(Attachment):
 
     def __init__(self, bar_nr: Optional[int] = None) -> None:
@@ -573,6 +918,8 @@ class BarCheck(Attachment):
 
 
 if __name__ == '__main__':
+    from pprint import pprint
+    import reapy_boost as rpr
     events = events_from_take(rpr.Project().selected_items[0].active_take)
     pprint(events)
     print('\n-------------------\n')
@@ -0,0 +1,560 @@
+"""MusicXML export of the ReaScore DOM.
+
+The score is written measure by measure through `XMLGenerator`, so the
+document is never built in memory. Voices of a part are finalized before
+its first measure is written, and are grouped into measures while
+writing.
+"""
+from fractions import Fraction
+from itertools import groupby
+import re
+from typing import (
+    Dict, Iterator, List, NamedTuple, Optional, Sequence, TextIO, Tuple,
+    Union
+)
+from xml.sax.saxutils import XMLGenerator
+
+from rea_score.dom import Staff, Voice
+from rea_score.notation_events import (
+    NotationKeySignature, NotationTimeSignature
+)
+from rea_score.primitives import (
+    PITCH_IS_SPACER, Chord, Clef, Event, GlobalNotationEvent, Grace,
+    GraceType, Length, Pitch, Position, Tuplet, measure_info
+)
+from rea_score.scale import Key, Scale
+
+# divisions per quarter note, divisible by all tuplet rates up to 9
+DIVISIONS = 10080
+
+NOTE_TYPES = {
+    1: 'whole',
+    2: 'half',
+    4: 'quarter',
+    8: 'eighth',
+    16: '16th',
+    32: '32nd',
+    64: '64th',
+    128: '128th',
+}
+
+CLEFS: Dict[Clef, Tuple[str, int, int]] = {
+    Clef.treble: ('G', 2, 0),
+    Clef.bass: ('F', 4, 0),
+    Clef.alto: ('C', 3, 0),
+    Clef.tenor: ('C', 4, 0),
+    Clef.percussion: ('percussion', 0, 0),
+    Clef.GG: ('G', 2, -1),
+    Clef.french: ('G', 1, 0),
+    Clef.soprano: ('C', 1, 0),
+    Clef.mezzosoprano: ('C', 2, 0),
+    Clef.baritone: ('F', 3, 0),
+    Clef.altovarC: ('C', 3, 0),
+    Clef.tenorvarC: ('C', 4, 0),
+    Clef.subbass: ('F', 5, 0),
+}
+
+_LETTER_FIFTHS = {'f': -1, 'c': 0, 'g': 1, 'd': 2, 'a': 3, 'e': 4, 'b': 5}
+_MODE_FIFTHS = {
+    Scale.lydian: 1,
+    Scale.major: 0,
+    Scale.mixolydian: -1,
+    Scale.dorian: -2,
+    Scale.minor: -3,
+    Scale.phrygian: -4,
+    Scale.locrian: -5,
+}
+
+Attributes = Dict[str, Union[Key, Tuple[int, int], Clef]]
+
+
+class ScorePart(NamedTuple):
+    name: str
+    staves: List[Staff]
+    octave_offset: int = 0
+
+
+def key_fifths(key: Key) -> int:
+    """Position of the key signature on the circle of fifths."""
+    fifths = _LETTER_FIFTHS[key.tonic[0]]
+    fifths += 7 * (key.tonic.count('♯') - key.tonic.count('♭'))
+    return fifths + _MODE_FIFTHS[key.scale]
+
+
+def divisions(length: Fraction) -> int:
+    """Duration in divisions for length in whole notes."""
+    return round(length * 4 * DIVISIONS)
+
+
+def note_values(length: Fraction) -> List[Tuple[str, int]]:
+    """Tied (type, dots) note values, that sum up to length."""
+    out = []
+    for part in reversed(Length.normalized(length)):
+        if part.denominator == 1:
+            out.extend(('whole', 0) for _ in range(part.numerator))
+        elif part.numerator == 3:
+            out.append((NOTE_TYPES[part.denominator // 2], 1))
+        else:
+            out.append((NOTE_TYPES.get(part.denominator, '128th'), 0))
+    return out
+
+
+_TYPE_DENOMS = {value: key for key, value in NOTE_TYPES.items()}
+
+
+def _value_length(note_type: str, dots: int) -> Fraction:
+    return Fraction(1, _TYPE_DENOMS[note_type]) * (2 - Fraction(1, 2**dots))
+
+
+class _Modification(NamedTuple):
+    actual: int
+    normal: int
+
+
+class MusicXMLWriter:
+    """Streams parts of ReaScore DOM as score-partwise MusicXML.
+
+    Voices are finalized like for LilyPond, except that full-bar rests are
+    not compressed, as every measure is written separately. Tuplets,
+    crossing barlines, are split into a bracket per measure. Positions
+    query bars, so activate a MeasureMap to avoid calls to REAPER.
+    """
+
+    def __init__(self, out: TextIO, encoding: str = 'utf-8') -> None:
+        self.gen = XMLGenerator(out, encoding, short_empty_elements=True)
+        self._ties: Dict[int, set] = {}
+        self._current: Attributes = {}
+
+    def _element(
+        self,
+        name: str,
+        text: Optional[object] = None,
+        **attrs: object
+    ) -> None:
+        self.gen.startElement(name, {k: str(v) for k, v in attrs.items()})
+        if text is not None:
+            self.gen.characters(str(text))
+        self.gen.endElement(name)
+
+    def _start(self, name: str, **attrs: object) -> None:
+        self.gen.startElement(name, {k: str(v) for k, v in attrs.items()})
+
+    def _end(self, name: str) -> None:
+        self.gen.endElement(name)
+        self.gen.ignorableWhitespace('\n')
+
+    def write_score(self, parts: Sequence[ScorePart]) -> None:
+        self.gen.startDocument()
+        self._start('score-partwise', version='4.0')
+        self._start('part-list')
+        for idx, part in enumerate(parts, 1):
+            self._start('score-part', id=f'P{idx}')
+            self._element('part-name', part.name)
+            self._end('score-part')
+        self._end('part-list')
+        for idx, part in enumerate(parts, 1):
+            self.write_part(f'P{idx}', part.staves, part.octave_offset)
+        self._end('score-partwise')
+        self.gen.endDocument()
+
+    def write_part(
+        self, part_id: str, staves: List[Staff], octave_offset: int = 0
+    ) -> None:
+        self._start('part', id=part_id)
+        voices: List[Tuple[int, int, Iterator]] = []
+        voice_nr = 0
+        for staff_idx, staff in enumerate(staves, 1):
+            for voice in staff:
+                voice_nr += 1
+                voices.append(
+                    (staff_idx, voice_nr, self._measures(voice.finalized(
+                        compress_rests=False
+                    )))
+                )
+        pending = [next(measures, None) for _, _, measures in voices]
+        current: Attributes = {}
+        self._current = current
+        self._ties = {}
+        first = True
+        while any(pending):
+            bar = min(measure[0] for measure in pending if measure)
+            self._start('measure', number=bar)
+            if first:
+                self._write_first_attributes(staves, pending, bar, current)
+                first = False
+            backup = 0
+            for idx, (staff_nr, voice_nr, measures) in enumerate(voices):
+                measure = pending[idx]
+                if measure is None or measure[0] != bar:
+                    continue
+                if backup:
+                    self._start('backup')
+                    self._element('duration', backup)
+                    self._end('backup')
+                backup = self._write_measure(
+                    measure[1], staff_nr, voice_nr, octave_offset, current
+                )
+                pending[idx] = next(measures, None)
+            self._end('measure')
+        self._end('part')
+
+    def _measures(
+        self, voice: Voice
+    ) -> Iterator[Tuple[int, List[Tuple[Position, Event]]]]:
+        items = (
+            piece for position, event in voice.events.items()
+            for piece in (
+                _split_tuplet(position, event) if isinstance(event, Tuplet)
+                and event.length.fraction > position.bar_end_distance else
+                [(position, event)]
+            )
+        )
+        for bar, events in groupby(items, key=lambda item: item[0].bar):
+            yield bar, list(events)
+
+    def _write_first_attributes(
+        self,
+        staves: List[Staff],
+        pending: List[Optional[Tuple[int, List[Tuple[Position, Event]]]]],
+        bar: int,
+        current: Attributes,
+    ) -> None:
+        key: Key = Key('c', Scale.major)
+        time: Optional[Tuple[int, int]] = None
+        for measure in pending:
+            if measure is None or measure[0] != bar:
+                continue
+            for position, event in measure[1]:
+                if position.bar_position != 0:
+                    break
+                for attach in _attachments(event):
+                    if isinstance(attach, NotationKeySignature):
+                        key = attach.key
+                    elif isinstance(attach, NotationTimeSignature):
+                        time = (
+                            attach.time_sig.numerator,
+                            attach.time_sig.denomenator,
+                        )
+        if time is None:
+            info = measure_info(bar)
+            time = (info['num'], info['denom'])
+        current['key'], current['time'] = key, time
+        self._start('attributes')
+        self._element('divisions', DIVISIONS)
+        self._write_key(key)
+        self._write_time(time)
+        if len(staves) > 1:
+            self._element('staves', len(staves))
+        for staff_nr, staff in enumerate(staves, 1):
+            current[f'clef{staff_nr}'] = staff.clef
+            self._write_clef(staff.clef, staff_nr)
+        self._end('attributes')
+
+    def _write_key(self, key: Key) -> None:
+        self._start('key')
+        self._element('fifths', key_fifths(key))
+        self._element('mode', key.scale.value)
+        self.gen.endElement('key')
+
+    def _write_time(self, time: Tuple[int, int]) -> None:
+        self._start('time')
+        self._element('beats', time[0])
+        self._element('beat-type', time[1])
+        self.gen.endElement('time')
+
+    def _write_clef(self, clef: Clef, staff_nr: int) -> None:
+        sign, line, octave = CLEFS[clef]
+        self._start('clef', number=staff_nr)
+        self._element('sign', sign)
+        if line:
+            self._element('line', line)
+        if octave:
+            self._element('clef-octave-change', octave)
+        self.gen.endElement('clef')
+
+    def _write_changes(
+        self, event: Union[Event, GlobalNotationEvent], staff_nr: int,
+        current: Attributes
+    ) -> None:
+        key = time = clef = None
+        for attach in _attachments(event):
+            if isinstance(attach, NotationKeySignature):
+                if attach.key != current.get('key'):
+                    key = current['key'] = attach.key
+            elif isinstance(attach, NotationTimeSignature):
+                sig = (attach.time_sig.numerator, attach.time_sig.denomenator)
+                if sig != current.get('time'):
+                    time = current['time'] = sig
+            elif isinstance(attach, Clef):
+                if attach is not current.get(f'clef{staff_nr}'):
+                    clef = current[f'clef{staff_nr}'] = attach
+        if key is None and time is None and clef is None:
+            return
+        self._start('attributes')
+        if key is not None:
+            self._write_key(key)
+        if time is not None:
+            self._write_time(time)
+        if clef is not None:
+            self._write_clef(clef, staff_nr)
+        self._end('attributes')
+
+    def _write_measure(
+        self,
+        events: List[Tuple[Position, Event]],
+        staff_nr: int,
+        voice_nr: int,
+        octave_offset: int,
+        current: Attributes,
+    ) -> int:
+        """Write events of one voice in measure.
+
+        Returns
+        -------
+        int
+            written duration in divisions, to back up before next voice
+        """
+        cursor = 0
+        for position, event in events:
+            start = divisions(position.bar_position)
+            if start > cursor:
+                self._write_forward(start - cursor, staff_nr, voice_nr)
+                cursor = start
+            self._write_changes(event, staff_nr, current)
+            if isinstance(event, GlobalNotationEvent):
+                continue
+            cursor += self._write_event(
+                event, staff_nr, voice_nr, octave_offset
+            )
+        return cursor
+
+    def _write_forward(self, duration: int, staff_nr: int,
+                       voice_nr: int) -> None:
+        self._start('forward')
+        self._element('duration', duration)
+        self._element('voice', voice_nr)
+        self._element('staff', staff_nr)
+        self._end('forward')
+
+    def _write_event(
+        self,
+        event: Event,
+        staff_nr: int,
+        voice_nr: int,
+        octave_offset: int,
+        modification: Optional[_Modification] = None,
+    ) -> int:
+        for attach in event.prefix:
+            if isinstance(attach, Grace):
+                self._write_grace(attach, staff_nr, voice_nr, octave_offset)
+        if isinstance(event, Tuplet):
+            rate = event.rate
+            mod = _Modification(rate.numerator, rate.denominator)
+            members = event.events
+            duration = 0
+            for idx, member in enumerate(members):
+                for attach in member.prefix:
+                    if isinstance(attach, Grace):
+                        self._write_grace(
+                            attach, staff_nr, voice_nr, octave_offset
+                        )
+                bracket = []
+                if idx == 0:
+                    bracket.append('start')
+                if idx == len(members) - 1:
+                    bracket.append('stop')
+                duration += self._write_notes(
+                    member, staff_nr, voice_nr, octave_offset, mod, bracket
+                )
+            return duration
+        return self._write_notes(
+            event, staff_nr, voice_nr, octave_offset, modification
+        )
+
+    def _write_grace(
+        self, grace: Grace, staff_nr: int, voice_nr: int, octave_offset: int
+    ) -> None:
+        slash = grace.grace_type in (
+            GraceType.acciaccatura, GraceType.slashedGrace
+        )
+        for event in grace.events:
+            self._write_notes(
+                event,
+                staff_nr,
+                voice_nr,
+                octave_offset,
+                grace='yes' if slash else 'no'
+            )
+
+    def _write_notes(
+        self,
+        event: Event,
+        staff_nr: int,
+        voice_nr: int,
+        octave_offset: int,
+        modification: Optional[_Modification] = None,
+        tuplet: Sequence[str] = (),
+        grace: Optional[str] = None,
+    ) -> int:
+        """Write event as tied notes (or chords) of plain note values.
+
+        Returns
+        -------
+        int
+            duration in divisions
+        """
+        pitches = event.pitches if isinstance(event, Chord) else [event.pitch]
+        if pitches[0].midi_pitch == PITCH_IS_SPACER:
+            duration = self._duration(event.length.fraction, modification)
+            self._write_forward(duration, staff_nr, voice_nr)
+            return duration
+        rest = pitches[0].midi_pitch is None
+        if rest and event.length.full_bar:
+            values: List[Optional[Tuple[str, int]]] = [None]
+        else:
+            values = list(note_values(event.length.fraction))
+        ties = self._ties.setdefault(voice_nr, set())
+        total = 0
+        for idx, value in enumerate(values):
+            if value is None:
+                length = event.length.fraction
+            else:
+                length = _value_length(*value)
+            duration = 0 if grace else self._duration(length, modification)
+            total += duration
+            last = idx == len(values) - 1
+            for p_idx, pitch in enumerate(pitches):
+                midi = None if rest else _shifted(pitch, octave_offset)
+                tie_stop = midi in ties
+                tie_start = not rest and (not last or pitch.tie)
+                self._start('note')
+                if grace:
+                    self._element('grace', slash=grace)
+                if p_idx:
+                    self._element('chord')
+                self._write_pitch(pitch, midi, value is None)
+                if not grace:
+                    self._element('duration', duration)
+                if tie_stop:
+                    self._element('tie', type='stop')
+                if tie_start:
+                    self._element('tie', type='start')
+                self._element('voice', voice_nr)
+                if value is not None:
+                    self._element('type', value[0])
+                    for _ in range(value[1]):
+                        self._element('dot')
+                if modification:
+                    self._start('time-modification')
+                    self._element('actual-notes', modification.actual)
+                    self._element('normal-notes', modification.normal)
+                    self.gen.endElement('time-modification')
+                self._element('staff', staff_nr)
+                brackets = [
+                    b for b in tuplet
+                    if (b == 'start' and idx == 0) or (b == 'stop' and last)
+                ]
+                if tie_stop or tie_start or (brackets and not p_idx):
+                    self._start('notations')
+                    if tie_stop:
+                        self._element('tied', type='stop')
+                    if tie_start:
+                        self._element('tied', type='start')
+                    if not p_idx:
+                        for bracket in brackets:
+                            self._element('tuplet', type=bracket)
+                    self.gen.endElement('notations')
+                self._end('note')
+                if midi is not None:
+                    if tie_start:
+                        ties.add(midi)
+                    else:
+                        ties.discard(midi)
+        return total
+
+    def _duration(
+        self, length: Fraction, modification: Optional[_Modification]
+    ) -> int:
+        if modification:
+            length = length * modification.normal / modification.actual
+        return divisions(length)
+
+    def _write_pitch(
+        self, pitch: Pitch, midi: Optional[int], measure_rest: bool
+    ) -> None:
+        if midi is None:
+            if measure_rest:
+                self._element('rest', measure='yes')
+            else:
+                self._element('rest')
+            return
+        key = self._current.get('key', Key('c', Scale.major))
+        named = Pitch(midi, pitch.accidental).named_pitch(key)  # type:ignore
+        match = re.match(r'(\D+)(-?\d+)$', named)
+        if match is None:
+            raise ValueError(f"can't spell pitch {pitch}: {named}")
+        name, octave = match.groups()
+        step = name[0].upper()
+        alter = name.count('♯') - name.count('♭')
+        self._start('pitch')
+        self._element('step', step)
+        if alter:
+            self._element('alter', alter)
+        self._element('octave', octave)
+        self.gen.endElement('pitch')
+
+
+def _split_tuplet(position: Position,
+                  tuplet: Tuplet) -> List[Tuple[Position, Tuplet]]:
+    """Split tuplet at barlines, members crossing them are tied.
+
+    Every piece gets its own rate, computed from the real lengths of its
+    members, like the whole tuplet.
+    """
+    pieces: List[Tuple[Position, Tuplet]] = []
+
+    def new_piece(start: Position) -> Tuplet:
+        piece = Tuplet(
+            Length(0), voice_nr=tuplet.voice_nr, staff_nr=tuplet.staff_nr,
+            prefix=[] if pieces else tuplet.prefix
+        )
+        pieces.append((start, piece))
+        return piece
+
+    start, room = position, position.bar_end_distance
+    end = position.fraction
+    piece = new_piece(start)
+    # members with real (not written) lengths
+    for member in tuplet._events:
+        rest: Optional[Event] = member
+        while rest is not None:
+            if rest.length.fraction > room:
+                left, rest = rest.split(Length.from_fraction(room), tie=True)
+                piece.append(left)
+                end += room
+                room = Fraction(0)
+            else:
+                piece.append(rest)
+                end += rest.length.fraction
+                room -= rest.length.fraction
+                rest = None
+            if room <= 0:
+                start = Position.from_fraction(end)
+                room = start.bar_end_distance
+                piece = new_piece(start)
+    return [(start, piece) for start, piece in pieces if piece._events]
+
+
+def _shifted(pitch: Pitch, octave_offset: int) -> int:
+    return pitch.midi_pitch + octave_offset * 12  # type:ignore
+
+
+def _attachments(event: Union[Event, GlobalNotationEvent]) -> List[object]:
+    if isinstance(event, GlobalNotationEvent):
+        return list(event.events)
+    return list(event.prefix)
+
+
+def write_musicxml(out: TextIO, parts: Sequence[ScorePart]) -> None:
+    """Write parts as MusicXML document to text stream."""
+    MusicXMLWriter(out).write_score(parts)
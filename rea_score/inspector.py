@@ -1,18 +1,18 @@
-from copy import deepcopy
+from copy import copy, deepcopy
 from enum import Enum
 from pathlib import Path
+import re
 
 from reapy_boost.core.reaper.reaper import perform_action
 
-from rea_score.lily_convert import render_part
-
 import reapy_boost as rpr
 from reapy_boost import reascript_api as RPR
-from typing import List, Optional, Union, cast
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple, Union, cast
 
 from reapy_boost.core.item.midi_event import CCShapeFlag
-from rea_score.primitives import (Clef, GraceType, NotationEvent,
-                                  NotationMarker, NotationPitch, Pitch)
+from rea_score.primitives import (NOTATION_FORMAT, Clef, GraceType,
+                                  MeasureMap, NotationEvent, NotationMarker,
+                                  NotationPitch, Pitch)
 from rea_score.notations_pitch import (
     NotationAccidental, NotationArticulation, NotationBeamGroupBegin,
     NotationBeamGroupEnd, NotationBeaming, NotationBreakBefore, NotationClef,
@@ -24,11 +24,14 @@ from rea_score.notation_events import NotationKeySignature, NotationPlainText
 
 from rea_score.scale import Accidental, Key, Scale
 
-from .dom import (events_from_take, get_global_events, split_by_staff,
-                  update_events, TrackPitchType, TrackType)
-from .lily_convert import LyDict, render_staff
+from .dom import get_global_events, Staff, TrackPitchType, TrackType
+from .lily_convert import LyDict
 from .lily_export import render
-from .keymap import keymap
+from .keymap import ACTIONS, Action, find_action, keymap
+from .notation_index import cached_index, take_index
+from .note_table import NoteTable
+from .snapshot import (SUFFIX as SNAPSHOT_SUFFIX, Snapshot, TrackSnapshot,
+                       dump as dump_snapshot, render_track)
 
 EXT_SECTION = 'Levitanus_ReaScore'
 
@@ -118,17 +121,15 @@ class ProjectInspector:
         return self.project.add_marker(pos, name, (0, 255, 0))
 
     def perform_shortcut(self, char: str) -> None:
-        if char in keymap:
-            func = keymap[char]
-        else:
-            func = ''
-        print(char, func)
-        if func:
-            self.perform_func(func)
+        if char in _shortcuts:
+            _shortcuts[char]()
 
     @staticmethod
-    def perform_func(func: str) -> None:
-        eval(func)
+    def perform_func(func: Union[str, Action]) -> None:
+        """Perform registered action, or its expression."""
+        if isinstance(func, str):
+            func = find_action(func)
+        _actions[func]()
 
     @property
     def score_tracks(self) -> List[rpr.Track]:
@@ -161,6 +162,37 @@ class ProjectInspector:
         pr_tracks.remove(track.GUID)
         self.state('tracks', pr_tracks)
 
+    def snapshot(self, tracks: Optional[List[rpr.Track]] = None) -> Snapshot:
+        """Read score tracks (or given tracks) with bars of the project.
+
+        The snapshot can be dumped and rendered by
+        ``python -m rea_score render``, without REAPER.
+        """
+        if tracks is None:
+            tracks = self.score_tracks
+        track_snapshots = [
+            TrackInspector(track).snapshot() for track in tracks
+        ]
+        end_qn = max((track.end_qn for track in track_snapshots), default=0)
+        measures = MeasureMap.from_project(self.project, end_qn)
+        return Snapshot(
+            measures.bars, track_snapshots, str(self.project.path)
+        )
+
+    def write_snapshot(
+        self,
+        tracks: Optional[List[rpr.Track]] = None,
+        path: Optional[Path] = None
+    ) -> Path:
+        """Dump snapshot to the export dir, or to the given path."""
+        if path is None:
+            path = self.export_dir_absolute.joinpath(
+                'score' + SNAPSHOT_SUFFIX
+            )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        dump_snapshot(self.snapshot(tracks), path)
+        return path
+
     def render_score(self) -> None:
         render_dicts = []
         for track in self.score_tracks:
@@ -292,9 +324,13 @@ class TrackInspector:
     def octave_offset(self, ofst: int) -> None:
         self.state('octave_offset', ofst)
 
-    def render(self, compile_ly: bool = True) -> LyDict:
-        events = {}
-        export_path = self.export_path
+    def snapshot(self) -> TrackSnapshot:
+        """Read everything needed to render the track, without building.
+
+        Items are read in bulk, the rest of the work can be done outside
+        of REAPER, see `rea_score.snapshot`.
+        """
+        table = NoteTable()
         begin, end = self.track.project.length, .0
         pitch_type = self.pitch_type
         note_names = []
@@ -307,30 +343,61 @@ class TrackInspector:
             i_end = i_pos + item.length
             if end < i_end:
                 end = i_end
-            # print(f'update events by {item}')
-            events.update(
-                events_from_take(item.active_take, pitch_type, note_names))
-        # print('getting global events')
+            table.extend(NoteTable.from_take(item.active_take))
         global_events = get_global_events([
             *ProjectInspector(self.track.project).notations_at_start(),
             *self.notations_at_start()
         ], begin, end)
-        # events = update_events(events, global_events)
-        events = {k: events[k] for k in sorted(events)}
-        # print('sort staves')
-        staves = split_by_staff(events)
-        for staff in staves:
-            # print(f'apply global events to staff {staff.staff_nr}')
-            if (clef := self.clef) is not Clef.treble:
-                staff.clef = clef
-            staff.apply_global_events(global_events)
-        # print(staves)
-        # print('render part')
-        lily_dict = render_part(self.part_name, staves, self.track_type,
-                                self.octave_offset)
-        lily = f'''{lily_dict['definition']}\n{lily_dict['expression']}'''
-        export_path.parent.mkdir(parents=True, exist_ok=True)
-        pdf = render(lily, export_path, compile_ly)
+        return TrackSnapshot(
+            self.guid,
+            self.part_name,
+            table,
+            global_events,
+            track_type=self.track_type,
+            pitch_type=pitch_type,
+            clef=self.clef,
+            octave_offset=self.octave_offset,
+            note_names=note_names,
+            export_path=str(self.export_path),
+        )
+
+    def build_staves(self) -> Tuple[List[Staff], MeasureMap]:
+        """Read items of the track into staves with global events applied.
+
+        Returns
+        -------
+        Tuple[List[Staff], MeasureMap]
+            staves and bars of the project, that they were built with.
+            Activate the map while rendering the staves.
+        """
+        snapshot = self.snapshot()
+        measures = MeasureMap.from_project(
+            self.track.project, snapshot.end_qn
+        )
+        with measures.activated():
+            staves = snapshot.staves()
+        return staves, measures
+
+    def export_musicxml(self) -> Path:
+        """Write the track as MusicXML next to the .ly file, no compile."""
+        from .export import ScorePart, write_musicxml
+        staves, measures = self.build_staves()
+        path = self.export_path.with_suffix('.musicxml')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with measures.activated(), open(path, 'w', encoding='utf-8') as out:
+            write_musicxml(
+                out,
+                [ScorePart(self.part_name, staves, self.octave_offset)]
+            )
+        return path
+
+    def render(self, compile_ly: bool = True) -> LyDict:
+        snapshot = self.snapshot()
+        measures = MeasureMap.from_project(
+            self.track.project, snapshot.end_qn
+        )
+        with measures.activated():
+            pdf, lily_dict = render_track(snapshot, compile_ly=compile_ly)
         # while not pdf.exists():
         #     ...
         with open(pdf, 'rb') as in_:
@@ -341,53 +408,517 @@ class TrackInspector:
         return lily_dict
 
 
+class SelectedNote(NamedTuple):
+    """Note of a take, duck-typed for `NotationTransaction`."""
+    index: int
+    infos: Dict[str, Union[bool, float, int]]
+
+
+@rpr.inside_reaper()
+def _selected_note_infos(take_id: str,
+                         limit: int) -> List[Dict[str, Union[bool, float,
+                                                             int]]]:
+    infos: List[Dict[str, Union[bool, float, int]]] = []
+    idx = RPR.MIDI_EnumSelNotes(take_id, -1)  # type:ignore
+    while idx >= 0:
+        (_, _, _, selected, muted, start, end, channel, pitch,
+         velocity) = RPR.MIDI_GetNote(  # type:ignore
+             take_id, idx, 0, 0, 0, 0, 0, 0, 0)
+        infos.append(
+            dict(index=idx, selected=bool(selected), muted=bool(muted),
+                 ppq_position=start, ppq_end=end, channel=channel,
+                 pitch=pitch, velocity=velocity)
+        )
+        if len(infos) == limit:
+            break
+        idx = RPR.MIDI_EnumSelNotes(take_id, idx)  # type:ignore
+    return infos
+
+
+def selected_notes(take: rpr.Take,
+                   limit: Optional[int] = None) -> List[SelectedNote]:
+    """Selected notes of the take with their infos, in take order.
+
+    Only selected notes are enumerated, in a single call to REAPER, so
+    the work grows with the selection, not with the take.
+
+    Parameters
+    ----------
+    take : rpr.Take
+    limit : Optional[int]
+        stop after this number of notes
+    """
+    if limit is None:
+        limit = -1
+    return [
+        SelectedNote(cast(int, infos.pop('index')), infos)
+        for infos in _selected_note_infos(take.id, limit)
+    ]
+
+
+Note = Union[rpr.Note, SelectedNote]
+
 class NotationPitchInspector:
 
-    def set(self, take: rpr.Take, notes: List[rpr.Note],
+    @staticmethod
+    def index(midi: List[rpr.MIDIEventDict]) -> Dict[Tuple[float, int], int]:
+        """Map (ppq, pitch) of ReaScore notation events to their indices."""
+        index = {}
+        for idx, event in enumerate(midi):
+            pitch = NotationPitch.buf_pitch(event['buf'])
+            if pitch is not None:
+                index[(event['ppq'], pitch)] = idx
+        return index
+
+    @staticmethod
+    def merged(old: List[NotationPitch],
+               new: List[NotationPitch]) -> List[NotationPitch]:
+        """Update old notations by new ones, add the rest of new."""
+        updated = []
+        for old_event in old:
+            for new_event in new:
+                if old_event.update(new_event) is True:
+                    updated.append(new_event)
+        old.extend(event for event in new if event not in updated)
+        return old
+
+    def set(self, take: rpr.Take, notes: List[Note],
             events: List[NotationPitch]) -> None:
-        midi = take.get_midi()
-        notations = list(
-            filter(lambda event: NotationPitch.is_reascore_event(event), midi))
+        """Add events to the notations of notes, writing the take once."""
+        with NotationTransaction(take) as transaction:
+            transaction.set(notes, events)
+
+
+# Delta writes read every text/sysex event and write every edit with its
+# own API call, bulk writes pass all events of the take twice in one call.
+# Delta is used while (text events + edits) stay below this share of all
+# events of the take. Measure with benchmarks/bench_notation_write.py.
+DELTA_WRITE_SHARE = 0.1
+
+
+class TakeTextEvents:
+    """Text and sysex events of a take, accessed one by one.
+
+    Buffers are in the form of `MIDIEventDict`: [0xff, type, *text] for
+    text events.
+    """
+
+    def __init__(self, take: rpr.Take) -> None:
+        self.take = take
+
+    def counts(self) -> Tuple[int, int]:
+        """Number of text/sysex events and of all events."""
+        _, _, notes, ccs, texts = RPR.MIDI_CountEvts(  # type:ignore
+            self.take.id, 0, 0, 0)
+        return texts, notes + ccs + texts
+
+    def get(self, idx: int) -> Tuple[float, List[int]]:
+        (_, _, _, _, _, ppq, type_, msg,
+         _) = RPR.MIDI_GetTextSysexEvt(  # type:ignore
+             self.take.id, idx, 0, 0, 0, 0, '', 4096)
+        return ppq, [0xff, type_ & 0xff, *msg.encode('latin-1')]
+
+    def set(self, idx: int, buf: List[int]) -> None:
+        msg = bytes(buf[2:]).decode('latin-1')
+        RPR.MIDI_SetTextSysexEvt(  # type:ignore
+            self.take.id, idx, None, None, None, None, msg, len(msg), True)
+
+    def insert(self, ppq: float, buf: List[int]) -> None:
+        msg = bytes(buf[2:]).decode('latin-1')
+        RPR.MIDI_InsertTextSysexEvt(  # type:ignore
+            self.take.id, False, False, ppq, buf[1], msg, len(msg))
+
+    def delete(self, idx: int) -> None:
+        RPR.MIDI_DeleteTextSysexEvt(self.take.id, idx)  # type:ignore
+
+    def sort(self) -> None:
+        RPR.MIDI_Sort(self.take.id)  # type:ignore
+
+
+class NotationTransaction:
+    """Notation edits of a take, kept in memory and written at once.
+
+    Edits are committed on exit from the context, or discarded if an
+    exception was raised. Existing notation event of a note is replaced
+    in place, new ones are added.
+
+    Small change sets are written event by event (see DELTA_WRITE_SHARE),
+    with a single sort at the end. Otherwise all MIDI of the take is read
+    and written in one call each. Existing notations are taken from the
+    notation index of the take, if it is cached and up to date.
+
+    >>> with NotationTransaction(take, 'voice and staff') as transaction:
+    ...     transaction.set(notes, [NotationVoice(Pitch(127), 2)])
+    ...     transaction.set(notes, [NotationStaff(Pitch(127), 2)])
+    >>> transaction.summary
+    '2 notation events created, 1 updated, 0 deleted'
+
+    Parameters
+    ----------
+    take : rpr.Take
+    undo_name : Optional[str]
+        if given, the commit is wrapped in undo block of this name
+    delta : Optional[bool]
+        force delta (True) or bulk (False) write, by default it is chosen
+        by the size of the change set
+    """
+    text_events_type = TakeTextEvents
+
+    def __init__(self,
+                 take: rpr.Take,
+                 undo_name: Optional[str] = None,
+                 delta: Optional[bool] = None) -> None:
+        self.take = take
+        self.undo_name = undo_name
+        self.delta = delta
+        # (ppq, pitch): (channel, notations), empty list clears the note
+        self.edits: Dict[Tuple[float, int], Tuple[int,
+                                                  List[NotationPitch]]] = {}
+        self.created = 0
+        self.updated = 0
+        self.deleted = 0
+
+    def __enter__(self) -> 'NotationTransaction':
+        return self
+
+    def __exit__(self, exc_type: Optional[type], *_: object) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.edits = {}
+
+    @property
+    def summary(self) -> str:
+        return (
+            f'{self.created} notation events created, {self.updated} '
+            f'updated, {self.deleted} deleted'
+        )
+
+    def set(self, notes: List[Note], events: List[NotationPitch]) -> None:
+        """Add events to the notations of notes."""
         for note in notes:
             infos = note.infos
-            channel = infos['channel']
-            ppq = infos['ppq_position']
             pitch = infos['pitch']
             note_events = deepcopy(events)
-            original_buf = None
             for note_event in note_events:
                 note_event.pitch = Pitch(pitch)
-            updated_events = []
-            for notation in notations:
-                if notation['ppq'] != ppq:
-                    continue
-                parced = NotationPitch.from_midibuf(notation['buf'])
-                if not parced:
-                    continue
-                if parced[0].pitch.midi_pitch != pitch:
-                    continue
-                original_buf = notation['buf']
-                for old in parced:
-                    for new in note_events:
-                        if old.update(new) is True:
-                            updated_events.append(new)
-                parced.extend(
-                    filter(lambda event: event not in updated_events,
-                           note_events))
-                note_events = parced
-            buf = NotationPitch.to_midi_buf(note_events, Pitch(pitch), channel,
-                                            original_buf)
-
-            event = rpr.MIDIEventDict(
-                ppq=ppq,
-                buf=buf,
-                cc_shape=CCShapeFlag.linear,
-                muted=False,
-                selected=False,
+            key = (infos['ppq_position'], pitch)
+            if key in self.edits and self.edits[key][1]:
+                channel, pending = self.edits[key]
+                note_events = NotationPitchInspector.merged(
+                    pending, note_events
+                )
+            else:
+                channel = infos['channel']
+            self.edits[key] = (channel, note_events)
+
+    def clear(self, notes: List[Note]) -> None:
+        """Remove all notations of notes, set later are kept."""
+        for note in notes:
+            infos = note.infos
+            key = (infos['ppq_position'], infos['pitch'])
+            self.edits[key] = (infos['channel'], [])
+
+    def commit(self) -> str:
+        """Write all edits to the take.
+
+        Returns
+        -------
+        str
+            summary of created, updated and deleted events
+        """
+        if not self.edits:
+            return self.summary
+        if self.undo_name is None:
+            self._write()
+        else:
+            with rpr.undo_block(self.undo_name):
+                self._write()
+        self.edits = {}
+        return self.summary
+
+    def _write(self) -> None:
+        delta = self.delta
+        if delta is None:
+            texts, total = self.text_events_type(self.take).counts()
+            delta = texts + len(self.edits) < total * DELTA_WRITE_SHARE
+        if delta:
+            self._write_delta()
+        else:
+            self._write_bulk()
+
+    def _buf(
+        self,
+        pitch: int,
+        channel: int,
+        note_events: List[NotationPitch],
+        original_buf: Optional[List[int]],
+        original: Optional[List[NotationPitch]] = None,
+    ) -> List[int]:
+        if original_buf is not None:
+            if original is None:
+                original = NotationPitch.from_midibuf(original_buf)
+            note_events = NotationPitchInspector.merged(
+                [copy(event) for event in original], note_events
+            )
+        return NotationPitch.to_midi_buf(
+            note_events, Pitch(pitch), channel, original_buf
+        )
+
+    def _write_delta(self) -> None:
+        events = self.text_events_type(self.take)
+        index: Dict[Tuple[float, int],
+                    Tuple[int, List[int], Optional[List[NotationPitch]]]] = {}
+        cached = cached_index(self.take)
+        if cached is not None:
+            for key, idx in cached.text_positions.items():
+                index[key] = (idx, *cached.original(key))
+        else:
+            for idx in range(events.counts()[0]):
+                ppq, buf = events.get(idx)
+                if (pitch := NotationPitch.buf_pitch(buf)) is not None:
+                    index[(ppq, pitch)] = (idx, buf, None)
+        deleted, inserted = [], []
+        for (ppq, pitch), (channel, note_events) in self.edits.items():
+            idx, original_buf, original = index.get((ppq, pitch),
+                                                    (-1, None, None))
+            if not note_events:
+                if idx >= 0:
+                    deleted.append(idx)
+            elif idx >= 0:
+                events.set(
+                    idx,
+                    self._buf(pitch, channel, note_events, original_buf,
+                              original)
+                )
+                self.updated += 1
+            else:
+                inserted.append(
+                    (ppq, self._buf(pitch, channel, note_events, None))
+                )
+        # indices are valid until the first deletion or insertion
+        for idx in sorted(deleted, reverse=True):
+            events.delete(idx)
+            self.deleted += 1
+        for ppq, buf in inserted:
+            events.insert(ppq, buf)
+            self.created += 1
+        events.sort()
+
+    def _write_bulk(self) -> None:
+        midi = self.take.get_midi()
+        index = take_index(self.take, midi)
+        appended, deleted = False, set()
+        for key, (channel, note_events) in self.edits.items():
+            ppq, pitch = key
+            idx = index.positions[key][-1] if key in index.positions else None
+            if not note_events:
+                if idx is not None:
+                    deleted.add(idx)
+            elif idx is not None:
+                midi[idx]['buf'] = self._buf(
+                    pitch, channel, note_events, *index.original(key)
+                )
+                self.updated += 1
+            else:
+                midi.append(
+                    rpr.MIDIEventDict(
+                        ppq=ppq,
+                        buf=self._buf(pitch, channel, note_events, None),
+                        cc_shape=CCShapeFlag.linear,
+                        muted=False,
+                        selected=False,
+                    )
+                )
+                self.created += 1
+                appended = True
+        if deleted:
+            midi = [
+                event for idx, event in enumerate(midi) if idx not in deleted
+            ]
+            self.deleted += len(deleted)
+        if appended:
+            midi.sort(key=lambda d: d['ppq'])
+        self.take.set_midi(midi, sort=appended)
+
+
+class CompactionReport(NamedTuple):
+    takes: int = 0
+    events: int = 0
+    bytes: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f'{self.events} notation events ({self.bytes} bytes) removed '
+            f'from {self.takes} takes'
+        )
+
+
+def _decoded_notations(buf: List[int]) -> Optional[List[NotationPitch]]:
+    """Notations of ReaScore event, or None if it has unknown tokens."""
+    string = bytes(buf[2:]).decode('latin-1')
+    tokens = NotationPitch.reascore_tokens(string)
+    notations = NotationPitch.from_midibuf(buf)
+    if len(notations) != len(tokens) - 1:
+        return None
+    return notations
+
+
+def compact_midi(
+    midi: List[rpr.MIDIEventDict]
+) -> Tuple[List[rpr.MIDIEventDict], CompactionReport]:
+    """Merge ReaScore notation events of every (ppq, channel, pitch).
+
+    The merged event takes the place of the first one, later events
+    override earlier notations of the same kind. Groups with unknown
+    tokens in any event are left untouched.
+
+    Returns
+    -------
+    Tuple[List[MIDIEventDict], CompactionReport]
+        compacted midi (the same list if nothing to compact), and report
+        with takes=1 if something was removed
+    """
+    groups: Dict[Tuple[float, int, int], List[int]] = {}
+    for idx, event in enumerate(midi):
+        buf = event['buf']
+        if NotationPitch.buf_pitch(buf) is None:
+            continue
+        m = re.match(rb'NOTE\s(\d+)\s(\d+)', bytes(buf[2:]))
+        if m:
+            key = (event['ppq'], int(m.group(1)), int(m.group(2)))
+            groups.setdefault(key, []).append(idx)
+    removed: Set[int] = set()
+    size = 0
+    for (_, channel, pitch), indices in groups.items():
+        if len(indices) < 2:
+            continue
+        decoded = [_decoded_notations(midi[idx]['buf']) for idx in indices]
+        if any(event is None for event in decoded):
+            continue
+        notations: List[NotationPitch] = []
+        for event in decoded:
+            notations = NotationPitchInspector.merged(
+                notations, cast(List[NotationPitch], event)
             )
-            midi.append(event)
-        midi = sorted(midi, key=lambda d: d['ppq'])
-        take.set_midi(midi, sort=True)
+        first, last = indices[0], indices[-1]
+        size += sum(len(midi[idx]['buf']) for idx in indices)
+        if notations:
+            midi[first]['buf'] = NotationPitch.to_midi_buf(
+                notations, Pitch(pitch), channel, midi[last]['buf']
+            )
+        else:
+            midi[first]['buf'] = midi[last]['buf']
+        size -= len(midi[first]['buf'])
+        removed.update(indices[1:])
+    if not removed:
+        return midi, CompactionReport()
+    midi = [event for idx, event in enumerate(midi) if idx not in removed]
+    return midi, CompactionReport(1, len(removed), size)
+
+
+def compact_take(take: rpr.Take) -> CompactionReport:
+    """Merge duplicated ReaScore notation events of the take."""
+    midi, report = compact_midi(take.get_midi())
+    if report.events:
+        take.set_midi(midi, sort=False)
+    return report
+
+
+def compact_track(track: rpr.Track) -> CompactionReport:
+    """Compact every take of every item of the track."""
+    reports = [
+        compact_take(take) for item in track.items for take in item.takes
+        if take.is_midi
+    ]
+    return CompactionReport(*(sum(column) for column in zip(*reports)))
+
+
+def compact_project(project: Optional[rpr.Project] = None) -> CompactionReport:
+    """Compact every MIDI take of the project."""
+    if project is None:
+        project = rpr.Project()
+    reports = [compact_track(track) for track in project.tracks]
+    return CompactionReport(*(sum(column) for column in zip(*reports)))
+
+
+
+class MigrationReport(NamedTuple):
+    takes: int = 0
+    events: int = 0
+    bytes: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f'{self.events} notation events converted in {self.takes} takes, '
+            f'{self.bytes} bytes saved'
+        )
+
+
+def migrate_midi(
+    midi: List[rpr.MIDIEventDict],
+    version: int = NOTATION_FORMAT,
+) -> Tuple[List[rpr.MIDIEventDict], MigrationReport]:
+    """Rewrite ReaScore notation events in the given notation format.
+
+    Events with unknown tokens are left untouched.
+
+    Returns
+    -------
+    Tuple[List[MIDIEventDict], MigrationReport]
+        the same midi list, and report with takes=1 if something converted
+    """
+    events = size = 0
+    for event in midi:
+        buf = event['buf']
+        pitch = NotationPitch.buf_pitch(buf)
+        if pitch is None or NotationPitch.buf_version(buf) == version:
+            continue
+        notations = _decoded_notations(buf)
+        if notations is None:
+            continue
+        new = NotationPitch.to_midi_buf(
+            notations, Pitch(pitch), original_buf=buf, version=version
+        )
+        events += 1
+        size += len(buf) - len(new)
+        event['buf'] = new
+    if not events:
+        return midi, MigrationReport()
+    return midi, MigrationReport(1, events, size)
+
+
+def migrate_take(
+    take: rpr.Take, version: int = NOTATION_FORMAT
+) -> MigrationReport:
+    """Rewrite notation events of the take in the given format."""
+    midi, report = migrate_midi(take.get_midi(), version)
+    if report.events:
+        take.set_midi(midi, sort=False)
+    return report
+
+
+def migrate_track(
+    track: rpr.Track, version: int = NOTATION_FORMAT
+) -> MigrationReport:
+    """Migrate every take of every item of the track."""
+    reports = [
+        migrate_take(take, version) for item in track.items
+        for take in item.takes if take.is_midi
+    ]
+    return MigrationReport(*(sum(column) for column in zip(*reports)))
+
+
+def migrate_project(
+    project: Optional[rpr.Project] = None,
+    version: int = NOTATION_FORMAT
+) -> MigrationReport:
+    """Migrate every MIDI take of the project."""
+    if project is None:
+        project = rpr.Project()
+    reports = [migrate_track(track, version) for track in project.tracks]
+    return MigrationReport(*(sum(column) for column in zip(*reports)))
+
 
 
 @rpr.inside_reaper()
@@ -397,9 +928,8 @@ def set_accidental_for_selected_notes(accidental: Accidental) -> None:
     if not rpr.is_valid_id(ptr):
         return
     editor = rpr.MIDIEditor(ptr)
-    notes = editor.take.notes
-    selected = filter(lambda note: note.selected, notes)
-    NotationPitchInspector().set(editor.take, list(selected),
+    selected = selected_notes(editor.take)
+    NotationPitchInspector().set(editor.take, selected,
                                  [NotationAccidental(Pitch(127), accidental)])
 
 
@@ -410,9 +940,8 @@ def set_voice_of_selected_notes(voice: int) -> None:
     if not rpr.is_valid_id(ptr):
         return
     editor = rpr.MIDIEditor(ptr)
-    notes = editor.take.notes
-    selected = filter(lambda note: note.selected, notes)
-    NotationPitchInspector().set(editor.take, list(selected),
+    selected = selected_notes(editor.take)
+    NotationPitchInspector().set(editor.take, selected,
                                  [NotationVoice(Pitch(127), voice)])
 
 
@@ -423,10 +952,9 @@ def set_channel_of_selected_notes(channel: int) -> None:
     if not rpr.is_valid_id(ptr):
         return
     editor = rpr.MIDIEditor(ptr)
-    notes = editor.take.notes
-    selected = filter(lambda note: note.selected, notes)
-    for note in selected:
-        note.channel = channel
+    take = editor.take
+    for note in selected_notes(take):
+        rpr.Note(take, note.index).channel = channel
 
 
 @rpr.inside_reaper()
@@ -436,9 +964,8 @@ def set_staff_of_selected_notes(staff: int) -> None:
     if not rpr.is_valid_id(ptr):
         return
     editor = rpr.MIDIEditor(ptr)
-    notes = editor.take.notes
-    selected = filter(lambda note: note.selected, notes)
-    NotationPitchInspector().set(editor.take, list(selected),
+    selected = selected_notes(editor.take)
+    NotationPitchInspector().set(editor.take, selected,
                                  [NotationStaff(Pitch(127), staff)])
 
 
@@ -449,9 +976,8 @@ def set_staff_change_of_selected_notes(staff: int) -> None:
     if not rpr.is_valid_id(ptr):
         return
     editor = rpr.MIDIEditor(ptr)
-    notes = editor.take.notes
-    selected = list(filter(lambda note: note.selected, notes))
-    NotationPitchInspector().set(editor.take, list(selected),
+    selected = selected_notes(editor.take)
+    NotationPitchInspector().set(editor.take, selected,
                                  [NotationStaffChange(Pitch(127), staff)])
 
 
@@ -462,8 +988,7 @@ def set_clef_of_selected_notes(clef: Clef) -> None:
     if not rpr.is_valid_id(ptr):
         return
     editor = rpr.MIDIEditor(ptr)
-    notes = editor.take.notes
-    selected = list(filter(lambda note: note.selected, notes))[0]
+    selected = selected_notes(editor.take, limit=1)[0]
     NotationPitchInspector().set(editor.take, [selected],
                                  [NotationClef(Pitch(127), clef)])
 
@@ -475,8 +1000,7 @@ def add_dynamics_at_selected_note(dyn: str = '') -> None:
     if not rpr.is_valid_id(ptr):
         return
     editor = rpr.MIDIEditor(ptr)
-    notes = editor.take.notes
-    selected = list(filter(lambda note: note.selected, notes))[0]
+    selected = selected_notes(editor.take, limit=1)[0]
     dynamics = dyn or rpr.get_user_inputs('type dynamics in lilypond format',
                                           ['dyn'])['dyn']
     NotationPitchInspector().set(editor.take, [selected],
@@ -490,9 +1014,8 @@ def set_selected_notes_as_ghost() -> None:
     if not rpr.is_valid_id(ptr):
         return
     editor = rpr.MIDIEditor(ptr)
-    notes = editor.take.notes
-    selected = filter(lambda note: note.selected, notes)
-    NotationPitchInspector().set(editor.take, list(selected),
+    selected = selected_notes(editor.take)
+    NotationPitchInspector().set(editor.take, selected,
                                  [NotationGhost(Pitch(127))])
 
 
@@ -503,9 +1026,8 @@ def add_trill_to_selected_notes() -> None:
     if not rpr.is_valid_id(ptr):
         return
     editor = rpr.MIDIEditor(ptr)
-    notes = editor.take.notes
-    selected = filter(lambda note: note.selected, notes)
-    NotationPitchInspector().set(editor.take, list(selected),
+    selected = selected_notes(editor.take)
+    NotationPitchInspector().set(editor.take, selected,
                                  [NotationTrill(Pitch(127))])
 
 
@@ -516,9 +1038,8 @@ def add_trem_to_selected_notes(trem_denom: int) -> None:
     if not rpr.is_valid_id(ptr):
         return
     editor = rpr.MIDIEditor(ptr)
-    notes = editor.take.notes
-    selected = filter(lambda note: note.selected, notes)
-    NotationPitchInspector().set(editor.take, list(selected),
+    selected = selected_notes(editor.take)
+    NotationPitchInspector().set(editor.take, selected,
                                  [NotationTrem(Pitch(127), trem_denom)])
 
 
@@ -529,9 +1050,8 @@ def ignore_selected_notes() -> None:
     if not rpr.is_valid_id(ptr):
         return
     editor = rpr.MIDIEditor(ptr)
-    notes = editor.take.notes
-    selected = filter(lambda note: note.selected, notes)
-    NotationPitchInspector().set(editor.take, list(selected),
+    selected = selected_notes(editor.take)
+    NotationPitchInspector().set(editor.take, selected,
                                  [NotationIgnore(Pitch(127))])
 
 
@@ -542,9 +1062,8 @@ def unnormalize_selected_notes() -> None:
     if not rpr.is_valid_id(ptr):
         return
     editor = rpr.MIDIEditor(ptr)
-    notes = editor.take.notes
-    selected = filter(lambda note: note.selected, notes)
-    NotationPitchInspector().set(editor.take, list(selected),
+    selected = selected_notes(editor.take)
+    NotationPitchInspector().set(editor.take, selected,
                                  [NotationUnnormalizedLength(Pitch(127))])
 
 
@@ -555,9 +1074,8 @@ def make_selected_notes_spacers() -> None:
     if not rpr.is_valid_id(ptr):
         return
     editor = rpr.MIDIEditor(ptr)
-    notes = editor.take.notes
-    selected = filter(lambda note: note.selected, notes)
-    NotationPitchInspector().set(editor.take, list(selected),
+    selected = selected_notes(editor.take)
+    NotationPitchInspector().set(editor.take, selected,
                                  [NotationSpacer(Pitch(127))])
 
 
@@ -568,12 +1086,16 @@ def break_before_selected_notes() -> None:
     if not rpr.is_valid_id(ptr):
         return
     editor = rpr.MIDIEditor(ptr)
-    notes = editor.take.notes
-    selected = filter(lambda note: note.selected, notes)
-    NotationPitchInspector().set(editor.take, list(selected),
+    selected = selected_notes(editor.take)
+    NotationPitchInspector().set(editor.take, selected,
                                  [NotationBreakBefore(Pitch(127))])
 
 
+@rpr.inside_reaper()
+def render_selected_track() -> None:
+    TrackInspector().render()
+
+
 @rpr.inside_reaper()
 @rpr.undo_block('spread_notes')
 def spread_notes() -> None:
@@ -605,8 +1127,7 @@ def grace_begin(grace_type: GraceType) -> None:
     if not rpr.is_valid_id(ptr):
         return
     editor = rpr.MIDIEditor(ptr)
-    notes = editor.take.notes
-    selected = list(filter(lambda note: note.selected, notes))[0]
+    selected = selected_notes(editor.take, limit=1)[0]
     NotationPitchInspector().set(
         editor.take, [selected],
         [NotationGraceBegin(Pitch(127), grace_type=grace_type)])
@@ -619,8 +1140,7 @@ def grace_end() -> None:
     if not rpr.is_valid_id(ptr):
         return
     editor = rpr.MIDIEditor(ptr)
-    notes = editor.take.notes
-    selected = list(filter(lambda note: note.selected, notes))[0]
+    selected = selected_notes(editor.take, limit=1)[0]
     NotationPitchInspector().set(editor.take, [selected],
                                  [NotationGraceEnd(Pitch(127))])
 
@@ -632,13 +1152,11 @@ def set_x_notes_to_selected(dyn: str = '') -> None:
     if not rpr.is_valid_id(ptr):
         return
     editor = rpr.MIDIEditor(ptr)
-    notes = editor.take.notes
-    selected = list(filter(lambda note: note.selected, notes))
+    selected = selected_notes(editor.take)
     first, last = selected[0], selected[-1]
-    NotationPitchInspector().set(editor.take, [first],
-                                 [NotationXNoteBegin(Pitch(127))])
-    NotationPitchInspector().set(editor.take, [last],
-                                 [NotationXNoteEnd(Pitch(127))])
+    with NotationTransaction(editor.take) as transaction:
+        transaction.set([first], [NotationXNoteBegin(Pitch(127))])
+        transaction.set([last], [NotationXNoteEnd(Pitch(127))])
 
 
 @rpr.inside_reaper()
@@ -648,13 +1166,11 @@ def make_beam_group_from_selected_notes(dyn: str = '') -> None:
     if not rpr.is_valid_id(ptr):
         return
     editor = rpr.MIDIEditor(ptr)
-    notes = editor.take.notes
-    selected = list(filter(lambda note: note.selected, notes))
+    selected = selected_notes(editor.take)
     first, last = selected[0], selected[-1]
-    NotationPitchInspector().set(editor.take, [first],
-                                 [NotationBeamGroupBegin(Pitch(127))])
-    NotationPitchInspector().set(editor.take, [last],
-                                 [NotationBeamGroupEnd(Pitch(127))])
+    with NotationTransaction(editor.take) as transaction:
+        transaction.set([first], [NotationBeamGroupBegin(Pitch(127))])
+        transaction.set([last], [NotationBeamGroupEnd(Pitch(127))])
 
 
 @rpr.inside_reaper()
@@ -665,8 +1181,7 @@ def add_articulation_to_selected_notes(art: str = '',
     if not rpr.is_valid_id(ptr):
         return
     editor = rpr.MIDIEditor(ptr)
-    notes = editor.take.notes
-    selected = list(filter(lambda note: note.selected, notes))
+    selected = selected_notes(editor.take)
     articulation = art or rpr.get_user_inputs(
         'type articulation in lilypond format', ['art'])['art']
     NotationPitchInspector().set(
@@ -681,8 +1196,7 @@ def custom_beaming_for_selected_notes() -> None:
     if not rpr.is_valid_id(ptr):
         return
     editor = rpr.MIDIEditor(ptr)
-    notes = editor.take.notes
-    selected = list(filter(lambda note: note.selected, notes))
+    selected = selected_notes(editor.take)
     inputs = rpr.get_user_inputs(
         ('type beaming lists in lilypond format, for example:\n'
          '0 1 | 0 1 2\n'
@@ -692,3 +1206,8 @@ def custom_beaming_for_selected_notes() -> None:
     NotationPitchInspector().set(
         editor.take, selected,
         [NotationBeaming(Pitch(127), inputs['left'], inputs['right'])])
+
+
+# bound once, shortcuts and commands are performed without parsing
+_actions = {action: action.bind(globals()) for action in ACTIONS}
+_shortcuts = {char: _actions[action] for char, action in keymap.items()}
@@ -1,56 +1,168 @@
-keymap = {
+"""Registry of ReaScore actions and their shortcuts.
+
+Action is a call of a function of `rea_score.inspector` with bound
+arguments. Actions are bound to the inspector functions once, at import
+of the inspector, so performing a shortcut or a command of
+`rea_score.service` is a dict lookup and a call.
+
+>>> keymap['1']
+Action(name='set_voice_of_selected_notes', args=(1,), kwargs=())
+>>> str(keymap['1'])
+'set_voice_of_selected_notes(1)'
+>>> funcmap[find_action('set_voice_of_selected_notes(1)')]
+'1'
+"""
+from enum import Enum
+import functools
+from typing import (
+    Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Tuple
+)
+
+from rea_score.primitives import Clef, GraceType
+from rea_score.scale import Accidental
+
+
+class Action(NamedTuple):
+    """Call of the inspector function `name` with bound arguments.
+
+    Attributes
+    ----------
+    name : str
+        name of function in `rea_score.inspector`
+    args : Tuple[Any, ...]
+    kwargs : Tuple[Tuple[str, Any], ...]
+        keyword arguments as pairs, so the action can be used as a key
+    """
+
+    name: str
+    args: Tuple[Any, ...] = ()
+    kwargs: Tuple[Tuple[str, Any], ...] = ()
+
+    def __str__(self) -> str:
+        """Python expression of the call, as sent by shortcut scripts."""
+
+        def arg(value: Any) -> str:
+            if isinstance(value, Enum):
+                return f'{type(value).__name__}.{value.name}'
+            return repr(value)
+
+        args = [arg(value) for value in self.args]
+        args.extend(f'{key}={arg(value)}' for key, value in self.kwargs)
+        return f'{self.name}({", ".join(args)})'
+
+    def bind(self,
+             namespace: Mapping[str, Callable[..., Any]]) -> Callable[[], Any]:
+        """Function of the namespace with arguments of the action."""
+        return functools.partial(
+            namespace[self.name], *self.args, **dict(self.kwargs)
+        )
+
+
+def action(name: str, *args: Any, **kwargs: Any) -> Action:
+    return Action(name, args, tuple(kwargs.items()))
+
+
+def build_keymap(bindings: Iterable[Tuple[str, Action]]) -> Dict[str, Action]:
+    """Map chars to actions.
+
+    Raises
+    ------
+    ValueError
+        if char is bound twice, or action has two shortcuts
+    """
+    keymap: Dict[str, Action] = {}
+    chars: Dict[Action, str] = {}
+    for char, act in bindings:
+        if char in keymap:
+            raise ValueError(
+                f'{char!r} is bound to {keymap[char]} and to {act}'
+            )
+        if act in chars:
+            raise ValueError(f'{act} is bound to {chars[act]!r} and {char!r}')
+        keymap[char] = act
+        chars[act] = char
+    return keymap
+
+
+BINDINGS: List[Tuple[str, Action]] = [
     # voices
-    "1": 'set_voice_of_selected_notes(1)',
-    "2": 'set_voice_of_selected_notes(2)',
-    "3": 'set_voice_of_selected_notes(3)',
-    "4": 'set_voice_of_selected_notes(4)',
-    "!": 'set_channel_of_selected_notes(0)',
-    "@": 'set_channel_of_selected_notes(1)',
-    "#": 'set_channel_of_selected_notes(2)',
-    "$": 'set_channel_of_selected_notes(3)',
+    ("1", action('set_voice_of_selected_notes', 1)),
+    ("2", action('set_voice_of_selected_notes', 2)),
+    ("3", action('set_voice_of_selected_notes', 3)),
+    ("4", action('set_voice_of_selected_notes', 4)),
+    ("!", action('set_channel_of_selected_notes', 0)),
+    ("@", action('set_channel_of_selected_notes', 1)),
+    ("#", action('set_channel_of_selected_notes', 2)),
+    ("$", action('set_channel_of_selected_notes', 3)),
     # staves
-    "[": 'set_staff_of_selected_notes(1)',
-    "]": 'set_staff_of_selected_notes(2)',
-    "{": 'set_staff_change_of_selected_notes(1)',
-    "}": 'set_staff_change_of_selected_notes(2)',
+    ("[", action('set_staff_of_selected_notes', 1)),
+    ("]", action('set_staff_of_selected_notes', 2)),
+    ("{", action('set_staff_change_of_selected_notes', 1)),
+    ("}", action('set_staff_change_of_selected_notes', 2)),
     # clefs
-    't': 'set_clef_of_selected_notes(Clef.treble)',
-    'T': 'set_clef_of_selected_notes(Clef.tenor)',
-    'a': 'set_clef_of_selected_notes(Clef.alto)',
-    'C': 'set_clef_of_selected_notes(Clef.bass)',
-    'p': 'set_clef_of_selected_notes(Clef.percussion)',
+    ('t', action('set_clef_of_selected_notes', Clef.treble)),
+    ('T', action('set_clef_of_selected_notes', Clef.tenor)),
+    ('l', action('set_clef_of_selected_notes', Clef.alto)),
+    ('C', action('set_clef_of_selected_notes', Clef.bass)),
+    ('p', action('set_clef_of_selected_notes', Clef.percussion)),
     # accidentals
-    '=': 'set_accidental_for_selected_notes(Accidental.is_)',
-    '-': 'set_accidental_for_selected_notes(Accidental.es)',
-    '+': 'set_accidental_for_selected_notes(Accidental.isis)',
-    '_': 'set_accidental_for_selected_notes(Accidental.es)',
-    '0': 'set_accidental_for_selected_notes(Accidental.white)',
+    ('=', action('set_accidental_for_selected_notes', Accidental.is_)),
+    ('+', action('set_accidental_for_selected_notes', Accidental.isis)),
+    ('_', action('set_accidental_for_selected_notes', Accidental.es)),
+    ('0', action('set_accidental_for_selected_notes', Accidental.white)),
     # misc
-    '`': 'add_trill_to_selected_notes()',
-    '~': 'ignore_selected_notes()',
-    '?': 'unnormalize_selected_notes()',
-    'g': 'set_selected_notes_as_ghost()',
-    'r': 'TrackInspector().render()',
-    'S': 'make_selected_notes_spacers()',
-    's': 'spread_notes()',
-    'v': 'view_score()',
-    'c': 'combine_items()',
-    'e': 'add_dynamics_at_selected_note()',
-    'E': 'add_dynamics_at_selected_note("!")',
-    'B': 'custom_beaming_for_selected_notes()',
-    'b': 'make_beam_group_from_selected_notes()',
-    '\\': 'break_before_selected_notes()',
+    ('`', action('add_trill_to_selected_notes')),
+    ('~', action('ignore_selected_notes')),
+    ('?', action('unnormalize_selected_notes')),
+    ('h', action('set_selected_notes_as_ghost')),
+    ('r', action('render_selected_track')),
+    ('S', action('make_selected_notes_spacers')),
+    ('s', action('spread_notes')),
+    ('v', action('view_score')),
+    ('c', action('combine_items')),
+    ('e', action('add_dynamics_at_selected_note')),
+    ('E', action('add_dynamics_at_selected_note', "!")),
+    ('B', action('custom_beaming_for_selected_notes')),
+    ('b', action('make_beam_group_from_selected_notes')),
+    ('\\', action('break_before_selected_notes')),
     # grace
     # TODO: make one-hotkey
-    'g': 'grace_begin(GraceType.grace)',
-    'a': 'grace_begin(GraceType.acciaccatura)',
-    'A': 'grace_begin(GraceType.appoggiatura)',
-    'G': 'grace_end()',
+    ('g', action('grace_begin', GraceType.grace)),
+    ('a', action('grace_begin', GraceType.acciaccatura)),
+    ('A', action('grace_begin', GraceType.appoggiatura)),
+    ('G', action('grace_end')),
     # articulations
-    '-': 'add_articulation_to_selected_notes()',
-    '*': 'add_articulation_to_selected_notes(position="^")',
-    '/': 'add_articulation_to_selected_notes(position="_")',
-    'x': 'set_x_notes_to_selected()'
-}
+    ('-', action('add_articulation_to_selected_notes')),
+    ('*', action('add_articulation_to_selected_notes', position="^")),
+    ('/', action('add_articulation_to_selected_notes', position="_")),
+    ('x', action('set_x_notes_to_selected')),
+]
+
+keymap = build_keymap(BINDINGS)
+funcmap = {act: char for char, act in keymap.items()}
+
+# all registered actions: with shortcut, and performed by scripts and GUI
+ACTIONS: List[Action] = [
+    *keymap.values(),
+    action('set_accidental_for_selected_notes', Accidental.eses),
+    *(
+        action('add_trem_to_selected_notes', denom)
+        for denom in (8, 16, 32, 64)
+    ),
+]
+
+_expressions = {str(act): act for act in ACTIONS}
+
+
+def find_action(expression: str) -> Action:
+    """Registered action by its expression.
 
-funcmap = {v: k for k, v in keymap.items()}
+    Raises
+    ------
+    KeyError
+        if action is not registered
+    """
+    try:
+        return _expressions[expression]
+    except KeyError:
+        raise KeyError(f'not registered action: {expression}') from None
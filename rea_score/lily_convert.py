@@ -1,15 +1,21 @@
 from fractions import Fraction
+from functools import lru_cache, singledispatch
+from io import StringIO
 from warnings import warn
-from typing import Dict, List, NewType, Optional, Tuple, TypedDict, Union
+from typing import (
+    Any, Callable, Dict, List, NewType, Optional, Tuple, TypedDict, TypeVar,
+    Union, cast
+)
 import re
 
 from rea_score.dom import EventT, TrackType
 from rea_score.notation_events import NotationKeySignature
 
 from .dom import Staff, StaffGroup, Voice, events_from_take, split_by_voice
+from .lily_export import LyWriter
 from .primitives import (
-    ALPHABET, PITCH_IS_SPACER, Chord, Event, GlobalNotationEvent, Grace, Key, Length, Pitch,
-    Position, Scale, Tuplet, Clef
+    ALPHABET, PITCH_IS_SPACER, Accidental, Chord, Event, GlobalNotationEvent,
+    Grace, Key, Length, Pitch, Position, Scale, Tuplet, Clef
 )
 
 # import reapy_boost as rpr
@@ -17,6 +23,8 @@ from .primitives import (
 
 KEY = Key('c', Scale.major)
 
+WrittenT = TypeVar('WrittenT', bound=Union[Event, GlobalNotationEvent])
+
 
 class LyDict(TypedDict):
     var: str
@@ -24,8 +32,53 @@ class LyDict(TypedDict):
     expression: str
 
 
+def score_part_var(idx: int) -> str:
+    """Variable name of the idx-th part in the score: ScorePartA, ...B."""
+    letters = ''
+    idx += 1
+    while idx:
+        idx, rest = divmod(idx - 1, 26)
+        letters = chr(ord('A') + rest) + letters
+    return f'ScorePart{letters}'
+
+
+def write_score_part(out: LyWriter, idx: int, expression: str) -> str:
+    """Keep expression of the part in the variable of the score.
+
+    Has to be written right after the definition of the part, because the
+    next part can redefine its staff and voice variables.
+    """
+    var = score_part_var(idx)
+    out.write(f'\n{var} = {expression}')
+    out.newline()
+    return var
+
+
+def write_score(out: LyWriter, part_vars: List[str]) -> None:
+    """Write score of parts, kept by write_score_part."""
+    out.write('\n\\score ')
+    out.open('{')
+    out.open('<<')
+    for var in part_vars:
+        out.write(f'\\{var}')
+        out.newline()
+    out.close('>>')
+    out.newline()
+    out.write('\\layout {}')
+    out.close('}')
+    out.newline()
+
+
 def render_score(parts: List[LyDict]) -> str:
-    ...
+    io = StringIO()
+    out = LyWriter(io)
+    part_vars = []
+    for idx, part in enumerate(parts):
+        out.write(part['definition'])
+        part_vars.append(write_score_part(out, idx, part['expression']))
+    write_score(out, part_vars)
+    out.flush()
+    return io.getvalue()
 
 
 def normalize_name(name: str) -> str:
@@ -35,54 +88,80 @@ def normalize_name(name: str) -> str:
     return name
 
 
-_part_definition = """{staff_defs}\n{var} = << {staff_expressions} >>"""
-_part_expression = """\\new {staffGroup} \\{var}"""
+def _render_to_string(
+    write: Callable[..., Tuple[str, str]], *args: Any, **kwargs: Any
+) -> LyDict:
+    io = StringIO()
+    out = LyWriter(io)
+    var, expression = write(out, *args, **kwargs)
+    out.flush()
+    return LyDict(var=var, definition=io.getvalue(), expression=expression)
 
 
-def render_part(
+def write_part(
+    out: LyWriter,
     name: str,
     staves: List[Staff],
     track_type: TrackType,
     octave_offset: int,
     staff_group: StaffGroup = StaffGroup.GrandStaff,
-) -> LyDict:
+) -> Tuple[str, str]:
+    """Write definition of the part to out.
+
+    Returns
+    -------
+    Tuple[str, str]
+        variable name and expression of the part
+    """
     name_var = normalize_name(name)
     if len(staves) > 0:
         name_var = ''
-    rendered = [
-        render_staff(staff, track_type, octave_offset, name=name_var)
-        for staff in staves
-    ]
-    if len(rendered) == 1:
-        return rendered[0]
-    return LyDict(
-        var=name,
-        definition=_part_definition.format(
-            staff_defs='\n'.join(
-                list([staff['definition'] for staff in rendered])
-            ),
-            var=name,
-            staff_expressions=' '.join(
-                list([staff['expression'] for staff in rendered])
-            )
-        ),
-        expression=_part_expression.format(
-            staffGroup=staff_group.value, var=name
+    expressions = []
+    for idx, staff in enumerate(staves):
+        if idx:
+            out.write('\n')
+        var, expression = write_staff(
+            out, staff, track_type, octave_offset, name=name_var
         )
-    )
+        expressions.append(expression)
+    if len(expressions) == 1:
+        return var, expressions[0]
+    out.write(f'\n{name} = ')
+    out.open('<<')
+    for expression in expressions:
+        out.write(expression)
+        out.newline()
+    out.close('>>')
+    out.newline()
+    return name, f'\\new {staff_group.value} \\{name}'
 
 
-_staff_definition = """{voice_defs}\n{var} = <<{clef} {voice_vars} >>"""
-_staff_expression = """\\new {staff_str} = "{staff_name}" {staff_params} {{\\{var}}}"""
-_staff_params = """\\with {{{staff_params}}}"""
+def render_part(
+    name: str,
+    staves: List[Staff],
+    track_type: TrackType,
+    octave_offset: int,
+    staff_group: StaffGroup = StaffGroup.GrandStaff,
+) -> LyDict:
+    return _render_to_string(
+        write_part, name, staves, track_type, octave_offset, staff_group
+    )
 
 
-def render_staff(
+def write_staff(
+    out: LyWriter,
     staff: Staff,
     track_type: TrackType,
     octave_offset: int,
     name: str = ''
-) -> LyDict:
+) -> Tuple[str, str]:
+    """Write voices and definition of the staff to out.
+
+    Returns
+    -------
+    Tuple[str, str]
+        variable name and expression of the staff
+    """
     staff_str = 'Staff'
     if track_type == TrackType.drums:
         staff_str = 'DrumStaff'
@@ -109,57 +188,63 @@ def render_staff(
         var = f'Staff{litera}'
 
     staff_params = []
-    voice_defs = []
     voice_expressions = []
     if len(staff) == 2:
         combine = '\\partCombine '
         staff_params.append('printPartCombineTexts = ##f')
     else:
         combine = ''
-    for voice in staff:
-        voice_dict = render_voice(
+    for idx, voice in enumerate(staff):
+        if idx:
+            out.write('\n')
+        _, expression = write_voice(
+            out,
             voice,
             voice.voice_nr,
             track_type=track_type,
             octave_offset=octave_offset,
             name=var + "Voice" + ALPHABET[voice.voice_nr]
         )
-        voice_defs.append(voice_dict['definition'])
-        voice_expressions.append(voice_dict['expression'])
-    return LyDict(
-        var=var,
-        definition=_staff_definition.format(
-            voice_defs='\n'.join(voice_defs),
-            var=var,
-            clef=staff.clef.ly_render(),
-            voice_vars=combine + " ".join(voice_expressions),
-        ),
-        expression=_staff_expression.format(
-            staff_str=staff_str,
-            staff_name=var,
-            var=var,
-            staff_params=_staff_params.format(
-                staff_params='\n'.join(staff_params)
-            )
-        )
+        voice_expressions.append(expression)
+    out.write(f'\n{var} = ')
+    out.open('<<')
+    out.write(staff.clef.ly_render())
+    out.newline()
+    out.write(combine + ' '.join(voice_expressions))
+    out.close('>>')
+    out.newline()
+    params = '\n'.join(staff_params)
+    return var, (
+        f'\\new {staff_str} = "{var}" \\with {{{params}}} {{\\{var}}}'
     )
 
 
-_voice_definition = """\
-{var} =  {mode} {{
-    {voice_str} {events}
-}}
-"""
-_voice_expression = """\\{var}"""
+def render_staff(
+    staff: Staff,
+    track_type: TrackType,
+    octave_offset: int,
+    name: str = ''
+) -> LyDict:
+    return _render_to_string(
+        write_staff, staff, track_type, octave_offset, name=name
+    )
 
 
-def render_voice(
+def write_voice(
+    out: LyWriter,
     voice: Voice,
     index: int = 1,
     track_type: TrackType = TrackType.default,
     octave_offset: int = 0,
-    name=''
-) -> LyDict:
+    name: str = ''
+) -> Tuple[str, str]:
+    """Finalize voice and write its definition to out event by event.
+
+    Returns
+    -------
+    Tuple[str, str]
+        variable name and expression of the voice
+    """
     # print(f"finalizing voice {voice}")
     key = KEY
     voice = voice.finalized()
@@ -167,7 +252,6 @@ def render_voice(
     voice_str = ''
     if index != 1:
         voice_str = voice.voice_str
-    voicedef = 'Voice'
 
     mode = ''
     if track_type in (
@@ -176,7 +260,6 @@ def render_voice(
         # voice_str = 'stemUp' if index == 1 else 'stemDown'
         if index != 1:
             voice_str = 'stemDown'
-        voicedef = 'DrumVoice'
         mode = '\\drummode'
 
     litera = ALPHABET[index]
@@ -184,159 +267,234 @@ def render_voice(
     if name:
         var = name
 
-    out = []
-    for event in voice.events.values():
-        event_str = ''
-        event_str, key = render_any_event(event, key, octave_offset)
-        out.append(event_str)
-    # key = KEY.ly_render()
+    out.write(f'{var} = {mode} ' if mode else f'{var} = ')
+    out.open('{')
     if voice_str:
-        voice_str = '\\' + voice_str
-    return LyDict(
-        definition=_voice_definition.format(
-            var=var,
-            mode=mode,
-            voice_str=voice_str,
-            # voice_str="",
-            events=' '.join(out),
-        ),
-        expression=_voice_expression.format(
-            voice_def=voicedef,
-            litera=litera,
-            var=var,
-        ),
-        var=var,
+        out.write(f'\\{voice_str} ')
+    first = True
+    for event in voice.events.values():
+        if not first:
+            out.write(' ')
+        first = False
+        key = write_any_event(event, out, key, octave_offset)
+    out.close('}')
+    out.newline()
+    return var, f'\\{var}'
+
+
+def render_voice(
+    voice: Voice,
+    index: int = 1,
+    track_type: TrackType = TrackType.default,
+    octave_offset: int = 0,
+    name: str = ''
+) -> LyDict:
+    return _render_to_string(
+        write_voice,
+        voice,
+        index,
+        track_type=track_type,
+        octave_offset=octave_offset,
+        name=name
     )
 
 
-def render_any_event(
-    event: Union[Event, GlobalNotationEvent], key: Key, octave_offset: int
-) -> Tuple[str, Key]:
+def write_any_event(
+    event: Union[Event, GlobalNotationEvent], out: LyWriter, key: Key,
+    octave_offset: int
+) -> Key:
+    """Write event to out, dispatching by its class.
+
+    Returns
+    -------
+    Key
+        key, in which next events are rendered
+    """
     if isinstance(event, Event):
         for attach in event.prefix:
             if isinstance(attach, NotationKeySignature):
                 key = attach.key
-    # print(event, key)
-    if isinstance(event, Chord):
-        event_str = render_chord(event, key, octave_offset)
-    elif isinstance(event, Tuplet):
-        event_str, key = render_tuplet(event, key, octave_offset)
-    elif isinstance(event, Event):
-        event_str = render_event(event, key, octave_offset)
-    elif isinstance(event, GlobalNotationEvent):
-        for ev in event.events:
-            if isinstance(ev, NotationKeySignature):
-                key = ev.key
-        event_str = event.ly_render()
-    else:
-        raise TypeError(event)
-    return event_str, key
+    return _write_event(event, out, key, octave_offset)
 
 
-def render_event(event: Event, key: Key, octave_offset: int) -> str:
-    string = "{prefix}{pitch}{length}{postfix}{tie}{tied}"
+@singledispatch
+def _write_event(
+    event: object, out: LyWriter, key: Key, octave_offset: int
+) -> Key:
+    raise TypeError(event)
+
+
+@_write_event.register
+def _(event: GlobalNotationEvent, out: LyWriter, key: Key,
+      octave_offset: int) -> Key:
+    for ev in event.events:
+        if isinstance(ev, NotationKeySignature):
+            key = ev.key
+    out.write(event.ly_render())
+    return key
+
+
+@_write_event.register
+def _write_plain_event(
+    event: Event, out: LyWriter, key: Key, octave_offset: int
+) -> Key:
     if event.length == 0:
         warn(f'Zero-kength event: {event}, returning null')
-        return ''
+        return key
     length, tied = render_length(
         event.length, rest=(event.pitch.midi_pitch is None)
     )
+    write_prefix(event, out, key, octave_offset)
     pitch, tie = render_pitch(event.pitch, key, octave_offset)
     if event.length.full_bar:
         pitch = re.sub('r', 'R', pitch)
-    # if tied and tie:
-    #     tie = ''
-    return string.format(
-        prefix=render_prefix(event, key, octave_offset),
-        pitch=pitch,
-        length=length,
-        postfix=render_postfix(event),
-        tie=tie,
-        tied=tied
+    out.write(pitch)
+    out.write(length)
+    write_postfix(event, out)
+    out.write(tie)
+    out.write(tied)
+    return key
+
+
+@_write_event.register
+def _write_chord(
+    chord: Chord, out: LyWriter, key: Key, octave_offset: int
+) -> Key:
+    pitches = ' '.join(
+        ''.join(render_pitch(pitch, key, octave_offset))
+        for pitch in chord.pitches
     )
-
-
-def render_chord(chord: Chord, key: Key, octave_offset: int) -> str:
-    string = "{prefix}<{pitches}>{length}{postfix}{tie}{tied}"
-    pitches = []
-    for pitch in chord.pitches:
-        pitches.append(''.join(render_pitch(pitch, key, octave_offset)))
     length, tied = render_length(chord.length)
+    write_prefix(chord, out, key, octave_offset)
+    out.write(f'<{pitches}>{length}')
+    write_postfix(chord, out)
     if tied:
-        tie = '~'
-    else:
-        tie = ''
-    return string.format(
-        prefix=render_prefix(chord, key, octave_offset),
-        pitches=' '.join(pitches),
-        length=length,
-        postfix=render_postfix(chord),
-        tie=tie,
-        tied=tied
-    )
+        out.write('~')
+    out.write(tied)
+    return key
+
+
+@_write_event.register
+def _write_tuplet(
+    tuplet: Tuplet, out: LyWriter, key: Key, octave_offset: int
+) -> Key:
+    write_prefix(tuplet, out, key, octave_offset)
+    out.write(f'\\tuplet {tuplet.rate.to_str()} {{')
+    for idx, event in enumerate(tuplet.events):
+        if idx:
+            out.write(' ')
+        key = write_any_event(event, out, key, octave_offset)
+    out.write('}')
+    return key
+
+
+def write_grace(
+    grace: Grace, out: LyWriter, key: Key, octave_offset: int
+) -> None:
+    write_prefix(grace, out, key, octave_offset)
+    out.write(' ')
+    for idx, event in enumerate(grace.events):
+        if idx:
+            out.write(' ')
+        key = write_any_event(event, out, key, octave_offset)
+    out.write(' ')
+    write_postfix(grace, out)
+
+
+def write_prefix(
+    event: Event, out: LyWriter, key: Key, octave_offset: int
+) -> None:
+    """Write space-separated prefix and trailing space, if not empty."""
+    written = False
+    for idx, elm in enumerate(event.prefix):
+        if idx:
+            out.write(' ')
+            written = True
+        if isinstance(elm, Grace):
+            # print(elm)
+            write_grace(elm, out, key, octave_offset)
+            written = True
+        elif string := elm.ly_render():
+            out.write(string)
+            written = True
+    if written:
+        out.write(' ')
+
+
+def write_postfix(event: Event, out: LyWriter) -> None:
+    """Write space-separated postfix and trailing space, if not empty."""
+    written = False
+    for idx, elm in enumerate(event.postfix):
+        if idx:
+            out.write(' ')
+            written = True
+        if string := elm.ly_render():
+            out.write(string)
+            written = True
+    if written:
+        out.write(' ')
+
+
+def _render_with(
+    write: Callable[[WrittenT, LyWriter, Key, int], Key], event: WrittenT,
+    key: Key, octave_offset: int
+) -> Tuple[str, Key]:
+    io = StringIO()
+    out = LyWriter(io)
+    key = write(event, out, key, octave_offset)
+    out.flush()
+    return io.getvalue().rstrip('\n'), key
 
 
-def render_tuplet(tuplet: Tuplet, key: Key,
-                  octave_offset: int) -> Tuple[str, Key]:
-    string = "{prefix}\\tuplet {rate} {{{events}}}"
-    events_str = []
-    for event in tuplet.events:
-        event_str, key = render_any_event(event, key, octave_offset)
-        events_str.append(event_str)
-    return string.format(
-        prefix=render_prefix(tuplet, key, octave_offset),
-        rate=tuplet.rate.to_str(),
-        events=' '.join(ev for ev in events_str)
-    ), key
+def render_any_event(
+    event: Union[Event, GlobalNotationEvent], key: Key, octave_offset: int
+) -> Tuple[str, Key]:
+    return _render_with(write_any_event, event, key, octave_offset)
 
 
-def render_grace(grace: Grace, key: Key, octave_offset: int) -> str:
-    string = "{prefix} {events} {postfix}"
-    events_str = []
-    for event in grace.events:
-        event_str, key = render_any_event(event, key, octave_offset)
-        events_str.append(event_str)
-    return string.format(
-        prefix=render_prefix(grace, key, octave_offset),
-        grace_type=grace.grace_type.value,
-        events=' '.join(ev for ev in events_str),
-        postfix=render_postfix(grace)
-    )
+def render_event(event: Event, key: Key, octave_offset: int) -> str:
+    return _render_with(_write_plain_event, event, key, octave_offset)[0]
 
 
-def render_prefix(event: Event, key: Key, octave_offset: int) -> str:
-    elms = []
-    for elm in event.prefix:
-        if isinstance(elm, Grace):
-            # print(elm)
-            elms.append(render_grace(elm, key, octave_offset))
-        else:
-            elms.append(elm.ly_render())
-    string = ' '.join(elm for elm in elms)
-    if string:
-        return string + ' '
-    else:
-        return ''
+def render_chord(chord: Chord, key: Key, octave_offset: int) -> str:
+    return _render_with(_write_chord, chord, key, octave_offset)[0]
 
 
-def render_postfix(event: Event) -> str:
-    string = ' '.join(elm.ly_render() for elm in event.postfix)
-    if string:
-        return string + ' '
-    else:
-        return ''
+def render_tuplet(tuplet: Tuplet, key: Key,
+                  octave_offset: int) -> Tuple[str, Key]:
+    return _render_with(_write_tuplet, tuplet, key, octave_offset)
 
 
-def render_length(length: Length, rest: bool = False) -> Tuple[str, str]:
+def render_grace(grace: Grace, key: Key, octave_offset: int) -> str:
+    io = StringIO()
+    out = LyWriter(io)
+    write_grace(grace, out, key, octave_offset)
+    out.flush()
+    return io.getvalue().rstrip('\n')
+
+
+@lru_cache(maxsize=1024)
+def duration_tokens(
+    fraction: Fraction,
+    trem_denom: int = 0,
+    bar_multiplier: int = 0,
+    rest: bool = False,
+    full_bar: bool = False,
+) -> Tuple[str, str]:
+    """LilyPond duration of the first note and tied (or rest) remainder.
+
+    Only a few dozen combinations occur in a score, so tokens are cached.
+    Hit rate can be inspected by `duration_tokens.cache_info()`.
+    """
     tied = ''
     tie = '~ '
-    trem = '' if not length.trem_denom else f':{length.trem_denom}'
-    bar = '' if not length.bar_multiplier else f'*{length.bar_multiplier}'
+    trem = '' if not trem_denom else f':{trem_denom}'
+    bar = '' if not bar_multiplier else f'*{bar_multiplier}'
     if rest:
         tie = ' r'
-        if length.full_bar:
+        if full_bar:
             tie = ' R'
-    for idx, lth in enumerate(reversed(length.normalized(length.fraction))):
+    for idx, lth in enumerate(reversed(Length.normalized(fraction))):
         if idx == 0:
             # COMMENTED BECAUSE BAR CAN BE LONGER THEN 1, WAIT FOR BUGS
             # if lth > 1:
@@ -351,6 +509,23 @@ def render_length(length: Length, rest: bool = False) -> Tuple[str, str]:
     return f_lth, tied
 
 
+def render_length(length: Length, rest: bool = False) -> Tuple[str, str]:
+    return duration_tokens(
+        length.fraction,
+        length.trem_denom,
+        length.bar_multiplier,
+        rest,
+        rest and length.full_bar,
+    )
+
+
+def duration_cache_hit_rate() -> float:
+    """Share of render_length calls answered from the cache."""
+    info = duration_tokens.cache_info()
+    calls = info.hits + info.misses
+    return info.hits / calls if calls else 0.
+
+
 class FracError(ValueError):
     ...
 
@@ -371,12 +546,28 @@ def fraction_to_length(frac: Fraction) -> str:
     return denom + num
 
 
-def render_pitch(pitch: Pitch, key: Key,
-                 octave_offset: int) -> Tuple[str, str]:
-    if pitch.midi_pitch not in (None, PITCH_IS_SPACER):
-        pitch.midi_pitch += octave_offset * 12
-    string = pitch.named_pitch(key)
-    string = re.sub('♯', 'is', string)
+@lru_cache(maxsize=4096)
+def pitch_token(
+    midi: Optional[int],
+    key: Key,
+    accidental: Optional[Accidental],
+    octave_offset: int,
+    note_name: str = '',
+) -> str:
+    """LilyPond token of pitch, e.g. "cis''", without tie.
+
+    Tokens are cached, so every pitch is resolved once per key and
+    octave offset for all voices and renders.
+    """
+    if midi not in (None, PITCH_IS_SPACER):
+        midi = cast(int, midi) + octave_offset * 12
+    if midi is None:
+        named = 'r'
+    elif midi == PITCH_IS_SPACER:
+        named = 's'
+    else:
+        named = Pitch(midi, accidental, note_name=note_name).named_pitch(key)
+    string = re.sub('♯', 'is', named)
     string = re.sub('♭', 'es', string)
     if m := re.match(r'(.+)(\d)', string):
         name, octave = m.groups()
@@ -388,10 +579,16 @@ def render_pitch(pitch: Pitch, key: Key,
         else:
             octave = ''
     else:
-        name = pitch.named_pitch(key)
+        name = named
         octave = ''
-    if pitch.tie:
-        tie = '~'
-    else:
-        tie = ''
-    return name.lower() + octave, tie
+    return name.lower() + octave
+
+
+def render_pitch(pitch: Pitch, key: Key,
+                 octave_offset: int) -> Tuple[str, str]:
+    """Token and tie of pitch. The pitch itself is not changed."""
+    token = pitch_token(
+        pitch.midi_pitch, key, pitch.accidental, octave_offset,
+        pitch.note_name
+    )
+    return token, '~' if pitch.tie else ''
@@ -1,16 +1,35 @@
+from functools import lru_cache
 from os import system
 import subprocess
 import re
 from pathlib import Path
 import textwrap
-from typing import List
+from typing import Callable, List, TextIO, Union
 
 # from .lily_convert import any_to_lily
 
 
-def lily_version() -> str:
+@lru_cache(maxsize=None)
+def _installed_version() -> str:
+    """Version of lilypond, asked once per process, or error message."""
+    try:
+        output = subprocess.check_output(['lilypond', '--version'])
+    except (OSError, subprocess.CalledProcessError) as exc:
+        return f'error: {exc}'
+    result = output.split(b'\n')
+    if m := re.search(r'(\d+\.\d+\.\d+)', str(result[0])):
+        return m.groups()[0]
+    return f'error: Lily version not found: {result}'
+
+
+def lily_version(required: bool = True) -> str:
     """Get version string of installed lilypond.
 
+    Parameters
+    ----------
+    required : bool, optional
+        if False, empty string is returned when lilypond is not found
+
     Returns
     -------
     str
@@ -21,19 +40,112 @@ def lily_version() -> str:
     RuntimeError
         if something went wrong
     """
-    result = subprocess.check_output(['lilypond', '--version']).split(b'\n')
-    if m := re.search(r'(\d+\.\d+\.\d+)', str(result[0])):
-        version = m.groups()[0]
-    else:
-        raise RuntimeError(f'Lily version not found: {result}')
+    version = _installed_version()
+    if version.startswith('error: '):
+        if not required:
+            return ''
+        raise RuntimeError(version[len('error: '):])
     return f'\\version "{version}"'
 
 
+class LyWriter:
+    """Text stream, that lays out LilyPond source while it is written.
+
+    Blocks are started by `open` and finished by `close`, lines inside
+    are indented by `indent` per level. Lines longer than `width` are
+    wrapped at spaces, continuation lines are indented one level deeper.
+    Leading and trailing spaces of lines are stripped.
+    """
+
+    def __init__(self, out: TextIO, width: int = 80, indent: str = '    '):
+        self.out = out
+        self.width = width
+        self.indent = indent
+        self.level = 0
+        self._line: List[str] = []
+        self._length = 0
+        self._continued = False
+
+    @property
+    def _prefix(self) -> str:
+        return self.indent * (self.level + self._continued)
+
+    def write(self, text: str) -> int:
+        if '\n' not in text:
+            self._add(text)
+            return len(text)
+        first, *rest = text.split('\n')
+        self._add(first)
+        for part in rest:
+            self._flush()
+            self._add(part)
+        return len(text)
+
+    def _add(self, text: str) -> None:
+        if not self._line:
+            text = text.lstrip()
+        if not text:
+            return
+        self._line.append(text)
+        self._length += len(text)
+        if self._length > self.width - len(self._prefix):
+            self._wrap()
+
+    def _wrap(self) -> None:
+        line = ''.join(self._line)
+        limit = self.width - len(self._prefix)
+        while len(line.rstrip()) > limit:
+            cut = line.rfind(' ', 0, limit + 1)
+            if cut <= 0:
+                cut = line.find(' ', limit)
+                if cut < 0:
+                    break
+            self.out.write(self._prefix + line[:cut].rstrip() + '\n')
+            self._continued = True
+            line = line[cut:].lstrip()
+            limit = self.width - len(self._prefix)
+        self._line = [line] if line else []
+        self._length = len(line)
+
+    def _flush(self) -> None:
+        line = ''.join(self._line).rstrip()
+        self.out.write(self._prefix + line + '\n' if line else '\n')
+        self._line = []
+        self._length = 0
+        self._continued = False
+
+    def newline(self) -> None:
+        """Finish current line, if it is not empty."""
+        if self._line:
+            self._flush()
+
+    def open(self, token: str = '{') -> None:
+        """Write opening token of block and indent following lines."""
+        self.write(token)
+        self.newline()
+        self.level += 1
+
+    def close(self, token: str = '}') -> None:
+        """Dedent and write closing token of block on its own line."""
+        self.newline()
+        self.level -= 1
+        self.write(token)
+
+    def flush(self) -> None:
+        self.newline()
+        self.out.flush()
+
+
 def line_strip(line: str) -> str:
     return re.sub(r'(\s\s)|\n', ' ', line)
 
 
 def format_lines(lilypond: str) -> List[str]:
+    """Former regex layout of a rendered document.
+
+    Not used by `render` any more, as LyWriter lays out the source while
+    it is emitted. Kept to compare with in benchmarks.
+    """
     patterns = {
         re.compile(r'<<(?!\n)'): '<<\n',
         re.compile(r'{(?!\n)'): '{\n',
@@ -68,13 +180,40 @@ def format_lines(lilypond: str) -> List[str]:
     return out
 
 
-def render(lilypond: str, file: Path, compile_ly: bool = True) -> Path:
-    ver = lily_version()
-    string = f'{ver}\n{lilypond}'
-    lines = format_lines(string)
+def render(
+    lilypond: Union[str, Callable[[LyWriter], object]],
+    file: Path,
+    compile_ly: bool = True
+) -> Path:
+    """Write .ly file with version header and compile it with lilypond.
+
+    Parameters
+    ----------
+    lilypond : Union[str, Callable[[LyWriter], object]]
+        ready source, or function writing it to LyWriter
+    file : Path
+        path of the score, suffixes are replaced by .ly and .pdf
+    compile_ly : bool, optional
+        if False, only .ly file is written, without version header if
+        lilypond is not installed
+
+    Returns
+    -------
+    Path
+        path of the pdf
+    """
+    ver = lily_version(required=compile_ly)
     ly = file.with_suffix('.ly')
     with open(ly, 'w') as io:
-        io.write('\n'.join(lines))
+        out = LyWriter(io)
+        if ver:
+            out.write(ver)
+            out.newline()
+        if isinstance(lilypond, str):
+            out.write(lilypond)
+        else:
+            lilypond(out)
+        out.flush()
     # print(subprocess.check_output(['lilypond', str(ly)]))
     pdf = file.with_suffix('.pdf')
     if compile_ly:
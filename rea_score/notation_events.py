@@ -1,10 +1,12 @@
-from typing import List
-from reapy_boost.core.item.midi_event import MIDIEventDict
+from typing import List, TYPE_CHECKING
 from rea_score.primitives import (
     Attachment, Event, NotationEvent, NotationMarker, TimeSignature
 )
 from rea_score.scale import Key, Scale
 
+if TYPE_CHECKING:
+    from reapy_boost.core.item.midi_event import MIDIEventDict
+
 
 class NotationKeySignature(NotationMarker, Attachment):
 
@@ -69,7 +71,7 @@ class NotationText(NotationEvent, Attachment):
         return True
 
     @classmethod
-    def is_text_event(cls, event: MIDIEventDict) -> bool:
+    def is_text_event(cls, event: 'MIDIEventDict') -> bool:
         if (event['buf'][0]) != 0xff:
             return False
         # print(event['buf'][0:2], 0 < event['buf'][1] < 15)
@@ -0,0 +1,169 @@
+"""Decoded ReaScore notation events of takes, cached by MIDI hash.
+
+`take_index` keeps the decoded notations of every take for the lifetime
+of the Python process and returns them again while the MIDI hash of the
+take (one API call) stays the same. If the take was changed, only events
+with new text are decoded. The index is shared by rendering
+(`NoteTable.from_take`), notation editing (`NotationTransaction`) and
+anything else, that needs notations of a take.
+"""
+from collections import OrderedDict
+import typing as ty
+
+from rea_score.primitives import NotationPitch
+from rea_score.reaper import inside_reaper
+
+if ty.TYPE_CHECKING:
+    import reapy_boost as rpr
+    from reapy_boost.core.item.midi_event import MIDIEventDict
+
+MAX_CACHED_TAKES = 64
+
+Key = ty.Tuple[float, int]
+
+
+class NotationIndex:
+    """ReaScore notation events of a take by (ppq, pitch).
+
+    Decoded notations are shared between all users of the index and
+    between events with the same text, copy them before modifying.
+
+    Attributes
+    ----------
+    midi_hash : str
+        hash of the take MIDI, the index was built from
+    notations : Dict[Key, List[NotationPitch]]
+        notations of all events at (ppq, pitch)
+    positions : Dict[Key, List[int]]
+        indices of the events in `Take.get_midi()`
+    text_positions : Dict[Key, int]
+        index of the last event at (ppq, pitch) among text and sysex
+        events of the take
+    payloads : Dict[Key, bytes]
+        text of the last event at (ppq, pitch)
+    decoded : Dict[bytes, Tuple[int, List[NotationPitch]]]
+        pitch and notations by event text
+    """
+
+    def __init__(self, midi_hash: str = '') -> None:
+        self.midi_hash = midi_hash
+        self.notations: ty.Dict[Key, ty.List[NotationPitch]] = {}
+        self.positions: ty.Dict[Key, ty.List[int]] = {}
+        self.text_positions: ty.Dict[Key, int] = {}
+        self.payloads: ty.Dict[Key, bytes] = {}
+        self.decoded: ty.Dict[bytes, ty.Tuple[int,
+                                              ty.List[NotationPitch]]] = {}
+
+    def __repr__(self) -> str:
+        return f'<NotationIndex {len(self.notations)} notes>'
+
+    def __len__(self) -> int:
+        return len(self.notations)
+
+    def original(self,
+                 key: Key) -> ty.Tuple[ty.List[int], ty.List[NotationPitch]]:
+        """Buffer and notations of the last event at (ppq, pitch)."""
+        payload = self.payloads[key]
+        return [0xff, 0x0f, *payload], self.decoded[payload][1]
+
+    def midi_positions(self) -> ty.Set[int]:
+        """Indices of all notation events in `Take.get_midi()`."""
+        return {idx for indices in self.positions.values() for idx in indices}
+
+    @classmethod
+    def from_midi(
+        cls,
+        midi: ty.Iterable['MIDIEventDict'],
+        midi_hash: str = '',
+        previous: ty.Optional['NotationIndex'] = None
+    ) -> 'NotationIndex':
+        """Decode notation events of raw take MIDI.
+
+        Parameters
+        ----------
+        midi : Iterable[MIDIEventDict]
+        midi_hash : str, optional
+        previous : Optional[NotationIndex]
+            index of the same take before change, its decoded events are
+            reused
+        """
+        index = cls(midi_hash)
+        decoded = index.decoded
+        old = previous.decoded if previous is not None else {}
+        texts = -1
+        for idx, event in enumerate(midi):
+            buf = event['buf']
+            if not buf or buf[0] not in (0xff, 0xf0):
+                continue
+            texts += 1
+            if buf[0] != 0xff or buf[1] != 0x0f:
+                continue
+            payload = bytes(buf[2:])
+            if payload not in decoded:
+                if payload in old:
+                    decoded[payload] = old[payload]
+                else:
+                    pitch = NotationPitch.buf_pitch(buf)
+                    if pitch is None:
+                        continue
+                    decoded[payload] = (pitch, NotationPitch.from_midibuf(buf))
+            pitch, notations = decoded[payload]
+            key = (event['ppq'], pitch)
+            if key in index.notations:
+                index.notations[key] = index.notations[key] + notations
+                index.positions[key].append(idx)
+            else:
+                index.notations[key] = notations
+                index.positions[key] = [idx]
+            index.text_positions[key] = texts
+            index.payloads[key] = payload
+        return index
+
+
+_cache: 'OrderedDict[str, NotationIndex]' = OrderedDict()
+
+
+@inside_reaper
+def midi_hash(take: 'rpr.Take') -> str:
+    """Hash of all MIDI events of the take."""
+    from reapy_boost import reascript_api as RPR
+    return RPR.MIDI_GetHash(take.id, False, '', 64)[3]  # type:ignore
+
+
+def cached_index(take: 'rpr.Take') -> ty.Optional[NotationIndex]:
+    """Index of the take, if its MIDI was not changed since cached."""
+    index = _cache.get(take.id)
+    if index is None or index.midi_hash != midi_hash(take):
+        return None
+    _cache.move_to_end(take.id)
+    return index
+
+
+def take_index(
+    take: 'rpr.Take',
+    midi: ty.Optional[ty.List['MIDIEventDict']] = None
+) -> NotationIndex:
+    """Notation index of the take, decoded only if its MIDI was changed.
+
+    Parameters
+    ----------
+    take : rpr.Take
+    midi : Optional[List[MIDIEventDict]]
+        result of `take.get_midi()`, if already read
+    """
+    current = midi_hash(take)
+    index = _cache.get(take.id)
+    if index is None or index.midi_hash != current:
+        if midi is None:
+            midi = take.get_midi()
+        index = NotationIndex.from_midi(midi, current, previous=index)
+        _cache[take.id] = index
+        while len(_cache) > MAX_CACHED_TAKES:
+            _cache.popitem(last=False)
+    _cache.move_to_end(take.id)
+    return index
+
+
+def clear() -> None:
+    """Forget indices of all takes."""
+    _cache.clear()
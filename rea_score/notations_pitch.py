@@ -4,10 +4,9 @@ from rea_score.primitives import (ALPHABET, PITCH_IS_SPACER, Attachment, Clef,
                                   Event, GraceType, NotationEvent,
                                   NotationPitch, Pitch, TupletRate)
 from rea_score.scale import Accidental
-import reapy_boost as rpr
 
 
-class NotationAccidental(NotationPitch, token='accidental'):
+class NotationAccidental(NotationPitch, token='accidental', short='a'):
 
     def __init__(self, pitch: Pitch, accidental: Accidental) -> None:
         super().__init__(pitch)
@@ -37,7 +36,7 @@ class NotationAccidental(NotationPitch, token='accidental'):
             self.pitch, self.accidental.to_str())
 
 
-class NotationVoice(NotationPitch, token='voice'):
+class NotationVoice(NotationPitch, token='voice', short='v'):
 
     def __init__(self, pitch: Pitch, voice: int) -> None:
         super().__init__(pitch)
@@ -65,7 +64,7 @@ class NotationVoice(NotationPitch, token='voice'):
         return f'<NotationVoice {self.pitch}, voice:{self.voice}>'
 
 
-class NotationStaff(NotationPitch, token='staff'):
+class NotationStaff(NotationPitch, token='staff', short='s'):
 
     def __init__(self, pitch: Pitch, staff: int) -> None:
         super().__init__(pitch)
@@ -93,7 +92,9 @@ class NotationStaff(NotationPitch, token='staff'):
         return f'<NotationStaff {self.pitch}, staff:{self.staff}>'
 
 
-class NotationStaffChange(NotationPitch, Attachment, token='staff_change'):
+class NotationStaffChange(
+    NotationPitch, Attachment, token='staff_change', short='S'
+):
 
     def __init__(self, pitch: Pitch, staff: int) -> None:
         super().__init__(pitch)
@@ -124,7 +125,7 @@ class NotationStaffChange(NotationPitch, Attachment, token='staff_change'):
         return f'<NotationStaffChange {self.pitch}, staff_change:{self.staff}>'
 
 
-class NotationClef(NotationPitch, token='clef'):
+class NotationClef(NotationPitch, token='clef', short='c'):
 
     def __init__(self, pitch: Pitch, clef: Clef) -> None:
         super().__init__(pitch)
@@ -152,7 +153,7 @@ class NotationClef(NotationPitch, token='clef'):
         return f'<NotationClef {self.pitch}, clef:{self.clef}>'
 
 
-class NotationGhost(NotationPitch, Attachment, token='ghost'):
+class NotationGhost(NotationPitch, Attachment, token='ghost', short='g'):
 
     def __init__(self, pitch: Pitch) -> None:
         super().__init__(pitch)
@@ -180,7 +181,7 @@ class NotationGhost(NotationPitch, Attachment, token='ghost'):
         return f'<NotationGhost {self.pitch}>'
 
 
-class NotationTrill(NotationPitch, Attachment, token='trill'):
+class NotationTrill(NotationPitch, Attachment, token='trill', short='t'):
 
     def __init__(self, pitch: Pitch) -> None:
         super().__init__(pitch)
@@ -208,7 +209,9 @@ class NotationTrill(NotationPitch, Attachment, token='trill'):
         return f'<NotationTrill {self.pitch}>'
 
 
-class NotationBreakBefore(NotationPitch, Attachment, token='break_before'):
+class NotationBreakBefore(
+    NotationPitch, Attachment, token='break_before', short='b'
+):
 
     def __init__(self, pitch: Pitch) -> None:
         super().__init__(pitch)
@@ -236,7 +239,7 @@ class NotationBreakBefore(NotationPitch, Attachment, token='break_before'):
         return f'<NotationBreakBefore {self.pitch}>'
 
 
-class NotationTrem(NotationPitch, token='trem'):
+class NotationTrem(NotationPitch, token='trem', short='T'):
 
     def __init__(self, pitch: Pitch, trem_denom: int) -> None:
         super().__init__(pitch)
@@ -267,7 +270,7 @@ class NotationTrem(NotationPitch, token='trem'):
         return f'<NotationTrem {self.pitch}, {self.trem_denom}>'
 
 
-class NotationIgnore(NotationPitch, token='ignore'):
+class NotationIgnore(NotationPitch, token='ignore', short='i'):
 
     def __init__(self, pitch: Pitch) -> None:
         super().__init__(pitch)
@@ -297,7 +300,9 @@ class NotationIgnore(NotationPitch, token='ignore'):
         return f'<NotationIgnore {self.pitch}>'
 
 
-class NotationUnnormalizedLength(NotationPitch, token='unnormalized'):
+class NotationUnnormalizedLength(
+    NotationPitch, token='unnormalized', short='u'
+):
 
     def __init__(self, pitch: Pitch) -> None:
         super().__init__(pitch)
@@ -328,7 +333,7 @@ class NotationUnnormalizedLength(NotationPitch, token='unnormalized'):
         return f'<NotationUnnormalizedLength {self.pitch}>'
 
 
-class NotationSpacer(NotationPitch, token='spacer'):
+class NotationSpacer(NotationPitch, token='spacer', short='p'):
 
     def __init__(self, pitch: Pitch) -> None:
         super().__init__(pitch)
@@ -358,7 +363,9 @@ class NotationSpacer(NotationPitch, token='spacer'):
         return f'<NotationSpacer {self.pitch}>'
 
 
-class NotationTupletBegin(NotationPitch, Attachment, token='tuplet_begin'):
+class NotationTupletBegin(
+    NotationPitch, Attachment, token='tuplet_begin', short='r'
+):
 
     def __init__(self, pitch: Pitch, rate: TupletRate) -> None:
         super().__init__(pitch)
@@ -390,7 +397,9 @@ class NotationTupletBegin(NotationPitch, Attachment, token='tuplet_begin'):
         return f'<NotationTupletBegin {self.pitch}, tuplet:{self.rate}>'
 
 
-class NotationTupletEnd(NotationPitch, Attachment, token='tuplet_end'):
+class NotationTupletEnd(
+    NotationPitch, Attachment, token='tuplet_end', short='R'
+):
 
     def __init__(self, pitch: Pitch) -> None:
         super().__init__(pitch)
@@ -418,7 +427,9 @@ class NotationTupletEnd(NotationPitch, Attachment, token='tuplet_end'):
         return f'<NotationTupletEnd {self.pitch}>'
 
 
-class NotationGraceBegin(NotationPitch, Attachment, token='grace_begin'):
+class NotationGraceBegin(
+    NotationPitch, Attachment, token='grace_begin', short='e'
+):
 
     def __init__(self,
                  pitch: Pitch,
@@ -451,7 +462,9 @@ class NotationGraceBegin(NotationPitch, Attachment, token='grace_begin'):
         return f'<NotationGraceBegin {self.pitch}, grace_type:{self.grace_type}>'
 
 
-class NotationGraceEnd(NotationPitch, Attachment, token='grace_end'):
+class NotationGraceEnd(
+    NotationPitch, Attachment, token='grace_end', short='E'
+):
 
     def __init__(self, pitch: Pitch) -> None:
         super().__init__(pitch)
@@ -479,7 +492,7 @@ class NotationGraceEnd(NotationPitch, Attachment, token='grace_end'):
         return f'<NotationGraceEnd {self.pitch}>'
 
 
-class NotationDynamics(NotationPitch, Attachment, token='dyn'):
+class NotationDynamics(NotationPitch, Attachment, token='dyn', short='d'):
 
     def __init__(self, pitch: Pitch, dynamics: str) -> None:
         super().__init__(pitch)
@@ -510,7 +523,9 @@ class NotationDynamics(NotationPitch, Attachment, token='dyn'):
         return f'<NotationDynamics {self.pitch}, dyn:{self.dynamics}>'
 
 
-class NotationXNoteBegin(NotationPitch, Attachment, token='x_begin'):
+class NotationXNoteBegin(
+    NotationPitch, Attachment, token='x_begin', short='x'
+):
 
     def __init__(self, pitch: Pitch) -> None:
         super().__init__(pitch)
@@ -539,7 +554,7 @@ class NotationXNoteBegin(NotationPitch, Attachment, token='x_begin'):
         return f'<NotationXNoteBegin {self.pitch}>'
 
 
-class NotationXNoteEnd(NotationPitch, Attachment, token='x_end'):
+class NotationXNoteEnd(NotationPitch, Attachment, token='x_end', short='X'):
 
     def __init__(self, pitch: Pitch) -> None:
         super().__init__(pitch)
@@ -567,7 +582,9 @@ class NotationXNoteEnd(NotationPitch, Attachment, token='x_end'):
         return f'<NotationXNoteEnd {self.pitch}>'
 
 
-class NotationBeamGroupBegin(NotationPitch, Attachment, token='beam_begin'):
+class NotationBeamGroupBegin(
+    NotationPitch, Attachment, token='beam_begin', short='m'
+):
 
     def __init__(self, pitch: Pitch) -> None:
         super().__init__(pitch)
@@ -596,7 +613,9 @@ class NotationBeamGroupBegin(NotationPitch, Attachment, token='beam_begin'):
         return f'<NotationBeamGroupBegin {self.pitch}>'
 
 
-class NotationBeamGroupEnd(NotationPitch, Attachment, token='beam_end'):
+class NotationBeamGroupEnd(
+    NotationPitch, Attachment, token='beam_end', short='M'
+):
 
     def __init__(self, pitch: Pitch) -> None:
         super().__init__(pitch)
@@ -624,7 +643,9 @@ class NotationBeamGroupEnd(NotationPitch, Attachment, token='beam_end'):
         return f'<NotationBeamGroupEnd {self.pitch}>'
 
 
-class NotationArticulation(NotationPitch, Attachment, token='artic'):
+class NotationArticulation(
+    NotationPitch, Attachment, token='artic', short='A'
+):
 
     def __init__(self,
                  pitch: Pitch,
@@ -661,7 +682,7 @@ class NotationArticulation(NotationPitch, Attachment, token='artic'):
                 f' articulation:{self.articulation}>')
 
 
-class NotationBeaming(NotationPitch, Attachment, token='beaming'):
+class NotationBeaming(NotationPitch, Attachment, token='beaming', short='B'):
 
     def __init__(self, pitch: Pitch, left: str = '', right: str = '') -> None:
         super().__init__(pitch)
@@ -672,7 +693,7 @@ class NotationBeaming(NotationPitch, Attachment, token='beaming'):
         event.prefix.append(self)
 
     def ly_render(self) -> str:
-        return (' \once \override Stem.beaming = #(cons '
+        return (' \\once \\override Stem.beaming = #(cons '
                 f'(list {self.left}) (list {self.right})) ')
 
     @property
@@ -0,0 +1,359 @@
+from array import array
+from enum import IntFlag
+import typing as ty
+
+from rea_score.notation_index import NotationIndex, take_index
+from rea_score.primitives import (
+    Event, Length, NotationEvent, NotationPitch, Pitch, Position
+)
+from rea_score.notations_pitch import (
+    NotationIgnore, NotationStaff, NotationVoice
+)
+from rea_score.notation_events import NotationText
+from rea_score.reaper import inside_reaper
+
+if ty.TYPE_CHECKING:
+    import reapy_boost as rpr
+    from reapy_boost.core.item.midi_event import MIDIEventDict
+
+PITCH_IS_REST = -1
+REST_LENGTH_QN = 0.25
+
+
+class NoteFlag(IntFlag):
+    muted = 1
+    selected = 2
+    ignored = 4
+
+
+class NoteTable:
+    """Notes of one or several takes, stored column-wise.
+
+    Every column is an `array.array` of the same length, row `i` is the
+    i-th note in take order. ReaScore notations are decoded once into
+    `notations`, and `notation[i]` is the index of the list belonging to
+    the row (-1 for none). Voice, staff and ignore state are resolved at
+    build time, so partitioning, sorting and chord grouping work on plain
+    numbers, and Event objects are made only by `materialize`.
+
+    Text events, which are not bound to a pitch, are kept in `texts` as
+    (onset, NotationText) pairs.
+    """
+
+    typecodes: ty.Dict[str, str] = {
+        'onset': 'd',
+        'duration': 'd',
+        'ppq': 'd',
+        'ppq_end': 'd',
+        'pitch': 'h',
+        'velocity': 'h',
+        'channel': 'b',
+        'voice': 'h',
+        'staff': 'h',
+        'flags': 'B',
+        'notation': 'l',
+    }
+
+    def __init__(self) -> None:
+        self.onset = array('d')
+        self.duration = array('d')
+        self.ppq = array('d')
+        self.ppq_end = array('d')
+        self.pitch = array('h')
+        self.velocity = array('h')
+        self.channel = array('b')
+        self.voice = array('h')
+        self.staff = array('h')
+        self.flags = array('B')
+        self.notation = array('l')
+        self.notations: ty.List[ty.List[NotationPitch]] = []
+        self.texts: ty.List[ty.Tuple[float, NotationText]] = []
+
+    def __len__(self) -> int:
+        return len(self.onset)
+
+    def __repr__(self) -> str:
+        return f'<NoteTable {len(self)} notes, {len(self.texts)} texts>'
+
+    def column(self, name: str) -> array:
+        if name not in self.typecodes:
+            raise KeyError(f'no such column: {name}')
+        return ty.cast(array, getattr(self, name))
+
+    def append(
+        self,
+        onset: float,
+        duration: float,
+        pitch: int,
+        channel: int = 0,
+        velocity: int = 0,
+        ppq: float = 0,
+        ppq_end: float = 0,
+        flags: int = 0,
+        notations: ty.Optional[ty.List[NotationPitch]] = None,
+    ) -> int:
+        """Add a row, resolving voice, staff and ignore from notations.
+
+        Returns
+        -------
+        int
+            index of the new row
+        """
+        voice, staff = channel + 1, 1
+        notation_id = -1
+        if notations:
+            for notation in notations:
+                if isinstance(notation, NotationVoice):
+                    voice = notation.voice
+                elif isinstance(notation, NotationStaff):
+                    staff = notation.staff
+                elif isinstance(notation, NotationIgnore):
+                    flags |= NoteFlag.ignored
+            notation_id = len(self.notations)
+            self.notations.append(notations)
+        self.onset.append(onset)
+        self.duration.append(duration)
+        self.ppq.append(ppq)
+        self.ppq_end.append(ppq_end)
+        self.pitch.append(pitch)
+        self.velocity.append(velocity)
+        self.channel.append(channel)
+        self.voice.append(voice)
+        self.staff.append(staff)
+        self.flags.append(flags)
+        self.notation.append(notation_id)
+        return len(self) - 1
+
+    def extend(self, other: 'NoteTable') -> 'NoteTable':
+        offset = len(self.notations)
+        for name in self.typecodes:
+            if name != 'notation':
+                self.column(name).extend(other.column(name))
+        self.notation.extend(
+            nid + offset if nid >= 0 else nid for nid in other.notation
+        )
+        self.notations.extend(other.notations)
+        self.texts.extend(other.texts)
+        return self
+
+    @classmethod
+    def from_midi(
+        cls,
+        midi: ty.Sequence['MIDIEventDict'],
+        ppq_to_beat: ty.Callable[[float], float],
+        index: ty.Optional[NotationIndex] = None,
+    ) -> 'NoteTable':
+        """Build table from raw take MIDI, as returned by `Take.get_midi`.
+
+        Note-ons are paired with note-offs per (channel, pitch) in FIFO
+        order. ReaScore notation events are matched to notes by
+        (ppq, pitch).
+
+        Parameters
+        ----------
+        midi : Sequence[MIDIEventDict]
+        ppq_to_beat : Callable[[float], float]
+            converts take ppq to project quarter notes. It is called once
+            per distinct ppq.
+        index : Optional[NotationIndex]
+            decoded notations of the same MIDI, if already known
+        """
+        beats: ty.Dict[float, float] = {}
+
+        def to_beat(ppq: float) -> float:
+            if ppq not in beats:
+                beats[ppq] = ppq_to_beat(ppq)
+            return beats[ppq]
+
+        if index is None:
+            index = NotationIndex.from_midi(midi)
+        notations = index.notations
+        skip = index.midi_positions()
+        opened: ty.Dict[ty.Tuple[int, int], ty.List[MIDIEventDict]] = {}
+        notes: ty.List[ty.Tuple[MIDIEventDict, float]] = []
+        texts: ty.List[ty.Tuple[float, NotationText]] = []
+        for idx, event in enumerate(midi):
+            buf = event['buf']
+            if not buf or idx in skip:
+                continue
+            status = buf[0] & 0xf0
+            if status in (0x80, 0x90) and len(buf) == 3:
+                key = (buf[0] & 0x0f, buf[1])
+                if status == 0x90 and buf[2] > 0:
+                    opened.setdefault(key, []).append(event)
+                elif opened.get(key):
+                    notes.append((opened[key].pop(0), event['ppq']))
+            elif NotationText.is_text_event(event):
+                texts.append(
+                    (to_beat(event['ppq']), NotationText.from_midibuf(buf))
+                )
+        notes.sort(key=lambda note: note[0]['ppq'])
+        table = cls()
+        for note_on, ppq_end in notes:
+            buf, ppq = note_on['buf'], note_on['ppq']
+            start = to_beat(ppq)
+            flags = 0
+            if note_on['muted']:
+                flags |= NoteFlag.muted
+            if note_on['selected']:
+                flags |= NoteFlag.selected
+            table.append(
+                start,
+                to_beat(ppq_end) - start,
+                buf[1],
+                channel=buf[0] & 0x0f,
+                velocity=buf[2],
+                ppq=ppq,
+                ppq_end=ppq_end,
+                flags=flags,
+                notations=notations.get((ppq, buf[1])),
+            )
+        table.texts = texts
+        return table
+
+    @classmethod
+    @inside_reaper
+    def from_take(cls, take: 'rpr.Take') -> 'NoteTable':
+        midi = take.get_midi()
+        return cls.from_midi(midi, take.ppq_to_beat, take_index(take, midi))
+
+    def indices(
+        self,
+        without: int = 0,
+        note_names: ty.Optional[ty.List[str]] = None
+    ) -> ty.List[int]:
+        """Row indices, skipping rows that have any of `without` flags.
+
+        If note_names is given, rows with unnamed pitches are skipped too.
+        """
+        flags, pitch = self.flags, self.pitch
+        return [
+            idx for idx in range(len(self)) if not flags[idx] & without and (
+                note_names is None or pitch[idx] == PITCH_IS_REST
+                or note_names[pitch[idx]]
+            )
+        ]
+
+    def argsort(
+        self,
+        *columns: str,
+        indices: ty.Optional[ty.Sequence[int]] = None
+    ) -> ty.List[int]:
+        """Stable sort of indices by the given columns."""
+        if indices is None:
+            indices = range(len(self))
+        arrays = [self.column(name) for name in columns]
+        if len(arrays) == 1:
+            col = arrays[0]
+            return sorted(indices, key=col.__getitem__)
+        return sorted(
+            indices, key=lambda idx: tuple(arr[idx] for arr in arrays)
+        )
+
+    def partition(
+        self,
+        column: str,
+        indices: ty.Optional[ty.Sequence[int]] = None
+    ) -> ty.Dict[int, ty.List[int]]:
+        """Group indices by unique values of column, sorted by value."""
+        if indices is None:
+            indices = range(len(self))
+        col = self.column(column)
+        groups: ty.Dict[int, ty.List[int]] = {}
+        for idx in indices:
+            value = col[idx]
+            if value not in groups:
+                groups[value] = []
+            groups[value].append(idx)
+        return {key: groups[key] for key in sorted(groups)}
+
+    def chords(self, indices: ty.Sequence[int]) -> ty.List[ty.List[int]]:
+        """Split onset-sorted indices into runs sharing the same onset."""
+        out: ty.List[ty.List[int]] = []
+        onset = self.onset
+        last: ty.Optional[float] = None
+        for idx in indices:
+            if out and onset[idx] == last:
+                out[-1].append(idx)
+            else:
+                out.append([idx])
+                last = onset[idx]
+        return out
+
+    def bind_texts(
+        self, indices: ty.Sequence[int]
+    ) -> ty.Tuple['NoteTable', ty.List[int], ty.Dict[int,
+                                                     ty.List[NotationEvent]]]:
+        """Bind every text event to the first of indices at its onset.
+
+        If there is no note at the onset, a 1/16 rest row is added for the
+        text, to a copy of the table, so the table itself is not changed.
+
+        Returns
+        -------
+        Tuple[NoteTable, List[int], Dict[int, List[NotationEvent]]]
+            the table or its copy with rest rows, indices with added rest
+            rows, texts by row index
+        """
+        table = self
+        indices = list(indices)
+        first: ty.Dict[float, int] = {}
+        for idx in indices:
+            first.setdefault(self.onset[idx], idx)
+        bound: ty.Dict[int, ty.List[NotationEvent]] = {}
+        for onset, text in self.texts:
+            if onset not in first:
+                if table is self:
+                    table = NoteTable().extend(self)
+                first[onset] = table.append(
+                    onset, REST_LENGTH_QN, PITCH_IS_REST
+                )
+                indices.append(first[onset])
+            bound.setdefault(first[onset], []).append(text)
+        return table, indices, bound
+
+    def materialize(
+        self,
+        indices: ty.Iterable[int],
+        note_names: ty.Optional[ty.List[str]] = None,
+        extra: ty.Optional[ty.Dict[int, ty.List[NotationEvent]]] = None,
+        positions: ty.Optional[ty.Dict[float, Position]] = None,
+    ) -> ty.Iterator[ty.Tuple[Position, Event]]:
+        """Make (Position, Event) pairs for rows, in the given order.
+
+        Parameters
+        ----------
+        indices : Iterable[int]
+        note_names : Optional[List[str]]
+            if given, pitches are named by it
+        extra : Optional[Dict[int, List[NotationEvent]]]
+            notations applied after the row's own, e.g. bound texts
+        positions : Optional[Dict[float, Position]]
+            cache of Position by onset, to share between calls
+        """
+        if positions is None:
+            positions = {}
+        extra = extra or {}
+        for idx in indices:
+            midi = self.pitch[idx]
+            if midi == PITCH_IS_REST:
+                pitch = Pitch()
+            elif note_names is not None:
+                pitch = Pitch(midi, note_name=note_names[midi])
+            else:
+                pitch = Pitch(midi)
+            onset = self.onset[idx]
+            if onset not in positions:
+                positions[onset] = Position(onset)
+            event = Event(
+                Length(self.duration[idx]),
+                pitch,
+                voice_nr=self.voice[idx],
+                staff_nr=self.staff[idx],
+            )
+            if (nid := self.notation[idx]) >= 0:
+                for notation in self.notations[nid]:
+                    notation.apply_to_event(event)
+            for notation in extra.get(idx, ()):
+                notation.apply_to_event(event)
+            yield positions[onset], event
@@ -1,17 +1,21 @@
+from array import array
+from bisect import bisect_right
+from contextlib import contextmanager
 from copy import deepcopy
 from enum import Enum, auto
 from fractions import Fraction
-from pprint import pformat
 import re
 import typing as ty
 import warnings
 # import librosa
-import reapy_boost as rpr
-from reapy_boost import reascript_api as RPR
-from reapy_boost.core.item.midi_event import MIDIEventDict
 
+from .reaper import inside_reaper
 from .scale import Accidental, ENHARM_ACC, Scale, midi_to_note, Key
 
+if ty.TYPE_CHECKING:
+    import reapy_boost as rpr
+    from reapy_boost.core.item.midi_event import MIDIEventDict
+
 LIMIT_DENOMINATOR = 128
 PITCH_IS_CHORD = 12800
 PITCH_IS_TUPLET = 12801
@@ -19,6 +23,13 @@ PITCH_IS_VOICESPLIT = 12802
 PITCH_IS_GRACE = 12803
 PITCH_IS_SPACER = 12804
 ROUND_QUARTERS = 4
+# format of written notation events: 1 — ``ReaScore|voice:2|...``,
+# 2 — ``RS2|v:2|...`` with short token ids (both are read)
+NOTATION_FORMAT = 2
+NOTATION_PREFIXES = {1: 'ReaScore', 2: 'RS2'}
+_NOTATION_RE = re.compile(
+    r'NOTE\s\d+\s(\d+).*?\stext\s((?:ReaScore|RS2)\|\S+)'
+)
 
 ALPHABET: ty.Dict[int, str] = {
     1: 'A',
@@ -33,6 +44,126 @@ ALPHABET: ty.Dict[int, str] = {
 }
 
 
+class MeasureMap:
+    """Bars of the project in quarter notes, numbered from 1.
+
+    Answers the same questions as `Project.beats_to_measures` and
+    `Project.measure_info` by bisecting bar starts, without calling
+    REAPER. Past the last known bar, its length is repeated.
+
+    While a map is activated, Position and the DOM use it instead of
+    querying the project.
+    """
+
+    active: ty.ClassVar[ty.Optional['MeasureMap']] = None
+
+    def __init__(
+        self, bars: ty.Iterable[ty.Tuple[float, float, int, int]]
+    ) -> None:
+        """
+        Parameters
+        ----------
+        bars : Iterable[Tuple[float, float, int, int]]
+            (start, end, numerator, denominator) of every bar, in order
+        """
+        self.starts = array('d')
+        self.ends = array('d')
+        self.signatures: ty.List[ty.Tuple[int, int]] = []
+        for start, end, num, denom in bars:
+            self.starts.append(start)
+            self.ends.append(end)
+            self.signatures.append((num, denom))
+        if not self.starts:
+            raise ValueError('at least one bar has to be specified')
+
+    def __repr__(self) -> str:
+        return f'<MeasureMap {len(self.starts)} bars>'
+
+    @property
+    def bars(self) -> ty.List[ty.Tuple[float, float, int, int]]:
+        """Bars in the form, accepted by the constructor."""
+        return [(start, end, num, denom) for start, end, (num, denom) in
+                zip(self.starts, self.ends, self.signatures)]
+
+    @classmethod
+    @inside_reaper
+    def from_project(
+        cls,
+        project: ty.Optional['rpr.Project'] = None,
+        end_beats: float = 0
+    ) -> 'MeasureMap':
+        """Read bars from the project, up to the bar after end_beats."""
+        if project is None:
+            import reapy_boost as rpr
+            project = rpr.Project()
+        bars = []
+        bar = 0
+        while True:
+            bar += 1
+            info = project.measure_info(bar)
+            bars.append(
+                (info['start'], info['end'], info['num'], info['denom'])
+            )
+            if info['start'] > end_beats:
+                break
+        return cls(bars)
+
+    @contextmanager
+    def activated(self) -> ty.Iterator['MeasureMap']:
+        previous = MeasureMap.active
+        MeasureMap.active = self
+        try:
+            yield self
+        finally:
+            MeasureMap.active = previous
+
+    def _extrapolated(self, bar: int) -> ty.Tuple[float, float]:
+        last_start, last_end = self.starts[-1], self.ends[-1]
+        length = last_end - last_start
+        start = last_start + (bar - len(self.starts)) * length
+        return start, start + length
+
+    def beats_to_measures(self, beats: float) -> ty.Tuple[int, float, float]:
+        idx = bisect_right(self.starts, beats) - 1
+        if idx < 0:
+            idx = 0
+        if idx == len(self.starts) - 1 and beats >= self.ends[-1]:
+            length = self.ends[-1] - self.starts[-1]
+            bar = len(self.starts) + int((beats - self.starts[-1]) // length)
+            start, end = self._extrapolated(bar)
+            return bar, start, end
+        return idx + 1, self.starts[idx], self.ends[idx]
+
+    def measure_info(self, bar: int) -> ty.Dict[str, ty.Any]:
+        if bar <= len(self.starts):
+            idx = max(bar, 1) - 1
+            start, end = self.starts[idx], self.ends[idx]
+            num, denom = self.signatures[idx]
+        else:
+            start, end = self._extrapolated(bar)
+            num, denom = self.signatures[-1]
+        return {'start': start, 'end': end, 'num': num, 'denom': denom}
+
+
+def beats_to_measures(position_beats: float) -> ty.Tuple[int, float, float]:
+    """(bar, bar start, bar end), from active MeasureMap or project."""
+    if MeasureMap.active is not None:
+        return MeasureMap.active.beats_to_measures(position_beats)
+    import reapy_boost as rpr
+    return ty.cast(
+        ty.Tuple[int, float, float],
+        rpr.Project().beats_to_measures(position_beats)
+    )
+
+
+def measure_info(bar: int) -> ty.Dict[str, ty.Any]:
+    """Bar info, from active MeasureMap or project."""
+    if MeasureMap.active is not None:
+        return MeasureMap.active.measure_info(bar)
+    import reapy_boost as rpr
+    return ty.cast(ty.Dict[str, ty.Any], rpr.Project().measure_info(bar))
+
+
 class Fractured:
 
     @property
@@ -143,7 +274,7 @@ class Position(Fractured):
     def __init__(
         self,
         position_beats: ty.Optional[float] = None,
-        take_ppq_position: ty.Optional[ty.Tuple[rpr.Take, float]] = None,
+        take_ppq_position: ty.Optional[ty.Tuple['rpr.Take', float]] = None,
         position_sec: ty.Optional[float] = None
     ) -> None:
         if position_beats is not None:
@@ -152,20 +283,41 @@ class Position(Fractured):
             take, ppq = take_ppq_position
             self.position = take.ppq_to_beat(ppq)
         elif position_sec is not None:
+            from reapy_boost import reascript_api as RPR
             self.position = RPR.TimeMap_timeToQN(position_sec)  #type:ignore
         else:
             raise TypeError('At least one argument has to be specified.')
+        self._fraction: ty.Optional[Fraction] = None
         (self.bar, self._bar_position,
          self._bar_end_distance) = self._get_bar_position(self.position)
 
     @property
     def fraction(self) -> Fraction:
-        return Fraction(self.position / 4).limit_denominator(LIMIT_DENOMINATOR)
+        # position is never changed after init, and fraction is hit on
+        # every dict lookup and comparison, so it is computed once.
+        if self._fraction is None:
+            self._fraction = Fraction(self.position / 4
+                                      ).limit_denominator(LIMIT_DENOMINATOR)
+        return self._fraction
 
     @staticmethod
     def from_fraction(frac: ty.Union[Fraction, float]) -> 'Position':
         return Position(float(frac) * 4)
 
+    @classmethod
+    def from_bar_data(
+        cls, position_beats: float, bar: int, bar_position_qn: float,
+        bar_end_distance_qn: float
+    ) -> 'Position':
+        """Make Position from known bar data, without querying bars."""
+        self = cls.__new__(cls)
+        self.position = position_beats
+        self._fraction = None
+        self.bar = bar
+        self._bar_position = bar_position_qn
+        self._bar_end_distance = bar_end_distance_qn
+        return self
+
     @property
     def bar_position(self) -> Fraction:
         return Fraction(self._bar_position / 4
@@ -192,10 +344,10 @@ class Position(Fractured):
             bar,
             m_start,
             m_end,
-        ) = rpr.Project().beats_to_measures(position_beats)
+        ) = beats_to_measures(position_beats)
         return bar, position_beats - m_start, m_end - position_beats
 
-    @rpr.inside_reaper()
+    @inside_reaper
     def percize_distance(
         self, other: 'Position'
     ) -> ty.Optional[ty.Tuple[ty.Optional['Length'], int,
@@ -226,15 +378,15 @@ class Position(Fractured):
             first = self
             last = other
         # print(self, other, ':', first, last)
-        f_bar, _, f_end = rpr.Project().beats_to_measures(first.position)
-        l_bar, l_start, _ = rpr.Project().beats_to_measures(last.position)
+        f_bar, _, f_end = beats_to_measures(first.position)
+        l_bar, l_start, _ = beats_to_measures(last.position)
         bar: int = l_bar - f_bar
         if bar == 0:
             return Length(last.position - first.position), 0, None
         # if first.bar_position != 0:
         #     bar -= 1
         before: ty.Optional['Length'] = Length(f_end - first.position)
-        f_bar_info = rpr.Project().measure_info(f_bar)
+        f_bar_info = measure_info(f_bar)
         if Length(f_bar_info['end'] - f_bar_info['start']) == before:
             before = None
         after_distance = last.position - l_start
@@ -255,9 +407,21 @@ class Length(Fractured):
         self.trem_denom = 0
         self.bar_multiplier = 0
 
+    @property
+    def length(self) -> float:
+        return self._length
+
+    @length.setter
+    def length(self, length_in_beats: float) -> None:
+        self._length = length_in_beats
+        self._fraction: ty.Optional[Fraction] = None
+
     @property
     def fraction(self) -> Fraction:
-        return Fraction(self.length / 4).limit_denominator(LIMIT_DENOMINATOR)
+        if self._fraction is None:
+            self._fraction = Fraction(self._length / 4
+                                      ).limit_denominator(LIMIT_DENOMINATOR)
+        return self._fraction
 
     @staticmethod
     def from_fraction(frac: ty.Union[Fraction, float]) -> 'Length':
@@ -408,10 +572,11 @@ class NotationMarker(NotationEvent):
 
     @classmethod
     def from_reaper_marker(cls, string: str) -> ty.List['NotationMarker']:
+        from rea_score.notation_events import NotationKeySignature
         tokens = cls.reascore_tokens(string)
         if not tokens:
             return []
-        notations = []
+        notations: ty.List['NotationMarker'] = []
         for token in tokens:
             if token.startswith('key'):
                 notations.append(NotationKeySignature.from_marker(token))
@@ -428,9 +593,16 @@ class NotationMarker(NotationEvent):
 class NotationPitch(NotationEvent):
 
     _tokens: ty.Dict[str, ty.Type['NotationPitch']] = {}
+    # short id -> token, and back; ids are stored in projects, never reuse
+    _short_tokens: ty.Dict[str, str] = {}
+    _short_ids: ty.Dict[str, str] = {}
 
-    def __init_subclass__(cls, token: str) -> None:
+    def __init_subclass__(cls, token: str, short: str) -> None:
+        if short in NotationPitch._short_tokens or len(short) != 1:
+            raise ValueError(f'bad short id "{short}" for token "{token}"')
         NotationPitch._tokens[token] = cls
+        NotationPitch._short_tokens[short] = token
+        NotationPitch._short_ids[token] = short
 
     def __init__(self, pitch: Pitch) -> None:
         super().__init__()
@@ -444,6 +616,18 @@ class NotationPitch(NotationEvent):
     def from_midi(cls, pitch: Pitch, string: str) -> 'NotationPitch':
         raise NotImplementedError()
 
+    def for_midi_version(self, version: int = NOTATION_FORMAT) -> str:
+        """Token in the given notation format.
+
+        In format 2 the token name is replaced by its short id:
+        ``voice:2`` -> ``v:2``.
+        """
+        token = self.for_midi
+        if version == 1:
+            return token
+        name, sep, args = token.partition(':')
+        return f'{self._short_ids[name]}{sep}{args}'
+
     def update(self, new: 'NotationEvent') -> bool:
         if not isinstance(new, NotationPitch):
             return False
@@ -456,7 +640,7 @@ class NotationPitch(NotationEvent):
         return True
 
     @classmethod
-    def is_reascore_event(cls, event: MIDIEventDict) -> bool:
+    def is_reascore_event(cls, event: 'MIDIEventDict') -> bool:
         if (event['buf'][0:2]) != [0xff, 0x0f]:
             return False
         return cls.is_reascore_event_buf(event['buf'])
@@ -486,9 +670,20 @@ class NotationPitch(NotationEvent):
         #     return NotationIgnore.from_midi(pitch, token)
         return None
 
+    @classmethod
+    def from_short_token(cls, token: str,
+                         pitch: Pitch) -> ty.Optional['NotationPitch']:
+        """Parse token of format 2: ``v:2`` is read as ``voice:2``."""
+        name = cls._short_tokens.get(token[:1])
+        if name is None:
+            return None
+        return cls._tokens[name].from_midi(pitch, name + token[1:])
+
     @classmethod
     def reascore_tokens(cls, string: str) -> ty.List[str]:
-        tokens = re.search(r'\stext\s(ReaScore\S+)', string)
+        """Tokens of notation event text, starting with the format prefix.
+        """
+        tokens = re.search(r'\stext\s((?:ReaScore|RS2)\|\S+)', string)
         if not tokens:
             return []
         return tokens.groups()[0].split('|')
@@ -506,23 +701,44 @@ class NotationPitch(NotationEvent):
     @classmethod
     def from_midibuf(cls, buf: ty.List[int]) -> ty.List['NotationPitch']:
         string = bytes(buf[2:]).decode('latin-1')
-        if not NotationPitch.is_reascore_event_buf(buf):
+        m = _NOTATION_RE.match(string)
+        if m is None:
             raise ValueError(f'Not a ReaScore notation event: {string}')
-        print(string)
-        tokens = cls.reascore_tokens(string)
-        if m := re.match(r'NOTE\s\d+\s(\d+)', string):
-            pitch = Pitch(int(m.groups()[0]))
+        pitch = Pitch(int(m.group(1)))
+        tokens = m.group(2).split('|')
+        if tokens[0] == NOTATION_PREFIXES[2]:
+            parse = NotationPitch.from_short_token
         else:
-            raise ValueError(f'Can not get pitch from string: {string}')
+            parse = NotationPitch.from_token
         events = []
-        print(tokens, pitch)
         for token in tokens[1:]:
-            event = NotationPitch.from_token(token, pitch)
+            event = parse(token, pitch)
             if event is not None:
                 events.append(event)
-            print(token, event)
         return events
 
+    @classmethod
+    def buf_pitch(cls, buf: ty.List[int]) -> ty.Optional[int]:
+        """MIDI pitch of ReaScore notation event, without parsing tokens.
+
+        Returns None for other events.
+        """
+        if buf[0:2] != [0xff, 0x0f]:
+            return None
+        m = _NOTATION_RE.match(bytes(buf[2:]).decode('latin-1'))
+        if m is None:
+            return None
+        return int(m.group(1))
+
+    @classmethod
+    def buf_version(cls, buf: ty.List[int]) -> ty.Optional[int]:
+        """Notation format of ReaScore notation event, None for others."""
+        tokens = cls.reascore_tokens(bytes(buf[2:]).decode('latin-1'))
+        for version, prefix in NOTATION_PREFIXES.items():
+            if tokens and tokens[0] == prefix:
+                return version
+        return None
+
     @classmethod
     def to_midi_buf(
         cls,
@@ -530,13 +746,14 @@ class NotationPitch(NotationEvent):
         check_pitch: ty.Optional[Pitch] = None,
         channel: int = 0,
         original_buf: ty.Optional[ty.List[int]] = None,
+        version: int = NOTATION_FORMAT,
     ) -> ty.List[int]:
         pitch = ty.cast(Pitch, check_pitch)
-        tokens = []
+        tokens = [NOTATION_PREFIXES[version]]
         if len(events) == 0:
             raise ValueError('can note pack empty list')
         for event in events:
-            tokens.append(event.for_midi)
+            tokens.append(event.for_midi_version(version))
             if event.pitch is None:
                 raise ValueError("only pitched notation supported")
             if pitch != event.pitch:
@@ -545,13 +762,13 @@ class NotationPitch(NotationEvent):
                     be packed separatelly."""
                 )
             pitch = event.pitch
-        tokens_str = f" text ReaScore|{'|'.join(tokens)}"
+        tokens_str = f" text {'|'.join(tokens)}"
         if original_buf:
             string = bytes(original_buf[2:]).decode('latin-1')
             original_tokens = '|'.join(cls.reascore_tokens(string))
             if original_tokens:
-                string = re.sub(
-                    f'text ReaScore|{original_tokens}', tokens_str, string
+                string = string.replace(
+                    f' text {original_tokens}', tokens_str, 1
                 )
             else:
                 string += tokens_str
@@ -675,6 +892,7 @@ class Chord(Event):
         return (*super()._params, self.pitches)
 
     def __repr__(self) -> str:
+        from pprint import pformat
         return f"<Chord {pformat(self._params, indent=4)}>"
 
     def split(self,
@@ -698,6 +916,17 @@ class Chord(Event):
         else:
             self.pitches.append(event.pitch)
 
+    def simplified(self) -> Event:
+        """Plain Event of the only pitch, or the chord itself."""
+        if len(self.pitches) != 1:
+            return self
+        event = Event(
+            self.length, self.pitches[0], self.voice_nr, self.staff_nr,
+            self.prefix, self.postfix
+        )
+        event.unnormalized = self.unnormalized
+        return event
+
 
 class TupletRate:
 
@@ -741,6 +970,8 @@ class Tuplet(Event):
         if events is None:
             events = []
         self._events = events
+        self._normalized: ty.Optional[ty.List[Event]] = None
+        self._rate_cached = False
 
     @property
     def _params(
@@ -750,10 +981,17 @@ class Tuplet(Event):
         return (*super()._params, self.rate, self.events)
 
     def __repr__(self) -> str:
+        from pprint import pformat
         return f"<Tuplet {self.rate.to_str()} {pformat(self._params, indent=4)}>"
 
     @property
     def rate(self) -> TupletRate:
+        """Ratio of real inner length to written one.
+
+        Computed on the first access after `append`.
+        """
+        if self._rate_cached or not self._events:
+            return self._rate
         real, truncated = Fraction(0), Fraction(0)
         for event in self._events:
             fraction = event.length.fraction
@@ -765,10 +1003,18 @@ class Tuplet(Event):
         # print(real, truncated)
         rate = Fraction(real / truncated).limit_denominator(LIMIT_DENOMINATOR)
         self._rate = TupletRate(rate.denominator, rate.numerator)
+        self._rate_cached = True
         return self._rate
 
     @property
     def events(self) -> ty.List[Event]:
+        """Inner events with written (not real) lengths.
+
+        Events are copied once, on the first access after `append`, and
+        the same list is returned until the next `append`.
+        """
+        if self._normalized is not None:
+            return self._normalized
         out = []
         for event in self._events:
             ev = deepcopy(event)
@@ -778,6 +1024,7 @@ class Tuplet(Event):
                 Fraction(fraction.numerator / denom)
             )
             out.append(ev)
+        self._normalized = out
         return out
 
     def append(self, event: Event) -> None:
@@ -786,6 +1033,8 @@ class Tuplet(Event):
         self.postfix = event.postfix  # should be used extend instead?
         self._events.append(event)
         self.length.length += event.length.length
+        self._normalized = None
+        self._rate_cached = False
 
 
 class GraceType(Enum):
@@ -827,6 +1076,7 @@ class Grace(Event, Attachment):
         return (*super()._params, self.grace_type, self.events)
 
     def __repr__(self) -> str:
+        from pprint import pformat
         return f"<Grace {self.grace_type} {pformat(self._params, indent=4)}>"
 
     def append(self, event: Event) -> None:
@@ -872,6 +1122,7 @@ class VoiceSplit(Event):
         return (*super()._params, self.events)
 
     def __repr__(self) -> str:
+        from pprint import pformat
         return f"<VoiceSplit {pformat(self._params, indent=4)}>"
 
     @property
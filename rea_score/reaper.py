@@ -0,0 +1,36 @@
+"""Lazy access to REAPER through reapy_boost.
+
+Importing reapy_boost initializes the REAPER bridge. Modules, that are
+used without REAPER as well (DOM, snapshots, .RPP reading, rendering),
+import it inside functions only, and use `inside_reaper` instead of
+``reapy_boost.inside_reaper()``.
+"""
+import functools
+import typing as ty
+
+F = ty.TypeVar('F', bound=ty.Callable[..., ty.Any])
+
+
+def inside_reaper(func: F) -> F:
+    """``reapy_boost.inside_reaper()``, applied at the first call.
+
+    While a `MeasureMap` is active, or if reapy_boost is not installed,
+    `func` is called as is.
+    """
+    decorated: ty.List[ty.Callable[..., ty.Any]] = []
+
+    @functools.wraps(func)
+    def wrapper(*args: ty.Any, **kwargs: ty.Any) -> ty.Any:
+        from rea_score.primitives import MeasureMap
+        if MeasureMap.active is not None:
+            return func(*args, **kwargs)
+        if not decorated:
+            try:
+                import reapy_boost as rpr
+            except ImportError:
+                decorated.append(func)
+            else:
+                decorated.append(rpr.inside_reaper()(func))
+        return decorated[0](*args, **kwargs)
+
+    return ty.cast(F, wrapper)
@@ -8,7 +8,7 @@ from rea_score.dom import TrackPitchType, TrackType
 
 from rea_score.scale import Key, Scale
 from rea_score.primitives import Clef, Pitch
-from rea_score.keymap import keymap, funcmap
+from rea_score.keymap import action, funcmap
 
 import cProfile
 
@@ -92,7 +92,7 @@ def track_inspector() -> None:
         part_name = 'not rendered'
     ImGui.TextColored(ctx, Color.value, track.name)
     ImGui.SameLine(ctx)
-    func = 'TrackInspector().render()'
+    func = action('render_selected_track')
     text = 'render'
     if func in funcmap:
         text += f' ( {funcmap[func]} )'
@@ -157,7 +157,7 @@ def actions() -> None:
     for i in range(1, 5):
         if i > 1:
             ImGui.SameLine(ctx)
-        func = f'set_voice_of_selected_notes({i})'
+        func = action('set_voice_of_selected_notes', i)
         text = str(i)
         if func in funcmap:
             text += f" ( {funcmap[func]} )"
@@ -169,7 +169,7 @@ def actions() -> None:
     for i in range(1, 3):
         if i > 1:
             ImGui.SameLine(ctx)
-        func = f'set_staff_of_selected_notes({i})'
+        func = action('set_staff_of_selected_notes', i)
         text = str(i)
         if func in funcmap:
             text += f" ( {funcmap[func]} )"
@@ -179,14 +179,14 @@ def actions() -> None:
 
     ImGui.TextColored(ctx, color, 'Set clef to:')
     for i, clef in enumerate(
-        ('treble', 'bass', 'alto', 'tenor', 'percussion')):
+        (Clef.treble, Clef.bass, Clef.alto, Clef.tenor, Clef.percussion)):
         if i not in (0, 3):
             ImGui.SameLine(ctx)
-        func = f'set_clef_of_selected_notes(Clef.{clef})'
-        text = str(clef)
+        func = action('set_clef_of_selected_notes', clef)
+        text = clef.name
         if func in funcmap:
             text += f" ( {funcmap[func]} )"
-        width = 70 if clef != 'percussion' else 100
+        width = 70 if clef is not Clef.percussion else 100
         rt = ImGui.Button(ctx, text, width)
         if rt:
             proj_insp.perform_func(func)
@@ -203,7 +203,7 @@ def actions() -> None:
         ImGui.EndCombo(ctx)
     ImGui.SameLine(ctx)
 
-    func = f'add_trem_to_selected_notes({actions_values["trem_denom"]})'
+    func = action('add_trem_to_selected_notes', actions_values['trem_denom'])
     text = 'add trem'
     if func in funcmap:
         text += f" ( {funcmap[func]} )"
@@ -213,7 +213,7 @@ def actions() -> None:
 
     ImGui.Dummy(ctx, 100, 20)
 
-    func = 'add_trill_to_selected_notes()'
+    func = action('add_trill_to_selected_notes')
     text = 'trill'
     if func in funcmap:
         text += f" ( {funcmap[func]} )"
@@ -223,7 +223,7 @@ def actions() -> None:
 
     ImGui.SameLine(ctx)
 
-    func = 'ignore_selected_notes()'
+    func = action('ignore_selected_notes')
     text = 'ignore'
     if func in funcmap:
         text += f" ( {funcmap[func]} )"
@@ -233,7 +233,7 @@ def actions() -> None:
 
     ImGui.Dummy(ctx, 100, 20)
 
-    func = 'spread_notes()'
+    func = action('spread_notes')
     text = 'spread notes across bounds'
     if func in funcmap:
         text += f" ( {funcmap[func]} )"
@@ -241,7 +241,7 @@ def actions() -> None:
     if rt:
         proj_insp.perform_func(func)
 
-    func = 'combine_items()'
+    func = action('combine_items')
     text = 'selected items to selected track'
     if func in funcmap:
         text += f" ( {funcmap[func]} )"
@@ -361,7 +361,7 @@ class DockWidget:
 
 
 def view_score() -> None:
-    func = 'view_score()'
+    func = action('view_score')
     text = 'view score'
     if func in funcmap:
         text += f' ( {funcmap[func]} )'
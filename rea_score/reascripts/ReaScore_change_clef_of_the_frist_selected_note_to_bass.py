@@ -1,4 +1,3 @@
-from rea_score import inspector as it
-from rea_score.primitives import Clef
+from rea_score.service import send
 
-it.set_clef_of_selected_notes(Clef.bass)
+send('set_clef_of_selected_notes(Clef.bass)')
@@ -0,0 +1,22 @@
+import reapy_boost as rpr
+
+import rea_score.inspector as it
+
+
+@rpr.inside_reaper()
+@rpr.undo_block('compact ReaScore notations')
+def compact_notations() -> None:
+    """Compact selected tracks, or the whole project if none selected."""
+    project = rpr.Project()
+    tracks = list(project.selected_tracks)
+    if tracks:
+        reports = [it.compact_track(track) for track in tracks]
+        report = it.CompactionReport(
+            *(sum(column) for column in zip(*reports))
+        )
+    else:
+        report = it.compact_project(project)
+    print(report)
+
+
+compact_notations()
@@ -0,0 +1,11 @@
+import reapy_boost as rpr
+
+import rea_score.inspector as it
+
+
+@rpr.inside_reaper()
+def export_selected_track() -> None:
+    print(it.TrackInspector().export_musicxml())
+
+
+export_selected_track()
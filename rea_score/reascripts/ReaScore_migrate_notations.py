@@ -0,0 +1,23 @@
+import reapy_boost as rpr
+
+import rea_score.inspector as it
+
+
+@rpr.inside_reaper()
+@rpr.undo_block('migrate ReaScore notations')
+def migrate_notations() -> None:
+    """Rewrite notations of selected tracks, or the whole project if none
+    selected, in the current compact format."""
+    project = rpr.Project()
+    tracks = list(project.selected_tracks)
+    if tracks:
+        reports = [it.migrate_track(track) for track in tracks]
+        report = it.MigrationReport(
+            *(sum(column) for column in zip(*reports))
+        )
+    else:
+        report = it.migrate_project(project)
+    print(report)
+
+
+migrate_notations()
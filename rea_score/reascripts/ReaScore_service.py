@@ -0,0 +1,7 @@
+"""Start the resident ReaScore service, or stop it if running.
+
+Put it to the startup actions to make shortcut scripts instant.
+"""
+from rea_score.service import run
+
+run()
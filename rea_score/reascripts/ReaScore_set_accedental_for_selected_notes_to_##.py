@@ -1,4 +1,3 @@
-from rea_score.inspector import set_accidental_for_selected_notes
-from rea_score.scale import Accidental
+from rea_score.service import send
 
-set_accidental_for_selected_notes(Accidental.isis)
+send('set_accidental_for_selected_notes(Accidental.isis)')
@@ -1,3 +1,3 @@
-from rea_score.inspector import set_selected_notes_as_ghost
+from rea_score.service import send
 
-set_selected_notes_as_ghost()
+send('set_selected_notes_as_ghost()')
@@ -1,3 +1,3 @@
-from rea_score import inspector as it
+from rea_score.service import send
 
-it.set_staff_of_selected_notes(1)
+send('set_staff_of_selected_notes(1)')
@@ -1,3 +1,3 @@
-from rea_score import inspector
+from rea_score.service import send
 
-inspector.set_voice_of_selected_notes(1)
+send('set_voice_of_selected_notes(1)')
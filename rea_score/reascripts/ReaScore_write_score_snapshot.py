@@ -0,0 +1,13 @@
+import reapy_boost as rpr
+
+import rea_score.inspector as it
+
+
+@rpr.inside_reaper()
+def write_score_snapshot() -> None:
+    project = it.ProjectInspector()
+    tracks = project.score_tracks or list(project.project.selected_tracks)
+    print(project.write_snapshot(tracks))
+
+
+write_score_snapshot()
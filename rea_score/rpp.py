@@ -0,0 +1,503 @@
+"""Reader of REAPER .RPP files, to build snapshots without REAPER.
+
+The file is parsed line by line, only blocks ReaScore needs are looked at:
+tempo and time signature envelope, markers, ReaScore ext-state, tracks
+and MIDI of their items. MIDI of every item is kept only until it is put
+into the NoteTable of the track, so memory does not depend on the size of
+the project file.
+
+Limitations: item start offsets and play rates are not applied to MIDI,
+and only MIDI of the active take is read.
+
+>>> snapshot = read_project('film.RPP')
+>>> rea_score.snapshot.render_snapshot(snapshot, Path('score'))
+"""
+import base64
+from bisect import bisect_right
+import io
+from pathlib import Path, PurePosixPath, PureWindowsPath
+import pickle
+import re
+from typing import (
+    TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, TextIO,
+    Tuple, Union, cast
+)
+
+from rea_score.dom import TrackPitchType, TrackType, update_events
+from rea_score.note_table import NoteTable
+from rea_score.notation_events import (
+    NotationKeySignature, NotationPlainText, NotationTimeSignature
+)
+from rea_score.primitives import (
+    Clef, MeasureMap, NotationEvent, NotationMarker, Position, TimeSignature
+)
+from rea_score.snapshot import Bar, Snapshot, TrackSnapshot
+
+if TYPE_CHECKING:
+    from reapy_boost.core.item.midi_event import MIDIEventDict
+
+# same as inspector.EXT_SECTION, which can not be imported without REAPER
+EXT_SECTION = 'Levitanus_ReaScore'
+
+_TOKEN = re.compile(r'"([^"]*)"|\'([^\']*)\'|`([^`]*)`|(\S+)')
+_MARKER_IS_REGION = 1
+_DIGITS = 9
+
+
+def tokens(line: str) -> List[str]:
+    """Split line of .RPP file, respecting its quoting."""
+    return [next(g for g in m.groups() if g is not None)
+            for m in _TOKEN.finditer(line)]
+
+
+class TempoMap:
+    """Converts project seconds to quarter notes.
+
+    Parameters
+    ----------
+    points : Sequence[Tuple[float, float, bool]]
+        (time, bpm, linear) of every tempo change. If linear, tempo is
+        ramped to the next point.
+    """
+
+    def __init__(self, points: Sequence[Tuple[float, float, bool]]) -> None:
+        # the last of points at the same time wins
+        points = sorted(points, key=lambda point: point[0])
+        if not points or points[0][0] > 0:
+            points.insert(0, (0., points[0][1] if points else 120., False))
+        self.times = [time for time, _, _ in points]
+        self.points = points
+        self.beats = [0.]
+        for (time, bpm, linear), (next_time, next_bpm, _) in zip(
+            points, points[1:]
+        ):
+            self.beats.append(
+                self.beats[-1] +
+                self._beats(next_time - time, bpm, next_bpm, linear)
+            )
+
+    @staticmethod
+    def _beats(
+        duration: float, bpm: float, next_bpm: float, linear: bool
+    ) -> float:
+        if linear:
+            return duration * (bpm + next_bpm) / 120
+        return duration * bpm / 60
+
+    def time_to_beats(self, time: float) -> float:
+        idx = max(bisect_right(self.times, time) - 1, 0)
+        start, bpm, linear = self.points[idx]
+        if linear and idx + 1 < len(self.points):
+            next_time, next_bpm, _ = self.points[idx + 1]
+            bpm_at = bpm + (next_bpm - bpm) * (time - start) / (
+                next_time - start
+            )
+            beats = self._beats(time - start, bpm, bpm_at, True)
+        else:
+            beats = self._beats(time - start, bpm, bpm, False)
+        return round(self.beats[idx] + beats, _DIGITS)
+
+
+def bars_from_signatures(
+    signatures: Sequence[Tuple[float, int, int]], end_beats: float
+) -> List[Bar]:
+    """Lay out bars up to the bar after end_beats, like `MeasureMap`.
+
+    Parameters
+    ----------
+    signatures : Sequence[Tuple[float, int, int]]
+        (beats, numerator, denominator) of every time signature change.
+        Change inside a bar cuts the bar.
+    """
+    changes = sorted(signatures, key=lambda change: change[0]) or [
+        (0., 4, 4)
+    ]
+    bars: List[Bar] = []
+    num, denom = changes[0][1:]
+    start, idx = 0., 1
+    while True:
+        while idx < len(changes) and changes[idx][0] <= start:
+            num, denom = changes[idx][1:]
+            idx += 1
+        end = start + num * 4 / denom
+        if idx < len(changes):
+            end = min(end, changes[idx][0])
+        bars.append((start, end, num, denom))
+        if start > end_beats:
+            return bars
+        start = end
+
+
+class _StateUnpickler(pickle.Unpickler):
+    """Unpickles ext-state values, allowing only types stored in them.
+
+    Globals are looked up in `TYPES` only, nothing is imported. Paths are
+    loaded as pure paths, to read Windows paths on any system.
+    """
+
+    TYPES: Dict[Tuple[str, str], type] = {
+        ('rea_score.primitives', 'Clef'): Clef,
+        ('rea_score.dom', 'TrackPitchType'): TrackPitchType,
+        ('rea_score.dom', 'TrackType'): TrackType,
+        **{(module, name): path
+           for module in ('pathlib', 'pathlib._local')
+           for name, path in (
+               ('PosixPath', PurePosixPath),
+               ('PurePosixPath', PurePosixPath),
+               ('WindowsPath', PureWindowsPath),
+               ('PureWindowsPath', PureWindowsPath),
+           )},
+    }
+
+    def find_class(self, module: str, name: str) -> Any:
+        if (module, name) in self.TYPES:
+            return self.TYPES[(module, name)]
+        raise pickle.UnpicklingError(f'{module}.{name} is not allowed')
+
+
+def unpickle_state(value: str) -> Any:
+    """Decode ext-state value, written by reapy with pickled=True."""
+    if not value:
+        return None
+    data = base64.b64decode(value)
+    return _StateUnpickler(io.BytesIO(data)).load()
+
+
+class RppTrack:
+    """Track, read from .RPP file.
+
+    Attributes
+    ----------
+    guid : str
+    name : str
+    table : NoteTable
+        notes of the active takes of all items
+    note_names : List[str]
+        MIDI note names of the track, by pitch
+    """
+
+    def __init__(self, guid: str) -> None:
+        self.guid = guid
+        self.name = ''
+        self.table = NoteTable()
+        self.note_names = [''] * 128
+
+    def __repr__(self) -> str:
+        return f'<RppTrack {self.guid} "{self.name}" {self.table}>'
+
+
+class RppProject:
+    """Data of .RPP file, that ReaScore uses.
+
+    Use `RppProject.read` or `read_project`.
+    """
+
+    def __init__(self, path: str = '') -> None:
+        self.path = path
+        self.tempo_points: List[Tuple[float, float, bool]] = []
+        self.time_signatures: List[Tuple[float, int, int]] = []
+        self.markers: List[Tuple[float, str]] = []
+        self.ext_state: Dict[str, Dict[str, str]] = {}
+        self.tracks: List[RppTrack] = []
+        self._tempo_map: Optional[TempoMap] = None
+
+    def __repr__(self) -> str:
+        return f'<RppProject "{self.path}" {self.tracks}>'
+
+    @classmethod
+    def read(cls, file: Union[Path, str, TextIO]) -> 'RppProject':
+        if isinstance(file, (Path, str)):
+            with open(file, encoding='utf-8', errors='replace') as lines:
+                project = cls(str(file))
+                _RppParser(project).feed(lines)
+            return project
+        project = cls()
+        _RppParser(project).feed(file)
+        return project
+
+    @property
+    def tempo_map(self) -> TempoMap:
+        if self._tempo_map is None:
+            self._tempo_map = TempoMap(self.tempo_points)
+        return self._tempo_map
+
+    def time_to_beats(self, time: float) -> float:
+        return self.tempo_map.time_to_beats(time)
+
+    def bars(self, end_beats: float) -> List[Bar]:
+        return bars_from_signatures([
+            (self.time_to_beats(time), num, denom)
+            for time, num, denom in self.time_signatures
+        ], end_beats)
+
+    def state(self, key: str, section: str = 'main') -> Any:
+        """ReaScore ext-state value, as ProjectInspector.state reads it."""
+        value = self.ext_state.get(EXT_SECTION, {}).get(section.upper())
+        state = unpickle_state(value or '') or {}
+        return state.get(key)
+
+
+def _midi_event(ppq: float, buf: List[int], muted: bool,
+                selected: bool) -> 'MIDIEventDict':
+    # cc_shape 0 is CCShapeFlag.square, reapy_boost is not imported here
+    return cast('MIDIEventDict', dict(
+        ppq=ppq, buf=buf, cc_shape=0, muted=muted, selected=selected
+    ))
+
+
+class _RppParser:
+    """Push parser, keeping the stack of opened blocks."""
+
+    def __init__(self, project: RppProject) -> None:
+        self.project = project
+        self.stack: List[str] = []
+        self.track: Optional[RppTrack] = None
+        # item
+        self.position = 0.
+        self.takes: List[List['MIDIEventDict']] = []
+        self.take_ticks: List[float] = []
+        self.active_take = 0
+        # midi source
+        self.ppq = 0
+        self.midi_source = False
+        self.sysex: Optional[Tuple[int, List[str], bool]] = None
+        self.ext_section = ''
+
+    def feed(self, lines: Iterable[str]) -> None:
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if line == '>':
+                self.close()
+            elif line[0] == '<':
+                self.open(tokens(line[1:]))
+            else:
+                self.line(line)
+
+    def open(self, toks: List[str]) -> None:
+        name = toks[0].upper() if toks else ''
+        parent = self.stack[-1] if self.stack else ''
+        in_midi = self.in_midi()
+        self.stack.append(name)
+        if name == 'TRACK':
+            self.track = RppTrack(toks[1] if len(toks) > 1 else '')
+        elif name == 'ITEM' and parent == 'TRACK':
+            self.position = 0.
+            self.takes, self.take_ticks, self.active_take = [], [], 0
+        elif name == 'SOURCE' and parent == 'ITEM':
+            self.ppq = 0
+            self.midi_source = len(toks) > 1 and toks[1] == 'MIDI'
+            self.takes.append([])
+            self.take_ticks.append(960.)
+        elif name == 'X' and in_midi:
+            self.ppq += int(toks[1])
+            self.sysex = (self.ppq, [], toks[0] == 'x')
+        elif parent == 'EXTSTATE':
+            self.ext_section = toks[0]
+            self.project.ext_state.setdefault(self.ext_section, {})
+
+    def close(self) -> None:
+        name = self.stack.pop() if self.stack else ''
+        if name == 'X' and self.sysex is not None:
+            ppq, chunks, selected = self.sysex
+            self.takes[-1].append(
+                _midi_event(
+                    ppq, list(base64.b64decode(''.join(chunks))), False,
+                    selected
+                )
+            )
+            self.sysex = None
+        elif name == 'ITEM' and self.track is not None:
+            self.close_item(self.track)
+        elif name == 'TRACK' and self.track is not None:
+            self.project.tracks.append(self.track)
+            self.track = None
+
+    def close_item(self, track: RppTrack) -> None:
+        if self.active_take >= len(self.takes):
+            return
+        ticks = self.take_ticks[self.active_take]
+        start = self.project.time_to_beats(self.position)
+        track.table.extend(
+            NoteTable.from_midi(
+                self.takes[self.active_take],
+                lambda ppq: round(start + ppq / ticks, _DIGITS)
+            )
+        )
+        self.takes = []
+
+    def in_midi(self) -> bool:
+        """If the innermost block is MIDI source of an item."""
+        return self.midi_source and self.stack[-2:] == ['ITEM', 'SOURCE']
+
+    def line(self, line: str) -> None:
+        block = self.stack[-1] if self.stack else ''
+        if self.sysex is not None:
+            self.sysex[1].append(line)
+            return
+        if block == 'SOURCE' and self.in_midi():
+            self.midi_line(line)
+            return
+        toks = tokens(line)
+        key = toks[0]
+        project = self.project
+        if block == 'REAPER_PROJECT':
+            if key == 'TEMPO':
+                project.tempo_points.append((0., float(toks[1]), False))
+                project.time_signatures.append(
+                    (0., int(toks[2]), int(toks[3]))
+                )
+            elif key == 'MARKER' and len(toks) > 4:
+                if not int(toks[4]) & _MARKER_IS_REGION:
+                    project.markers.append((float(toks[2]), toks[3]))
+        elif block == 'TEMPOENVEX' and key == 'PT':
+            time, bpm = float(toks[1]), float(toks[2])
+            shape = int(toks[3]) if len(toks) > 3 else 1
+            project.tempo_points.append((time, bpm, shape == 0))
+            if len(toks) > 4 and (sig := int(toks[4])):
+                project.time_signatures.append(
+                    (time, sig & 0xffff, sig >> 16)
+                )
+        elif self.stack[-2:-1] == ['EXTSTATE']:
+            section = project.ext_state[self.ext_section]
+            section[key.upper()] = ' '.join(toks[1:])
+        elif block == 'TRACK' and self.track is not None:
+            if key == 'NAME' and len(toks) > 1:
+                self.track.name = toks[1]
+            elif key == 'TRACKID' and len(toks) > 1:
+                self.track.guid = toks[1]
+        elif block == 'MIDINOTENAMES' and self.track is not None:
+            if len(toks) > 2 and int(toks[0]) in (-1, 0):
+                self.track.note_names[int(toks[1])] = toks[2]
+        elif block == 'ITEM':
+            if key == 'POSITION':
+                self.position = float(toks[1])
+            elif key == 'TAKE' and 'SEL' in toks[1:]:
+                self.active_take = len(self.takes)
+
+    def midi_line(self, line: str) -> None:
+        key = line[0]
+        if key in 'Ee' and line[1:2] in (' ', 'm'):
+            toks = line.split()
+            self.ppq += int(toks[1])
+            self.takes[-1].append(
+                _midi_event(
+                    self.ppq, [int(byte, 16) for byte in toks[2:5]],
+                    toks[0].endswith('m'), key == 'e'
+                )
+            )
+        elif line.startswith('HASDATA'):
+            toks = line.split()
+            if len(toks) > 2:
+                self.take_ticks[-1] = float(toks[2])
+
+
+def _global_events(
+    project: RppProject, at_start: List[NotationEvent], bars: List[Bar],
+    end_beats: float
+) -> Dict[Position, List[NotationEvent]]:
+    """Same as `dom.get_global_events`, but from the read project.
+
+    Has to be called with the MeasureMap of bars activated.
+    """
+    events: Dict[Position, List[NotationEvent]] = {Position(0): at_start}
+    signature = None
+    for start, _, num, denom in bars:
+        if start > end_beats:
+            break
+        if signature != (num, denom):
+            signature = num, denom
+            events = update_events(
+                events, {
+                    Position(start):
+                    [NotationTimeSignature(TimeSignature(num, denom))]
+                }
+            )
+    for time, name in project.markers:
+        if NotationMarker.reascore_tokens(name):
+            events = update_events(
+                events, {
+                    Position(project.time_to_beats(time)):
+                    list(NotationMarker.from_reaper_marker(name))
+                }
+            )
+    return {k: events[k] for k in sorted(events)}
+
+
+def _export_dir(project: RppProject) -> Path:
+    path = project.state('export_dir') or Path('score')
+    path = Path(*path.parts)
+    if path.is_absolute():
+        return path
+    if not project.path:
+        return path.absolute()
+    return Path(project.path).absolute().parent.joinpath(path)
+
+
+def _track_snapshot(
+    project: RppProject, track: RppTrack, bars: List[Bar]
+) -> TrackSnapshot:
+    state = unpickle_state(
+        project.ext_state.get(EXT_SECTION, {}).get(track.guid.upper(), '')
+    ) or {}
+    part_name = state.get('part_name') or track.name
+    at_start: List[NotationEvent] = []
+    if ks := project.state('key_signature'):
+        at_start.append(NotationKeySignature.from_marker(ks))
+    if state.get('breakable_beam'):
+        at_start.append(
+            NotationPlainText("\n\\override Beam.breakable = ##t\n")
+        )
+    snapshot = TrackSnapshot(
+        track.guid,
+        part_name,
+        track.table,
+        {},
+        track_type=TrackType(state.get('track_type', TrackType.default)),
+        pitch_type=TrackPitchType(
+            state.get('pitch_type', TrackPitchType.default)
+        ),
+        clef=state.get('clef') or Clef.treble,
+        octave_offset=state.get('octave_offset') or 0,
+        note_names=track.note_names,
+        export_path=str(_export_dir(project).joinpath(f'{part_name}.ly')),
+    )
+    snapshot.global_events = _global_events(
+        project, at_start, bars, snapshot.end_qn
+    )
+    return snapshot
+
+
+def read_project(
+    file: Union[Path, str, TextIO],
+    guids: Optional[Sequence[str]] = None
+) -> Snapshot:
+    """Read .RPP file into a snapshot, as ProjectInspector.snapshot does.
+
+    Parameters
+    ----------
+    file : Union[Path, str, TextIO]
+    guids : Optional[Sequence[str]]
+        tracks to read. By default, score tracks of the project, or every
+        track with notes if there are none.
+    """
+    project = RppProject.read(file)
+    by_guid = {track.guid: track for track in project.tracks}
+    if guids is None:
+        guids = project.state('tracks') or [
+            track.guid for track in project.tracks if len(track.table)
+        ]
+    tracks = [by_guid[guid] for guid in guids if guid in by_guid]
+    end = max(
+        (
+            on + dur for track in tracks
+            for on, dur in zip(track.table.onset, track.table.duration)
+        ),
+        default=0
+    )
+    bars = project.bars(end)
+    with MeasureMap(bars).activated():
+        snapshots = [_track_snapshot(project, track, bars) for track in tracks]
+    return Snapshot(bars, snapshots, project.path)
+
@@ -60,6 +60,14 @@ class Key:
     def __repr__(self) -> str:
         return f'<Key {self.tonic}:{self.scale.value}>'
 
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Key):
+            return False
+        return (self.tonic, self.scale) == (other.tonic, other.scale)
+
+    def __hash__(self) -> int:
+        return hash((self.tonic, self.scale))
+
 
 class Scale(Enum):
     major = 'major'
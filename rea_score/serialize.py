@@ -0,0 +1,407 @@
+"""Compact binary format of ReaScore DOM and NoteTable.
+
+Layout (little-endian)::
+
+    magic b'RSDM', version: u8, kind: u8
+    strings:      u32 count, then (u32 size, utf-8 bytes) each
+    attachments:  u32 count, then (u32 size, pickled bytes) each
+    body
+
+Strings (note names) and attachments (notations) are interned: body
+refers to them by index, so equal ones are stored once. Attachments
+equal by content are shared between events after loading. Events,
+pitches, lengths and positions are packed with `struct`; positions
+keep their bar data, so loading never queries REAPER bars.
+"""
+from array import array
+import builtins
+from fractions import Fraction
+import io
+import pickle
+import struct
+import sys
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union, cast
+
+from rea_score import notation_events, notations_pitch, primitives, scale
+from rea_score.dom import BarCheck, Staff, Voice
+from rea_score.note_table import NoteTable
+from rea_score.primitives import (
+    Chord, Clef, Event, GlobalNotationEvent, Grace, GraceType,
+    Length, Pitch, Position, Tuplet, TupletRate
+)
+from rea_score.scale import Accidental
+
+MAGIC = b'RSDM'
+VERSION = 1
+
+KIND_STAVES = 1
+KIND_TABLE = 2
+KIND_SNAPSHOT = 3  # see rea_score.snapshot
+
+_EVENT, _CHORD, _TUPLET, _GRACE, _GLOBAL = range(5)
+_ATT_INTERNED, _ATT_GRACE, _ATT_BARCHECK = range(3)
+_NO_MIDI = -1
+
+_HEADER = struct.Struct('<4sBB')
+_U8 = struct.Struct('<B')
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_POSITION = struct.Struct('<dIdd')
+_PITCH = struct.Struct('<iBBI')
+# voice, staff, unnormalized, length: (beats, full bar, trem, bar multiplier),
+# pitch, prefix size, postfix size
+_EVENT_HEAD = struct.Struct('<HHBdBHHiBBIHH')
+_ATTACHMENT = struct.Struct('<BI')
+_RATE = struct.Struct('<HH')
+_TEXT = struct.Struct('<dI')
+
+_ACCIDENTALS: List[Optional[Accidental]] = [None, *Accidental]
+_GRACE_TYPES = list(GraceType)
+
+Dumpable = Union[List[Staff], NoteTable]
+
+
+class SerializeError(ValueError):
+    ...
+
+
+def _attachment_types() -> Dict[Tuple[str, str], Any]:
+    """Classes of notations, pitches and their enums by (module, name)."""
+    types: Dict[Tuple[str, str], Any] = {
+        ('builtins', name): getattr(builtins, name) for name in (
+            'bool', 'bytearray', 'complex', 'dict', 'frozenset', 'list',
+            'set', 'tuple'
+        )
+    }
+    types[('fractions', 'Fraction')] = Fraction
+    for module in (primitives, scale, notations_pitch, notation_events):
+        for value in vars(module).values():
+            if isinstance(value, type) and value.__module__ == module.__name__:
+                types[(value.__module__, value.__qualname__)] = value
+    return types
+
+
+class _AttachmentUnpickler(pickle.Unpickler):
+    """Unpickles attachments, allowing only ReaScore and container types.
+
+    Files are read from user directories (batch export), so globals are
+    looked up in a fixed table, and nothing is imported while loading.
+    """
+
+    TYPES = _attachment_types()
+
+    def find_class(self, module: str, name: str) -> Any:
+        if (module, name) in self.TYPES:
+            return self.TYPES[(module, name)]
+        raise SerializeError(
+            f'attachment type is not allowed: {module}.{name}'
+        )
+
+
+class _Writer:
+
+    def __init__(self) -> None:
+        self.body = bytearray()
+        self._strings: Dict[str, int] = {'': 0}
+        self._attachments: Dict[bytes, int] = {}
+        self._by_id: Dict[int, Tuple[object, int]] = {}
+
+    def pack(self, fmt: struct.Struct, *values: Any) -> None:
+        self.body += fmt.pack(*values)
+
+    def string(self, value: str) -> int:
+        if value not in self._strings:
+            self._strings[value] = len(self._strings)
+        return self._strings[value]
+
+    def attachment(self, value: object) -> int:
+        if (known := self._by_id.get(id(value))) is not None:
+            return known[1]
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if blob not in self._attachments:
+            self._attachments[blob] = len(self._attachments)
+        idx = self._attachments[blob]
+        # value is kept, so its id is not reused while writing
+        self._by_id[id(value)] = (value, idx)
+        return idx
+
+    def position(self, position: Position) -> None:
+        self.pack(
+            _POSITION, position.position, position.bar,
+            position._bar_position, position._bar_end_distance
+        )
+
+    def pitch_fields(self, pitch: Pitch) -> Tuple[int, int, bool, int]:
+        midi = _NO_MIDI if pitch.midi_pitch is None else pitch.midi_pitch
+        return (
+            midi, _ACCIDENTALS.index(pitch.accidental), pitch.tie,
+            self.string(pitch.note_name)
+        )
+
+    def attachments(self, attachments: List[Any]) -> None:
+        self.pack(_U16, len(attachments))
+        self.attachment_items(attachments)
+
+    def attachment_items(self, attachments: List[Any]) -> None:
+        for attach in attachments:
+            if isinstance(attach, Grace):
+                self.pack(_ATTACHMENT, _ATT_GRACE, 0)
+                self.event(attach)
+            elif isinstance(attach, BarCheck):
+                self.pack(_ATTACHMENT, _ATT_BARCHECK, attach.bar_nr or 0)
+            else:
+                self.pack(
+                    _ATTACHMENT, _ATT_INTERNED, self.attachment(attach)
+                )
+
+    def events(self, events: List[Event]) -> None:
+        self.pack(_U32, len(events))
+        for event in events:
+            self.event(event)
+
+    def event(self, event: Union[Event, GlobalNotationEvent]) -> None:
+        if isinstance(event, GlobalNotationEvent):
+            self.pack(_U8, _GLOBAL)
+            self.attachments(event.events)
+            return
+        if isinstance(event, Chord):
+            kind = _CHORD
+        elif isinstance(event, Tuplet):
+            kind = _TUPLET
+        elif isinstance(event, Grace):
+            kind = _GRACE
+        else:
+            kind = _EVENT
+        length = event.length
+        self.pack(_U8, kind)
+        self.pack(
+            _EVENT_HEAD, event.voice_nr, event.staff_nr, event.unnormalized,
+            length.length, length.full_bar, length.trem_denom,
+            length.bar_multiplier, *self.pitch_fields(event.pitch),
+            len(event.prefix), len(event.postfix)
+        )
+        self.attachment_items(event.prefix)
+        self.attachment_items(event.postfix)
+        if isinstance(event, Chord):
+            self.pack(_U16, len(event.pitches))
+            for pitch in event.pitches:
+                self.pack(_PITCH, *self.pitch_fields(pitch))
+        elif isinstance(event, Tuplet):
+            self.pack(_RATE, event._rate.numerator, event._rate.denominator)
+            self.events(event._events)
+        elif isinstance(event, Grace):
+            self.pack(_U8, _GRACE_TYPES.index(event.grace_type))
+            self.events(event.events)
+
+    def voice(self, voice: Voice) -> None:
+        self.pack(_U16, voice.voice_nr)
+        self.pack(_U32, len(voice.events))
+        for position, event in voice.events.items():
+            self.position(position)
+            self.event(event)
+        self.pack(_U32, len(voice.globals))
+        for position, notations in voice.globals.items():
+            self.position(position)
+            self.attachments(notations)
+
+    def staff(self, staff: Staff) -> None:
+        self.pack(_U16, staff.staff_nr)
+        self.pack(_U32, self.attachment(staff.clef))
+        self.pack(_U8, staff.parallel)
+        self.pack(_U16, len(staff.voices))
+        for voice in staff.voices:
+            self.voice(voice)
+
+    def table(self, table: NoteTable) -> None:
+        self.pack(_U8, sys.byteorder == 'little')
+        for name in table.typecodes:
+            data = table.column(name).tobytes()
+            self.pack(_U32, len(data))
+            self.body += data
+        self.pack(_U32, len(table.notations))
+        for notations in table.notations:
+            self.attachments(notations)
+        self.pack(_U32, len(table.texts))
+        for onset, text in table.texts:
+            self.pack(_TEXT, onset, self.attachment(text))
+
+    def getvalue(self, kind: int) -> bytes:
+        out = bytearray(_HEADER.pack(MAGIC, VERSION, kind))
+        out += _U32.pack(len(self._strings))
+        for string in self._strings:
+            data = string.encode('utf-8')
+            out += _U32.pack(len(data))
+            out += data
+        out += _U32.pack(len(self._attachments))
+        for blob in self._attachments:
+            out += _U32.pack(len(blob))
+            out += blob
+        out += self.body
+        return bytes(out)
+
+
+class _Reader:
+
+    def __init__(self, data: bytes) -> None:
+        self.data = memoryview(data)
+        self.offset = 0
+        magic, version, self.kind = self.unpack(_HEADER)
+        if magic != MAGIC:
+            raise SerializeError('not a ReaScore binary')
+        if version > VERSION:
+            raise SerializeError(f'unsupported version: {version}')
+        self.strings = [
+            bytes(self.chunk()).decode('utf-8')
+            for _ in range(self.unpack(_U32)[0])
+        ]
+        self._interned = [
+            _AttachmentUnpickler(io.BytesIO(self.chunk())).load()
+            for _ in range(self.unpack(_U32)[0])
+        ]
+
+    def interned(self, idx: int) -> Any:
+        return self._interned[idx]
+
+    def unpack(self, fmt: struct.Struct) -> Tuple[Any, ...]:
+        values = fmt.unpack_from(self.data, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def chunk(self) -> memoryview:
+        size = self.unpack(_U32)[0]
+        self.offset += size
+        return self.data[self.offset - size:self.offset]
+
+    def position(self) -> Position:
+        return Position.from_bar_data(*self.unpack(_POSITION))
+
+    def pitch(
+        self, midi: int, accidental: int, tie: int, name: int
+    ) -> Pitch:
+        return Pitch(
+            None if midi == _NO_MIDI else midi, _ACCIDENTALS[accidental],
+            bool(tie), self.strings[name]
+        )
+
+    def attachments(self, size: Optional[int] = None) -> List[Any]:
+        if size is None:
+            size = self.unpack(_U16)[0]
+        out: List[Any] = []
+        for _ in range(size):
+            kind, value = self.unpack(_ATTACHMENT)
+            if kind == _ATT_GRACE:
+                out.append(self.event())
+            elif kind == _ATT_BARCHECK:
+                out.append(BarCheck(value or None))
+            else:
+                out.append(self._interned[value])
+        return out
+
+    def events(self) -> List[Event]:
+        return [
+            cast(Event, self.event()) for _ in range(self.unpack(_U32)[0])
+        ]
+
+    def event(self) -> Union[Event, GlobalNotationEvent]:
+        kind = self.unpack(_U8)[0]
+        if kind == _GLOBAL:
+            return GlobalNotationEvent(self.attachments())
+        (
+            voice_nr, staff_nr, unnormalized, beats, full_bar, trem_denom,
+            bar_multiplier, *pitch_fields, prefix_size, postfix_size
+        ) = self.unpack(_EVENT_HEAD)
+        length = Length(beats, bool(full_bar))
+        length.trem_denom, length.bar_multiplier = trem_denom, bar_multiplier
+        pitch = self.pitch(*pitch_fields)
+        prefix = self.attachments(prefix_size)
+        postfix = self.attachments(postfix_size)
+        event: Event
+        if kind == _CHORD:
+            pitches = [
+                self.pitch(*self.unpack(_PITCH))
+                for _ in range(self.unpack(_U16)[0])
+            ]
+            event = Chord(
+                length, None, voice_nr, staff_nr, prefix, postfix, pitches
+            )
+        elif kind == _TUPLET:
+            rate = TupletRate(*self.unpack(_RATE))
+            event = Tuplet(
+                length, None, voice_nr, staff_nr, prefix, postfix, rate,
+                self.events()
+            )
+        elif kind == _GRACE:
+            grace_type = _GRACE_TYPES[self.unpack(_U8)[0]]
+            event = Grace(
+                length, None, voice_nr, staff_nr, prefix, postfix,
+                grace_type, self.events()
+            )
+        else:
+            event = Event(length, pitch, voice_nr, staff_nr, prefix, postfix)
+        event.unnormalized = bool(unnormalized)
+        return event
+
+    def voice(self) -> Voice:
+        voice = Voice(self.unpack(_U16)[0])
+        for _ in range(self.unpack(_U32)[0]):
+            position = self.position()
+            voice.events[position] = cast(Event, self.event())
+        for _ in range(self.unpack(_U32)[0]):
+            position = self.position()
+            voice.globals[position] = self.attachments()
+        return voice
+
+    def staff(self) -> Staff:
+        staff_nr = self.unpack(_U16)[0]
+        clef = cast(Clef, self.interned(self.unpack(_U32)[0]))
+        staff = Staff(staff_nr, clef, bool(self.unpack(_U8)[0]))
+        for _ in range(self.unpack(_U16)[0]):
+            staff.append(self.voice())
+        return staff
+
+    def table(self) -> NoteTable:
+        table = NoteTable()
+        swap = bool(self.unpack(_U8)[0]) != (sys.byteorder == 'little')
+        for name in table.typecodes:
+            column = array(table.typecodes[name])
+            column.frombytes(self.chunk())
+            if swap:
+                column.byteswap()
+            setattr(table, name, column)
+        table.notations = [
+            self.attachments() for _ in range(self.unpack(_U32)[0])
+        ]
+        for _ in range(self.unpack(_U32)[0]):
+            onset, idx = self.unpack(_TEXT)
+            table.texts.append((onset, self.interned(idx)))
+        return table
+
+
+def dumps(obj: Dumpable) -> bytes:
+    """Serialize list of staves or NoteTable."""
+    writer = _Writer()
+    if isinstance(obj, NoteTable):
+        writer.table(obj)
+        return writer.getvalue(KIND_TABLE)
+    writer.pack(_U16, len(obj))
+    for staff in obj:
+        writer.staff(staff)
+    return writer.getvalue(KIND_STAVES)
+
+
+def loads(data: bytes) -> Dumpable:
+    """Load list of staves or NoteTable, dumped by `dumps`."""
+    reader = _Reader(data)
+    if reader.kind == KIND_TABLE:
+        return reader.table()
+    if reader.kind == KIND_STAVES:
+        return [reader.staff() for _ in range(reader.unpack(_U16)[0])]
+    raise SerializeError(f'unknown kind: {reader.kind}')
+
+
+def dump(obj: Dumpable, file: BinaryIO) -> None:
+    file.write(dumps(obj))
+
+
+def load(file: BinaryIO) -> Dumpable:
+    return loads(file.read())
@@ -0,0 +1,164 @@
+"""Resident ReaScore service, performing commands of shortcut scripts.
+
+The service is started once (``ReaScore_service.py``) and runs in a defer
+loop with `rea_score.inspector` already imported. Action scripts only put
+a command into a mailbox in the global (not saved) ext state:
+
+>>> from rea_score.service import send
+>>> send('set_voice_of_selected_notes(1)')
+
+so a keypress costs importing this module instead of the whole package.
+Commands are expressions of actions, registered in `rea_score.keymap`,
+or one of `SHORTCUT` and `STOP`. If the service does not run, `send` performs the
+command itself.
+"""
+import time
+import traceback
+from typing import Callable, List, Optional
+
+try:
+    # inside REAPER the API is available without importing reapy_boost
+    import reaper_python as _api
+    _get_ext_state = _api.RPR_GetExtState
+    _set_ext_state = _api.RPR_SetExtState
+    _delete_ext_state = _api.RPR_DeleteExtState
+except ImportError:
+
+    def _get_ext_state(section: str, key: str) -> str:
+        from reapy_boost import reascript_api as RPR
+        return RPR.GetExtState(section, key)  # type:ignore
+
+    def _set_ext_state(section: str, key: str, value: str,
+                       persist: bool) -> None:
+        from reapy_boost import reascript_api as RPR
+        RPR.SetExtState(section, key, value, persist)  # type:ignore
+
+    def _delete_ext_state(section: str, key: str, persist: bool) -> None:
+        from reapy_boost import reascript_api as RPR
+        RPR.DeleteExtState(section, key, persist)  # type:ignore
+
+
+SECTION = 'Levitanus_ReaScore_service'
+MAILBOX = 'commands'
+HEARTBEAT = 'heartbeat'
+# seconds between heartbeats, the service is considered stopped after
+# two missed ones
+HEARTBEAT_INTERVAL = 1.0
+
+SHORTCUT = 'shortcut'
+STOP = 'stop'
+
+
+def is_running() -> bool:
+    """If the service has written heartbeat recently."""
+    beat = _get_ext_state(SECTION, HEARTBEAT)
+    try:
+        return time.time() - float(beat) < HEARTBEAT_INTERVAL * 2
+    except ValueError:
+        return False
+
+
+def send(command: str) -> None:
+    """Put command to the mailbox, or perform it if the service is off."""
+    if not is_running():
+        perform(command)
+        return
+    pending = _get_ext_state(SECTION, MAILBOX)
+    _set_ext_state(
+        SECTION, MAILBOX, f'{pending}\n{command}' if pending else command,
+        False
+    )
+
+
+def receive() -> List[str]:
+    """Take all commands from the mailbox, in order of sending."""
+    pending = _get_ext_state(SECTION, MAILBOX)
+    if not pending:
+        return []
+    _delete_ext_state(SECTION, MAILBOX, False)
+    return pending.split('\n')
+
+
+def perform(command: str) -> None:
+    """Perform command in the current process."""
+    if command == SHORTCUT:
+        capture_shortcut()
+    elif command != STOP:
+        from rea_score.inspector import ProjectInspector
+        ProjectInspector.perform_func(command)
+
+
+def capture_shortcut() -> None:
+    """Open small window, and perform shortcut of the next typed char."""
+    import reapy_boost as rpr
+    from reapy_boost import ImGui
+    from rea_score.inspector import ProjectInspector
+    ctx = ImGui.CreateContext('getkey', True)
+
+    def loop() -> None:
+        vis, opened = ImGui.Begin(ctx, 'getkey')
+        ImGui.CaptureKeyboardFromApp(ctx, True)
+        captured, char = ImGui.GetInputQueueCharacter(ctx, 0)
+        if captured:
+            ProjectInspector().perform_shortcut(chr(char))
+            vis = False
+        ImGui.End(ctx)
+
+        if vis:
+            rpr.defer(loop)
+        else:
+            ImGui.DestroyContext(ctx)
+
+    rpr.defer(loop)
+
+
+class Service:
+    """Defer loop, performing commands from the mailbox.
+
+    Parameters
+    ----------
+    perform : Callable[[str], None]
+        called for every command except STOP
+    """
+
+    def __init__(self, perform: Callable[[str], None] = perform) -> None:
+        import reapy_boost as rpr
+        self.perform = perform
+        self.defer = rpr.defer
+        self.running = False
+        self.beat = 0.0
+
+    def start(self) -> None:
+        # import everything before the first command arrives
+        import rea_score.inspector  # noqa: F401
+        receive()  # drop commands sent before the start
+        self.running = True
+        self.step()
+
+    def step(self) -> None:
+        now = time.time()
+        if now - self.beat >= HEARTBEAT_INTERVAL:
+            _set_ext_state(SECTION, HEARTBEAT, str(now), False)
+            self.beat = now
+        for command in receive():
+            if command == STOP:
+                self.stop()
+                return
+            try:
+                self.perform(command)
+            except Exception:
+                traceback.print_exc()
+        if self.running:
+            self.defer(self.step)
+
+    def stop(self) -> None:
+        self.running = False
+        _delete_ext_state(SECTION, HEARTBEAT, False)
+
+
+def run(service: Optional[Service] = None) -> None:
+    """Start the service, or stop it if already running."""
+    if is_running():
+        send(STOP)
+        return
+    (service or Service()).start()
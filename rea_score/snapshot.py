@@ -0,0 +1,378 @@
+"""Snapshots of score tracks, to render them outside of REAPER.
+
+Inside REAPER only the raw data is read (see `ProjectInspector.snapshot`):
+notes with notations and texts, global events, bars and track settings.
+Everything else — DOM building, LilyPond and MusicXML output — is made
+from the snapshot in any Python process, e.g. by
+``python -m rea_score render score.rsnap``.
+"""
+from pathlib import Path
+import struct
+from typing import BinaryIO, Dict, List, Optional, Sequence, Tuple, Union
+
+from rea_score.dom import (
+    Staff, TrackPitchType, TrackType, split_table_by_staff
+)
+from rea_score.lily_convert import (
+    LyDict, write_part, write_score, write_score_part
+)
+from rea_score.lily_export import LyWriter, render
+from rea_score.note_table import NoteTable
+from rea_score.primitives import Clef, MeasureMap, NotationEvent, Position
+from rea_score.serialize import (
+    KIND_SNAPSHOT, SerializeError, _Reader, _U16, _U32, _Writer
+)
+
+SUFFIX = '.rsnap'
+
+_BAR = struct.Struct('<ddHH')
+_TRACK = struct.Struct('<IIIIIiI')
+
+Bar = Tuple[float, float, int, int]
+
+
+class TrackSnapshot:
+    """Everything needed to render one score track.
+
+    Parameters
+    ----------
+    guid : str
+    part_name : str
+    table : NoteTable
+        notes of all items of the track
+    global_events : Dict[Position, List[NotationEvent]]
+        time and key signatures, markers and notations at start
+    track_type : TrackType
+    pitch_type : TrackPitchType
+    clef : Clef
+    octave_offset : int
+    note_names : Optional[List[str]]
+        MIDI note names of the track, used with TrackPitchType.note_names
+    export_path : str
+        .ly file of the part, as set in the project
+    """
+
+    def __init__(
+        self,
+        guid: str,
+        part_name: str,
+        table: NoteTable,
+        global_events: Dict[Position, List[NotationEvent]],
+        track_type: TrackType = TrackType.default,
+        pitch_type: TrackPitchType = TrackPitchType.default,
+        clef: Clef = Clef.treble,
+        octave_offset: int = 0,
+        note_names: Optional[List[str]] = None,
+        export_path: str = '',
+    ) -> None:
+        self.guid = guid
+        self.part_name = part_name
+        self.table = table
+        self.global_events = global_events
+        self.track_type = track_type
+        self.pitch_type = pitch_type
+        self.clef = clef
+        self.octave_offset = octave_offset
+        self.note_names = note_names or []
+        self.export_path = export_path
+
+    def __repr__(self) -> str:
+        return f'<TrackSnapshot "{self.part_name}" {self.table}>'
+
+    @property
+    def end_qn(self) -> float:
+        table = self.table
+        return max(
+            (on + dur for on, dur in zip(table.onset, table.duration)),
+            default=0
+        )
+
+    def staves(self) -> List[Staff]:
+        """Build staves with global events applied.
+
+        Positions query bars, so activate the MeasureMap of the snapshot.
+        """
+        staves = split_table_by_staff(
+            self.table, self.pitch_type, self.note_names
+        )
+        for staff in staves:
+            if self.clef is not Clef.treble:
+                staff.clef = self.clef
+            staff.apply_global_events(self.global_events)
+        return staves
+
+
+class Snapshot:
+    """Score tracks of a project with its bars."""
+
+    def __init__(
+        self,
+        bars: Sequence[Bar],
+        tracks: List[TrackSnapshot],
+        project_path: str = '',
+    ) -> None:
+        self.bars = list(bars)
+        self.tracks = tracks
+        self.project_path = project_path
+
+    def __repr__(self) -> str:
+        return f'<Snapshot {len(self.bars)} bars, {self.tracks}>'
+
+    def measure_map(self) -> MeasureMap:
+        return MeasureMap(self.bars)
+
+
+class _SnapshotWriter(_Writer):
+
+    def snapshot(self, snapshot: Snapshot) -> None:
+        self.pack(_U32, self.string(snapshot.project_path))
+        self.pack(_U32, len(snapshot.bars))
+        for bar in snapshot.bars:
+            self.pack(_BAR, *bar)
+        self.pack(_U16, len(snapshot.tracks))
+        for track in snapshot.tracks:
+            self.track(track)
+
+    def track(self, track: TrackSnapshot) -> None:
+        self.pack(
+            _TRACK, self.string(track.guid), self.string(track.part_name),
+            self.string(track.track_type.value),
+            self.string(track.pitch_type.value),
+            self.string(track.clef.value), track.octave_offset,
+            self.string(track.export_path)
+        )
+        self.pack(_U32, len(track.note_names))
+        for name in track.note_names:
+            self.pack(_U32, self.string(name))
+        self.table(track.table)
+        self.pack(_U32, len(track.global_events))
+        for position, notations in track.global_events.items():
+            self.position(position)
+            self.attachments(notations)
+
+
+class _SnapshotReader(_Reader):
+
+    def snapshot(self) -> Snapshot:
+        project_path = self.strings[self.unpack(_U32)[0]]
+        bars = [self.unpack(_BAR) for _ in range(self.unpack(_U32)[0])]
+        tracks = [self.track() for _ in range(self.unpack(_U16)[0])]
+        return Snapshot(bars, tracks, project_path)
+
+    def track(self) -> TrackSnapshot:
+        strings = self.strings
+        (
+            guid, part_name, track_type, pitch_type, clef, octave_offset,
+            export_path
+        ) = self.unpack(_TRACK)
+        note_names = [
+            strings[self.unpack(_U32)[0]]
+            for _ in range(self.unpack(_U32)[0])
+        ]
+        table = self.table()
+        global_events = {}
+        for _ in range(self.unpack(_U32)[0]):
+            position = self.position()
+            global_events[position] = self.attachments()
+        return TrackSnapshot(
+            strings[guid],
+            strings[part_name],
+            table,
+            global_events,
+            TrackType(strings[track_type]),
+            TrackPitchType(strings[pitch_type]),
+            Clef(strings[clef]),
+            octave_offset,
+            note_names,
+            strings[export_path],
+        )
+
+
+def dumps(snapshot: Snapshot) -> bytes:
+    writer = _SnapshotWriter()
+    writer.snapshot(snapshot)
+    return writer.getvalue(KIND_SNAPSHOT)
+
+
+def loads(data: bytes) -> Snapshot:
+    reader = _SnapshotReader(data)
+    if reader.kind != KIND_SNAPSHOT:
+        raise SerializeError('not a snapshot')
+    return reader.snapshot()
+
+
+def dump(snapshot: Snapshot, file: Union[Path, str, BinaryIO]) -> None:
+    if isinstance(file, (Path, str)):
+        Path(file).write_bytes(dumps(snapshot))
+    else:
+        file.write(dumps(snapshot))
+
+
+def load(file: Union[Path, str, BinaryIO]) -> Snapshot:
+    if isinstance(file, (Path, str)):
+        return loads(Path(file).read_bytes())
+    return loads(file.read())
+
+
+def export_names(tracks: Sequence[TrackSnapshot],
+                 reserved: Sequence[str] = ()) -> List[str]:
+    """File names (without suffix) of tracks, exported to one directory.
+
+    Name is the basename of `export_path`, or the part name. Names, that
+    clash (case-insensitive) with each other or with `reserved` ones, get
+    the track number appended.
+
+    Raises
+    ------
+    ValueError
+        if the name with track number is taken as well
+    """
+    names = [
+        Path(track.export_path or f'{track.part_name}.ly').stem
+        for track in tracks
+    ]
+    counts: Dict[str, int] = {}
+    for name in [*names, *reserved]:
+        counts[name.lower()] = counts.get(name.lower(), 0) + 1
+    taken = {name.lower() for name in reserved}
+    out = []
+    for idx, name in enumerate(names, 1):
+        if counts[name.lower()] > 1:
+            name = f'{name}-{idx}'
+        if name.lower() in taken:
+            raise ValueError(f'export name of track {idx} is taken: {name}')
+        taken.add(name.lower())
+        out.append(name)
+    return out
+
+
+def render_track(
+    track: TrackSnapshot,
+    export_dir: Optional[Path] = None,
+    compile_ly: bool = True,
+    staves: Optional[List[Staff]] = None,
+    name: Optional[str] = None,
+) -> Tuple[Path, LyDict]:
+    """Write .ly file of the track and compile it.
+
+    Has to be called with the MeasureMap of the snapshot activated.
+
+    Parameters
+    ----------
+    track : TrackSnapshot
+    export_dir : Optional[Path]
+        if given, used instead of the directory of track.export_path
+    compile_ly : bool, optional
+    staves : Optional[List[Staff]]
+        staves of the track, if already built
+    name : Optional[str]
+        file name in export_dir, see `export_names`
+
+    Returns
+    -------
+    Tuple[Path, LyDict]
+        pdf path, and variable and expression of the part (definition is
+        streamed to the file)
+    """
+    path = Path(track.export_path or f'{track.part_name}.ly')
+    if export_dir is not None:
+        path = Path(export_dir).joinpath(
+            f'{name}.ly' if name is not None else path.name
+        )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if staves is None:
+        staves = track.staves()
+    part: List[str] = []
+
+    def write(out: LyWriter) -> None:
+        part.extend(
+            write_part(
+                out, track.part_name, staves, track.track_type,
+                track.octave_offset
+            )
+        )
+        out.write(part[1])
+
+    pdf = render(write, path, compile_ly)
+    return pdf, LyDict(var=part[0], definition='', expression=part[1])
+
+
+def render_full_score(
+    tracks: List[TrackSnapshot],
+    path: Path,
+    compile_ly: bool = True,
+    staves: Optional[List[List[Staff]]] = None,
+) -> Path:
+    """Write all tracks to one score and compile it.
+
+    Has to be called with the MeasureMap of the snapshot activated.
+
+    Parameters
+    ----------
+    tracks : List[TrackSnapshot]
+    path : Path
+        .ly file of the score
+    compile_ly : bool, optional
+    staves : Optional[List[List[Staff]]]
+        staves of every track, if already built
+
+    Returns
+    -------
+    Path
+        pdf path
+    """
+    if staves is None:
+        staves = [track.staves() for track in tracks]
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write(out: LyWriter) -> None:
+        part_vars = []
+        for idx, (track, track_staves) in enumerate(zip(tracks, staves)):
+            _, expression = write_part(
+                out, track.part_name, track_staves, track.track_type,
+                track.octave_offset
+            )
+            part_vars.append(write_score_part(out, idx, expression))
+        write_score(out, part_vars)
+
+    return render(write, path, compile_ly)
+
+
+def _render_job(
+    bars: List[Bar], track: TrackSnapshot, export_dir: Optional[Path],
+    compile_ly: bool, name: Optional[str]
+) -> Path:
+    with MeasureMap(bars).activated():
+        return render_track(track, export_dir, compile_ly, name=name)[0]
+
+
+def render_snapshot(
+    snapshot: Snapshot,
+    export_dir: Optional[Path] = None,
+    compile_ly: bool = True,
+    jobs: int = 1,
+) -> List[Path]:
+    """Render every track of the snapshot, in `jobs` processes.
+
+    Returns
+    -------
+    List[Path]
+        pdf paths, in order of tracks
+    """
+    names: List[Optional[str]] = [None] * len(snapshot.tracks)
+    if export_dir is not None:
+        names = list(export_names(snapshot.tracks))
+    if jobs <= 1 or len(snapshot.tracks) <= 1:
+        return [
+            _render_job(snapshot.bars, track, export_dir, compile_ly, name)
+            for track, name in zip(snapshot.tracks, names)
+        ]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(jobs) as pool:
+        futures = [
+            pool.submit(
+                _render_job, snapshot.bars, track, export_dir, compile_ly,
+                name
+            ) for track, name in zip(snapshot.tracks, names)
+        ]
+        return [future.result() for future in futures]
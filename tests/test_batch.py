@@ -0,0 +1,81 @@
+import io
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+from rea_score.batch import (
+    MANIFEST, ProjectResult, find_sources, run_batch, summary, up_to_date
+)
+
+from test_rpp import RPP
+
+# export with reapy_boost missing, even if it is installed
+WITHOUT_REAPY = '''
+import sys
+from pathlib import Path
+sys.modules['reapy_boost'] = None
+from rea_score.batch import export_project
+from rea_score.snapshot import dump, load, render_snapshot
+from rea_score.rpp import read_project
+source, out = Path(sys.argv[1]), Path(sys.argv[2])
+export_project(source, out.joinpath('rpp'), compile_ly=False)
+snapshot = out.joinpath('project.rsnap')
+dump(read_project(source), snapshot)
+render_snapshot(load(snapshot), out.joinpath('snapshot'), compile_ly=False)
+assert 'reapy_boost' not in [
+    name for name, module in sys.modules.items() if module is not None
+]
+'''
+
+
+def test_find_sources(tmp_path) -> None:
+    for name in ('a.RPP', 'b.rpp-bak', 'sub/c.rsnap', 'score/d.rsnap'):
+        path = tmp_path.joinpath(name)
+        path.parent.mkdir(exist_ok=True)
+        path.write_text('')
+    found = find_sources(tmp_path, exclude=tmp_path.joinpath('score'))
+    assert [p.relative_to(tmp_path).as_posix() for p in found] == [
+        'a.RPP', 'sub/c.rsnap'
+    ]
+
+
+def test_up_to_date(tmp_path) -> None:
+    source = tmp_path.joinpath('a.RPP')
+    source.write_text('')
+    out_dir = tmp_path.joinpath('score', 'a')
+    assert not up_to_date(source, out_dir)
+    out_dir.mkdir(parents=True)
+    out_dir.joinpath('Flute.ly').write_text('')
+    out_dir.joinpath(MANIFEST).write_text('Flute.ly')
+    assert up_to_date(source, out_dir)
+    mtime = source.stat().st_mtime + 10
+    os.utime(source, (mtime, mtime))
+    assert not up_to_date(source, out_dir)
+
+
+def test_run_batch_reports_failures(tmp_path) -> None:
+    tmp_path.joinpath('broken.rsnap').write_bytes(b'nothing')
+    log = io.StringIO()
+    results = run_batch(
+        tmp_path, tmp_path.joinpath('score'), compile_ly=False, jobs=1,
+        log=log
+    )
+    assert [result.status for result in results] == ['FAIL']
+    assert 'broken' in log.getvalue()
+    lines = list(summary(results + [ProjectResult(tmp_path, 'ok', [], 1.5)]))
+    assert lines[-1] == (
+        '2 projects: 1 exported, 0 up to date, 1 failed, 1.50s of work'
+    )
+
+
+def test_export_without_reapy(tmp_path) -> None:
+    source = tmp_path.joinpath('project.RPP')
+    source.write_text(RPP)
+    subprocess.run(
+        [sys.executable, '-c', WITHOUT_REAPY, source, tmp_path],
+        cwd=Path(__file__).parent.parent, check=True
+    )
+    exported = tmp_path.joinpath('rpp', 'Flute.ly').read_text()
+    assert "\\clef bass" in exported and "c'4 r2" in exported
+    assert tmp_path.joinpath('snapshot', 'Flute.ly').read_text() == exported
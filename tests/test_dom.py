@@ -1,5 +1,12 @@
-from rea_score.dom import BarCheck, EventPackager, Voice
-from rea_score.primitives import Event, Length, Pitch, Position
+from fractions import Fraction
+
+from rea_score.dom import (
+    BarCheck, EventPackager, TieChain, Voice, split_at_barlines, tuplet_mask,
+    tuplet_spans
+)
+from rea_score.primitives import (
+    Chord, Event, Length, MeasureMap, Pitch, Position
+)
 
 from pprint import pprint
 
@@ -11,6 +18,8 @@ def test_event_packager():
     event = Event(length, Pitch(60))
     assert position.bar_end_distance < event.length
     EventPackager(voice, position).append(event)
+    assert list(voice.events) == [position]
+    voice.expand()
     # pprint(voice.events)
     voice.events = {k: voice.events[k] for k in sorted(voice.events)}
     expected_events = {
@@ -38,6 +47,7 @@ def test_event_packager():
     voice[Position.from_fraction(3 / 8)].append(
         Event(Length.from_fraction(1 / 2), Pitch(60))
     )
+    voice.expand()
     expected_events = {
         Position.from_fraction(3 / 8):
             Event(Length.from_fraction(1 / 8), Pitch(60, tie=True)),
@@ -45,3 +55,79 @@ def test_event_packager():
             Event(Length.from_fraction(3 / 8), Pitch(60)),
     }
     assert voice.events == expected_events
+
+
+def test_voice_extend():
+    position = Position.from_fraction(3 / 8)
+    stream = [
+        (position, Event(Length.from_fraction(1 / 2), Pitch(60))),
+        (position, Event(Length.from_fraction(1 / 2), Pitch(64))),
+    ]
+    voice = Voice().extend(stream)
+    per_note = Voice()
+    per_note[position].append(Event(Length.from_fraction(1 / 2), Pitch(60)))
+    per_note[position].append(Event(Length.from_fraction(1 / 2), Pitch(64)))
+    assert voice.events == per_note.events
+    assert len(voice.events) == 1
+    first = voice.expand().events[Position.from_fraction(3 / 8)]
+    assert [p.midi_pitch for p in first.pitches] == [60, 64]
+    assert all(p.tie for p in first.pitches)
+
+
+def test_tuplet_spans():
+    flags = tuplet_mask([1, 3, 3, 1, 1, 2, 1], [3, 3, 3, 4, 8, 4, 4])
+    assert flags == [True, True, True, False, False, False, False]
+    no = [False] * 7
+    assert tuplet_spans(flags, no, no) == [(0, 3)]
+    ends = [False, True, False, False, False, False, False]
+    assert tuplet_spans(flags, no, ends) == [(0, 2), (2, 3)]
+    begins = [False, False, False, False, True, False, False]
+    ends = [False, False, False, False, False, True, False]
+    assert tuplet_spans(flags, begins, ends) == [(0, 3), (4, 6)]
+
+
+def test_tie_chain():
+    chain = TieChain(
+        Position.from_fraction(3 / 8), Event(Length(9), Pitch(60))
+    )
+    assert chain.split_points == [
+        Fraction(1, 8), Fraction(5, 8), Fraction(13, 8)
+    ]
+    pieces = chain.pieces()
+    assert [pos for pos, _ in pieces] == [
+        Position.from_fraction(3 / 8),
+        Position.from_fraction(1 / 2),
+        Position.from_fraction(1),
+        Position.from_fraction(2),
+    ]
+    assert pieces[2][1].prefix == [BarCheck(2)]
+    assert [ev.pitch.tie for _, ev in pieces] == [True, True, True, False]
+
+
+def test_split_at_barlines():
+    barlines = [0., 3., 6., 10.]
+    assert split_at_barlines([0., 2., 3.5], [3., 7., 4.], barlines) == [
+        (1, 2), (1, 4), (2, 3)
+    ]
+    measures = MeasureMap([(0, 3, 3, 4), (3, 6, 3, 4), (6, 10, 4, 4)])
+    with measures.activated():
+        event = Event(Length(12), Pitch(60))
+        chain = TieChain(Position(1), event)
+        pieces = [(pos.position, ev.length.length) for pos, ev in chain.pieces()]
+        voice = Voice().extend([(Position(1), event)]).expand()
+        assert voice.events == dict(chain.pieces())
+    assert pieces == [(1, 2), (3, 3), (6, 4), (10, 3)]
+
+
+def test_overlapping_notes():
+    with MeasureMap([(0, 4, 4, 4)]).activated():
+        voice = Voice()
+        voice.place(Position(0), Event(Length(6), Pitch(60)))
+        voice.place(Position(4), Event(Length(3), Pitch(67)))
+        events = voice.finalized().events
+    chord = events[Position(4)]
+    assert isinstance(chord, Chord)
+    assert [p.midi_pitch for p in chord.pitches] == [60, 67]
+    tail = events[Position(6)]
+    assert type(tail) is Event
+    assert tail.pitch.midi_pitch == 67
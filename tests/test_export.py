@@ -0,0 +1,67 @@
+from io import StringIO
+import xml.etree.ElementTree as ET
+
+from rea_score.dom import Staff, Voice
+from rea_score.export import ScorePart, key_fifths, note_values, write_musicxml
+from rea_score.primitives import Event, Length, MeasureMap, Pitch, Position
+from rea_score.scale import Key, Scale
+
+
+def test_helpers() -> None:
+    assert key_fifths(Key('c', Scale.major)) == 0
+    assert key_fifths(Key('fis', Scale.minor)) == 3
+    assert key_fifths(Key('bes', Scale.major)) == -2
+    assert note_values(Length(2.5).fraction) == [('half', 0), ('eighth', 0)]
+    assert note_values(Length(1.5).fraction) == [('quarter', 1)]
+
+
+def test_write_musicxml() -> None:
+    measures = MeasureMap([(0, 3, 3, 4)])
+    with measures.activated():
+        voice = Voice().extend([
+            (Position(0), Event(Length(1), Pitch(60))),
+            (Position(0), Event(Length(1), Pitch(64))),
+            (Position(1), Event(Length(1 / 3), Pitch(62))),
+            (Position(4 / 3), Event(Length(1 / 3), Pitch(62))),
+            (Position(5 / 3), Event(Length(1 / 3), Pitch(62))),
+            (Position(2), Event(Length(2), Pitch(61))),
+        ])
+        staff = Staff(1)
+        staff.append(voice)
+        out = StringIO()
+        write_musicxml(out, [ScorePart('Piano', [staff])])
+    root = ET.fromstring(out.getvalue())
+    bars = root.findall('part/measure')
+    assert [bar.get('number') for bar in bars] == ['1', '2']
+    assert bars[0].find('attributes/time/beats').text == '3'
+    notes = bars[0].findall('note')
+    assert notes[1].find('chord') is not None
+    assert [n.find('notations/tuplet').get('type')
+            for n in notes if n.find('notations/tuplet') is not None
+            ] == ['start', 'stop']
+    assert notes[-1].find('tie').get('type') == 'start'
+    first = bars[1].find('note')
+    assert first.find('tie').get('type') == 'stop'
+    assert first.find('pitch/alter').text == '1'
+    durations = [int(n.find('duration').text) for n in bars[0].iter('note')]
+    assert sum(durations) - durations[1] == 3 * 10080
+
+
+def test_tuplet_across_barline() -> None:
+    with MeasureMap([(0, 4, 4, 4)]).activated():
+        voice = Voice().extend([
+            (Position(2 + idx / 3), Event(Length(1 / 3), Pitch(60 + idx % 5)))
+            for idx in range(24)
+        ])
+        staff = Staff(1)
+        staff.append(voice)
+        out = StringIO()
+        write_musicxml(out, [ScorePart('Piano', [staff])])
+    bars = ET.fromstring(out.getvalue()).findall('part/measure')
+    assert [bar.get('number') for bar in bars] == ['1', '2', '3']
+    for bar in bars[:2]:
+        notes = bar.findall('note')
+        assert sum(int(n.find('duration').text) for n in bar
+                   if n.tag in ('note', 'forward')) == 4 * 10080
+        assert [n.find('notations/tuplet').get('type') for n in notes
+                if n.find('notations/tuplet') is not None] == ['start', 'stop']
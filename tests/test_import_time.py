@@ -0,0 +1,82 @@
+"""Import-time budget of rea_score modules, measured by ``-X importtime``.
+
+Only the time of rea_score's own modules is counted, so the budget does
+not depend on the cost of the standard library or REAPER bridge imports.
+"""
+import ast
+import importlib.util
+import os
+from pathlib import Path
+import subprocess
+import sys
+from typing import Dict, Set
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+REASCRIPTS = ROOT.joinpath('rea_score', 'reascripts')
+
+# modules, that are used without REAPER
+HEADLESS = [
+    'rea_score.primitives', 'rea_score.note_table', 'rea_score.dom',
+    'rea_score.serialize', 'rea_score.snapshot', 'rea_score.rpp',
+    'rea_score.batch', 'rea_score.lily_convert', 'rea_score.export',
+    'rea_score.service', 'rea_score.keymap'
+]
+# milliseconds
+BUDGET = {'rea_score.primitives': 30, 'rea_score.service': 5}
+DEFAULT_BUDGET = 80
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """Self import time of every module, imported by `module`, in us."""
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    command = [sys.executable, '-X', 'importtime', '-c', f'import {module}']
+    # the first run writes bytecode cache
+    subprocess.run(command, cwd=ROOT, env=env, capture_output=True,
+                   check=True)
+    result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True,
+                            text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '[us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(self_us)
+    return times
+
+
+def entry_point_modules() -> Set[str]:
+    """rea_score modules, imported by reascripts."""
+    modules = set()
+    for path in REASCRIPTS.glob('*.py'):
+        for node in ast.walk(ast.parse(path.read_text())):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module:
+                names = [node.module]
+                if node.module == 'rea_score':
+                    names = [f'rea_score.{a.name}' for a in node.names]
+            else:
+                continue
+            modules.update(n for n in names if n.startswith('rea_score.'))
+    return modules
+
+
+@pytest.mark.parametrize('module', HEADLESS)
+def test_headless_without_reapy(module: str) -> None:
+    assert 'reapy_boost' not in import_times(module)
+
+
+@pytest.mark.parametrize(
+    'module', sorted(entry_point_modules() | {'rea_score.primitives'})
+)
+def test_import_budget(module: str) -> None:
+    if module not in HEADLESS and importlib.util.find_spec(
+        'reapy_boost'
+    ) is None:
+        pytest.skip('reapy_boost is not installed')
+    times = import_times(module)
+    own = sum(us for name, us in times.items() if name.startswith('rea_score'))
+    assert own / 1000 < BUDGET.get(module, DEFAULT_BUDGET)
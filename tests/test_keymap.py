@@ -0,0 +1,51 @@
+import ast
+from pathlib import Path
+
+import pytest
+
+from rea_score.keymap import (
+    ACTIONS, BINDINGS, action, build_keymap, find_action, funcmap, keymap
+)
+from rea_score.primitives import Clef
+from rea_score.scale import Accidental
+
+REASCRIPTS = Path(__file__).parent.parent.joinpath('rea_score', 'reascripts')
+
+
+def test_expressions() -> None:
+    clef = action('set_clef_of_selected_notes', Clef.alto)
+    assert str(clef) == 'set_clef_of_selected_notes(Clef.alto)'
+    art = action('add_articulation_to_selected_notes', position='^')
+    assert str(art) == "add_articulation_to_selected_notes(position='^')"
+    for act in ACTIONS:
+        assert find_action(str(act)) == act
+    with pytest.raises(KeyError):
+        find_action('__import__("os")')
+    # commands of shortcut scripts
+    for path in REASCRIPTS.glob('*.py'):
+        for node in ast.walk(ast.parse(path.read_text())):
+            if (isinstance(node, ast.Call)
+                    and getattr(node.func, 'id', None) == 'send'
+                    and isinstance(node.args[0], ast.Constant)):
+                find_action(node.args[0].value)
+
+
+def test_bind() -> None:
+    calls = []
+    namespace = {
+        'set_accidental_for_selected_notes':
+        lambda *args, **kwargs: calls.append((args, kwargs)),
+    }
+    action('set_accidental_for_selected_notes', Accidental.es,
+           x=1).bind(namespace)()
+    assert calls == [((Accidental.es, ), {'x': 1})]
+
+
+def test_duplicates() -> None:
+    assert len(keymap) == len(BINDINGS)
+    assert funcmap[keymap['g']] == 'g'
+    ghost = action('set_selected_notes_as_ghost')
+    with pytest.raises(ValueError, match="'g'"):
+        build_keymap([*BINDINGS, ('g', ghost)])
+    with pytest.raises(ValueError, match="'h'"):
+        build_keymap([*BINDINGS, ('y', ghost)])
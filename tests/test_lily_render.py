@@ -1,6 +1,89 @@
-from rea_score.lily_convert import render_length
-from rea_score.primitives import Length
+from io import StringIO
+
+import pytest
+
+from rea_score import lily_export
+from rea_score.lily_convert import (
+    KEY, duration_tokens, pitch_token, render_chord, render_length, render_pitch,
+    write_any_event
+)
+from rea_score.lily_export import LyWriter
+from rea_score.primitives import (
+    PITCH_IS_SPACER, Chord, Event, Length, Pitch
+)
+from rea_score.scale import Key, Scale
 
 
 def test_render_length() -> None:
-    assert render_length(Length(5 / 8 * 4)) == ('2', '~ 8')
\ No newline at end of file
+    assert render_length(Length(5 / 8 * 4)) == ('2', '~ 8')
+    hits = duration_tokens.cache_info().hits
+    assert render_length(Length(5 / 8 * 4)) == ('2', '~ 8')
+    assert render_length(Length(5 / 8 * 4), rest=True) == ('2', ' r8')
+    assert render_length(Length(2.5, full_bar=True), rest=True) == (
+        '2', ' R8'
+    )
+    assert duration_tokens.cache_info().hits == hits + 1
+
+
+def test_write_any_event() -> None:
+    chord = Chord(Length(1), pitches=[Pitch(60), Pitch(64)])
+    io = StringIO()
+    out = LyWriter(io)
+    assert write_any_event(chord, out, KEY, 0) is KEY
+    write_any_event(Event(Length(2.5), Pitch(None)), out, KEY, 0)
+    out.flush()
+    assert io.getvalue() == "<c' e'>4r2 r8\n"
+    chord = Chord(Length(1), pitches=[Pitch(60), Pitch(64)])
+    assert render_chord(chord, KEY, 0) == "<c' e'>4"
+
+
+def test_ly_writer() -> None:
+    io = StringIO()
+    out = LyWriter(io, width=24)
+    out.write('Voice = ')
+    out.open('{')
+    out.write("c'4 d'4 e'4 f'4 | \n\n% bar # 2\n")
+    out.write("g'4 a'4 b'4 c''4 d''4")
+    out.close('}')
+    out.flush()
+    assert io.getvalue() == (
+        "Voice = {\n"
+        "    c'4 d'4 e'4 f'4 |\n"
+        "\n"
+        "    % bar # 2\n"
+        "    g'4 a'4 b'4 c''4\n"
+        "        d''4\n"
+        "}\n"
+    )
+
+
+def test_render_pitch() -> None:
+    pitch = Pitch(61, tie=True)
+    assert render_pitch(pitch, KEY, 1) == ("cis''", '~')
+    assert render_pitch(pitch, KEY, 1) == ("cis''", '~')
+    assert pitch.midi_pitch == 61
+    assert render_pitch(pitch, Key('f', Scale.major), -1) == ('des', '~')
+    assert render_pitch(Pitch(), KEY, 2) == ('r', '')
+    assert pitch_token(PITCH_IS_SPACER, KEY, None, 2) == 's'
+    assert pitch_token(61, Key('c', Scale.major), None, 1) == "cis''"
+    assert pitch_token.cache_info().hits >= 2
+
+
+def test_render_without_lilypond(tmp_path, monkeypatch) -> None:
+    calls = []
+
+    def check_output(args):
+        calls.append(args)
+        raise FileNotFoundError('lilypond')
+
+    monkeypatch.setattr(lily_export.subprocess, 'check_output', check_output)
+    lily_export._installed_version.cache_clear()
+    try:
+        for name in ('a', 'b'):
+            lily_export.render('{ c4 }', tmp_path.joinpath(name), False)
+        assert tmp_path.joinpath('b.ly').read_text() == '{ c4 }\n'
+        assert len(calls) == 1
+        with pytest.raises(RuntimeError):
+            lily_export.lily_version()
+    finally:
+        lily_export._installed_version.cache_clear()
@@ -0,0 +1,268 @@
+import pytest
+
+import rea_score.notation_index as notation_index
+from rea_score.inspector import (
+    RPR, CompactionReport, MigrationReport, NotationPitchInspector,
+    NotationTransaction, compact_midi, migrate_midi, selected_notes
+)
+from rea_score.notations_pitch import NotationStaff, NotationVoice
+from rea_score.primitives import NotationPitch, Pitch
+
+from test_note_table import midi_event, notation
+
+
+class FakeNote:
+
+    def __init__(self, ppq, pitch):
+        self.infos = dict(channel=0, ppq_position=ppq, pitch=pitch)
+
+
+class FakeTake:
+
+    def __init__(self, midi):
+        self.id = str(id(self))
+        self.midi = midi
+        self.writes = []
+
+    def get_midi(self):
+        return [dict(event) for event in self.midi]
+
+    def set_midi(self, midi, sort=True):
+        self.writes.append(sort)
+        self.midi = midi
+
+
+class FakeTextEvents:
+
+    def __init__(self, take):
+        self.take = take
+
+    def texts(self):
+        return [event for event in self.take.midi if event['buf'][0] == 0xff]
+
+    def counts(self):
+        return len(self.texts()), len(self.take.midi)
+
+    def get(self, idx):
+        event = self.texts()[idx]
+        return event['ppq'], event['buf']
+
+    def set(self, idx, buf):
+        self.texts()[idx]['buf'] = buf
+
+    def insert(self, ppq, buf):
+        self.take.midi.append(midi_event(ppq, buf))
+
+    def delete(self, idx):
+        self.take.midi.remove(self.texts()[idx])
+
+    def sort(self):
+        self.take.writes.append('delta')
+        self.take.midi.sort(key=lambda event: event['ppq'])
+
+
+@pytest.fixture(autouse=True)
+def fake_text_events(monkeypatch):
+    monkeypatch.setattr(NotationTransaction, 'text_events_type',
+                        FakeTextEvents)
+    monkeypatch.setattr(notation_index, 'midi_hash',
+                        lambda take: repr(take.midi))
+    notation_index.clear()
+
+
+def tokens(event):
+    if NotationPitch.buf_pitch(event['buf']) is None:
+        return []
+    return [n.for_midi for n in NotationPitch.from_midibuf(event['buf'])]
+
+
+def test_set_replaces_in_place() -> None:
+    take = FakeTake([
+        midi_event(0, [0x90, 60, 100]),
+        notation(0, 60, 'voice:2'),
+        midi_event(0, [0x90, 64, 100]),
+        midi_event(960, [0x80, 60, 0]),
+        midi_event(960, [0x80, 64, 0]),
+    ])
+    inspector = NotationPitchInspector()
+    inspector.set(
+        take, [FakeNote(0, 60)], [NotationStaff(Pitch(127), 2)]
+    )
+    assert take.writes == [False]
+    assert len(take.midi) == 5
+    assert tokens(take.midi[1]) == ['voice:2', 'staff:2']
+
+    inspector.set(
+        take, [FakeNote(0, 60), FakeNote(0, 64)],
+        [NotationVoice(Pitch(127), 3)]
+    )
+    assert take.writes == [False, True]
+    notations = [event for event in take.midi if tokens(event)]
+    assert [tokens(event) for event in notations] == [
+        ['voice:3', 'staff:2'], ['voice:3']
+    ]
+    assert NotationPitchInspector.index(take.midi) == {(0, 60): 1, (0, 64): 3}
+
+
+def test_transaction_writes_once() -> None:
+    take = FakeTake([
+        midi_event(0, [0x90, 60, 100]),
+        notation(0, 60, 'voice:2'),
+        midi_event(0, [0x90, 64, 100]),
+    ])
+    notes = [FakeNote(0, 60), FakeNote(0, 64)]
+    with NotationTransaction(take, 'voice and staff') as transaction:
+        transaction.set(notes, [NotationVoice(Pitch(127), 3)])
+        transaction.set(notes[1:], [NotationStaff(Pitch(127), 2)])
+    assert take.writes == [True]
+    assert transaction.summary == (
+        '1 notation events created, 1 updated, 0 deleted'
+    )
+    assert [tokens(event) for event in take.midi if tokens(event)] == [
+        ['voice:3'], ['voice:3', 'staff:2']
+    ]
+
+
+def test_transaction_discards_on_error() -> None:
+    take = FakeTake([midi_event(0, [0x90, 60, 100])])
+    try:
+        with NotationTransaction(take) as transaction:
+            transaction.set([FakeNote(0, 60)], [NotationStaff(Pitch(127), 2)])
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert take.writes == []
+
+
+def test_transaction_delta_write() -> None:
+    take = FakeTake([
+        midi_event(0, [0x90, 60, 100]),
+        notation(0, 60, 'voice:2'),
+        midi_event(0, [0x90, 64, 100]),
+        notation(0, 64, 'voice:2'),
+        midi_event(480, [0x90, 67, 100]),
+    ])
+    with NotationTransaction(take, delta=True) as transaction:
+        transaction.set([FakeNote(0, 60)], [NotationStaff(Pitch(127), 2)])
+        transaction.clear([FakeNote(0, 64)])
+        transaction.set([FakeNote(480, 67)], [NotationVoice(Pitch(127), 2)])
+    assert take.writes == ['delta']
+    assert transaction.summary == (
+        '1 notation events created, 1 updated, 1 deleted'
+    )
+    assert [(e['ppq'], tokens(e)) for e in take.midi if tokens(e)] == [
+        (0, ['voice:2', 'staff:2']),
+        (480, ['voice:2']),
+    ]
+
+
+def test_compact_midi() -> None:
+    midi = [
+        midi_event(0, [0x90, 60, 100]),
+        notation(0, 60, 'voice:2'),
+        notation(0, 60, 'staff:2'),
+        notation(0, 60, 'voice:3'),
+        notation(0, 64, 'voice:2'),
+        midi_event(960, [0x80, 60, 0]),
+    ]
+    size = sum(len(event['buf']) for event in midi)
+    compacted, report = compact_midi(midi)
+    assert (report.takes, report.events) == (1, 2)
+    assert report.bytes == size - sum(len(e['buf']) for e in compacted)
+    assert [tokens(event) for event in compacted if tokens(event)] == [
+        ['voice:3', 'staff:2'], ['voice:2']
+    ]
+    assert compact_midi(compacted)[1] == CompactionReport()
+
+
+def test_compact_midi_keeps_unknown_tokens() -> None:
+    midi = [
+        midi_event(0, [0x90, 60, 100]),
+        notation(0, 60, 'voice:2'),
+        notation(0, 60, 'unknown:1|staff:2'),
+        notation(0, 64, 'voice:2'),
+        notation(0, 64, 'staff:2'),
+        midi_event(960, [0x80, 60, 0]),
+    ]
+    original = [list(event['buf']) for event in midi[1:3]]
+    compacted, report = compact_midi(midi)
+    assert (report.takes, report.events) == (1, 1)
+    assert [event['buf'] for event in compacted[1:3]] == original
+
+
+def test_migrate_midi() -> None:
+    midi = [
+        midi_event(0, [0x90, 60, 100]),
+        notation(0, 60, 'voice:2|staff:2'),
+        notation(0, 64, 'unknown:1|voice:2'),
+        midi_event(960, [0x80, 60, 0]),
+    ]
+    size = sum(len(event['buf']) for event in midi)
+    midi, report = migrate_midi(midi)
+    assert (report.takes, report.events) == (1, 1)
+    assert report.bytes == size - sum(len(e['buf']) for e in midi)
+    assert bytes(midi[1]['buf'][2:]) == b'NOTE 0 60 text RS2|v:2|s:2'
+    assert NotationPitch.buf_version(midi[2]['buf']) == 1
+    assert migrate_midi(midi)[1] == MigrationReport()
+
+
+def test_take_index_cache(monkeypatch) -> None:
+    take = FakeTake([
+        midi_event(0, [0x90, 60, 100]),
+        notation(0, 60, 'voice:2'),
+        midi_event(480, [0x80, 60, 0]),
+        midi_event(480, [0x90, 60, 100]),
+        notation(480, 60, 'voice:2'),
+        midi_event(960, [0x80, 60, 0]),
+    ])
+    decoded = []
+    from_midibuf = NotationPitch.from_midibuf
+    monkeypatch.setattr(
+        NotationPitch, 'from_midibuf',
+        lambda buf: decoded.append(buf) or from_midibuf(buf)
+    )
+    index = notation_index.take_index(take)
+    assert len(decoded) == 1  # both events have the same text
+    assert [n.for_midi for n in index.notations[(480, 60)]] == ['voice:2']
+    assert index.positions == {(0, 60): [1], (480, 60): [4]}
+    assert notation_index.take_index(take) is index
+    assert notation_index.cached_index(take) is index
+    assert len(decoded) == 1
+
+    with NotationTransaction(take, delta=False) as transaction:
+        transaction.set([FakeNote(0, 60)], [NotationStaff(Pitch(127), 2)])
+    assert notation_index.cached_index(take) is None
+    index = notation_index.take_index(take)
+    assert [n.for_midi for n in index.notations[(0, 60)]
+            ] == ['voice:2', 'staff:2']
+    assert [n.for_midi for n in index.notations[(480, 60)]] == ['voice:2']
+    assert len(decoded) == 2
+
+
+def test_selected_notes(monkeypatch) -> None:
+    # (selected, muted, start, end, channel, pitch, velocity)
+    notes = [(i % 3 == 0, False, i * 240, i * 240 + 200, 1, 60 + i, 90)
+             for i in range(10)]
+    calls = []
+
+    def enum_sel_notes(take_id, idx):
+        calls.append(idx)
+        return next((i for i in range(idx + 1, len(notes)) if notes[i][0]),
+                    -1)
+
+    monkeypatch.setattr(RPR, 'MIDI_EnumSelNotes', enum_sel_notes,
+                        raising=False)
+    monkeypatch.setattr(RPR, 'MIDI_GetNote',
+                        lambda take_id, idx, *_: (True, take_id, idx,
+                                                  *notes[idx]),
+                        raising=False)
+    take = FakeTake([])
+    selected = selected_notes(take)
+    assert [note.index for note in selected] == [0, 3, 6, 9]
+    assert selected[1].infos == dict(
+        selected=True, muted=False, ppq_position=720, ppq_end=920,
+        channel=1, pitch=63, velocity=90
+    )
+    calls.clear()
+    assert [note.index for note in selected_notes(take, limit=1)] == [0]
+    assert calls == [-1]
@@ -0,0 +1,64 @@
+from rea_score.dom import (
+    TrackPitchType, events_from_table, split_table_by_staff
+)
+from rea_score.note_table import NoteFlag, NoteTable
+from rea_score.primitives import Position
+
+
+def midi_event(ppq, buf, selected=False):
+    return dict(ppq=ppq, buf=buf, cc_shape=0, muted=False, selected=selected)
+
+
+def notation(ppq, pitch, tokens):
+    text = f'NOTE 0 {pitch} text ReaScore|{tokens}'
+    return midi_event(ppq, [0xff, 0x0f, *text.encode('latin-1')])
+
+
+MIDI = [
+    midi_event(0, [0x90, 60, 100], selected=True),
+    midi_event(0, [0x90, 64, 100]),
+    notation(0, 64, 'voice:2|staff:2'),
+    midi_event(960, [0x80, 60, 0]),
+    midi_event(960, [0x80, 64, 0]),
+    midi_event(960, [0x91, 62, 90]),
+    midi_event(1920, [0x81, 62, 0]),
+    midi_event(2880, [0xff, 0x01, *b'pizz.']),
+]
+
+
+def test_from_midi() -> None:
+    table = NoteTable.from_midi(MIDI, lambda ppq: ppq / 960)
+    assert len(table) == 3
+    assert list(table.onset) == [0, 0, 1]
+    assert list(table.duration) == [1, 1, 1]
+    assert list(table.pitch) == [60, 64, 62]
+    assert list(table.voice) == [1, 2, 2]
+    assert list(table.staff) == [1, 2, 1]
+    assert table.flags[0] & NoteFlag.selected
+    assert list(table.notation) == [-1, 0, -1]
+    assert table.partition('staff') == {1: [0, 2], 2: [1]}
+    assert table.chords(table.argsort('onset')) == [[0, 1], [2]]
+
+
+def test_events_from_table() -> None:
+    table = NoteTable.from_midi(MIDI, lambda ppq: ppq / 960)
+    events = events_from_table(table, TrackPitchType.default, [])
+    assert list(events) == [Position(0), Position(1), Position(3)]
+    assert [ev.pitch.midi_pitch for ev in events[Position(0)]] == [60, 64]
+    assert events[Position(0)][1].voice_nr == 2
+    rest = events[Position(3)][0]
+    assert rest.pitch.midi_pitch is None
+    assert rest.postfix[0].text == 'pizz.'
+
+
+def test_rendering_keeps_table() -> None:
+    table = NoteTable.from_midi(MIDI, lambda ppq: ppq / 960)
+    staves = [
+        split_table_by_staff(table, TrackPitchType.default, [])
+        for _ in range(2)
+    ]
+    events_from_table(table, TrackPitchType.default, [])
+    assert len(table) == 3
+    assert [len(staff) for staff in staves[0]] == [
+        len(staff) for staff in staves[1]
+    ]
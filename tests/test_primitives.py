@@ -144,3 +144,45 @@ def test_notation_pitch() -> None:
         'NOTE 0 69 text ReaScore|accidental:isis articulation accent ornament '
         'tremolo voice 1'
     ) == ['ReaScore', 'accidental:isis']
+
+
+def test_notation_formats() -> None:
+    from rea_score.notations_pitch import NotationArticulation, NotationVoice
+    pitch = pr.Pitch(60)
+    events = [NotationVoice(pitch, 2), NotationArticulation(pitch, 'accent')]
+    v1 = NotationPitch.to_midi_buf(events, pitch, version=1)
+    v2 = NotationPitch.to_midi_buf(events, pitch)
+    assert bytes(v2[2:]) == b'NOTE 0 60 text RS2|v:2|A:accent:-'
+    assert len(v2) < len(v1)
+    assert NotationPitch.buf_version(v1) == 1
+    assert NotationPitch.buf_version(v2) == 2
+    for buf in v1, v2:
+        assert NotationPitch.buf_pitch(buf) == 60
+        assert [e.for_midi for e in NotationPitch.from_midibuf(buf)
+                ] == [e.for_midi for e in events]
+
+
+def test_tuplet_cache() -> None:
+    tuplet = pr.Tuplet(pr.Length(0))
+    for _ in range(3):
+        tuplet.append(pr.Event(pr.Length.from_fraction(1 / 12), pr.Pitch(60)))
+    assert tuplet.rate.to_str() == '3/2'
+    events = tuplet.events
+    assert tuplet.events is events
+    assert events[0].length == Fraction(1, 8)
+    tuplet.append(pr.Event(pr.Length.from_fraction(1 / 12), pr.Pitch(62)))
+    assert tuplet.events is not events
+    assert len(tuplet.events) == 4
+
+
+def test_measure_map() -> None:
+    measures = pr.MeasureMap([(0, 4, 4, 4), (4, 7, 3, 4)])
+    assert measures.beats_to_measures(5) == (2, 4, 7)
+    assert measures.beats_to_measures(12) == (4, 10, 13)
+    assert measures.measure_info(1)['denom'] == 4
+    with measures.activated():
+        assert pr.MeasureMap.active is measures
+        position = pr.Position(8.5)
+        assert position.bar == 3
+        assert position.bar_position == Fraction(3, 8)
+    assert pr.MeasureMap.active is None
@@ -0,0 +1,111 @@
+import base64
+import io
+import pickle
+
+import pytest
+
+from rea_score.primitives import Clef
+from rea_score.rpp import RppProject, TempoMap, read_project, unpickle_state
+
+
+def text_event(delta, text):
+    data = base64.b64encode(b'\xff\x0f' + text.encode('latin-1')).decode()
+    return f'<X {delta} 0\n{data}\n>'
+
+
+def state(value):
+    return base64.b64encode(pickle.dumps(value)).decode()
+
+
+GUID = '{8E1F5C2A-0000-4000-8000-000000000001}'
+
+RPP = f'''<REAPER_PROJECT 0.1 "6.71/linux-x86_64" 1666000000
+  TEMPO 120 3 4
+  <TEMPOENVEX
+    ACT 1 -1
+    PT 0 120 1
+    PT 6 120 1 262148
+  >
+  MARKER 1 1.5 "#ReaScore key:d:major" 0 0 1
+  MARKER 2 0 "region" 1 0 1
+  <EXTSTATE
+    <Levitanus_ReaScore
+      main {state({'tracks': [GUID]})}
+      {GUID} {state({'part_name': 'Flute', 'clef': Clef.bass})}
+    >
+  >
+  <TRACK {GUID}
+    NAME "Fl 1"
+    <ITEM
+      POSITION 0
+      LENGTH 2
+      <SOURCE MIDI
+        HASDATA 1 960 QN
+        e 0 90 3c 60
+        E 0 90 40 60
+        {text_event(0, 'NOTE 0 64 text ReaScore|voice:2')}
+        E 960 80 3c 00
+        E 0 80 40 00
+        E 960 b0 7b 00
+      >
+    >
+    <ITEM
+      POSITION 6
+      LENGTH 1
+      TAKE
+      <SOURCE MIDI
+        HASDATA 1 480 QN
+        E 0 90 3e 60
+        E 480 80 3e 00
+      >
+      TAKE SEL
+      <SOURCE MIDI
+        HASDATA 1 480 QN
+        E 0 90 3f 60
+        E 240 80 3f 00
+      >
+    >
+  >
+  <TRACK {{00000000-0000-0000-0000-000000000002}}
+    NAME "Audio"
+  >
+>
+'''
+
+
+def test_tempo_map() -> None:
+    tempo = TempoMap([(0, 60, True), (2, 120, False)])
+    assert tempo.time_to_beats(1) == 1.25
+    assert tempo.time_to_beats(2) == 3
+    assert tempo.time_to_beats(3) == 5
+
+
+def test_read_project() -> None:
+    project = RppProject.read(io.StringIO(RPP))
+    assert [track.name for track in project.tracks] == ['Fl 1', 'Audio']
+    assert project.markers == [(1.5, '#ReaScore key:d:major')]
+    assert project.bars(13)[3:] == [
+        (9., 12., 3, 4), (12., 16., 4, 4), (16., 20., 4, 4)
+    ]
+    table = project.tracks[0].table
+    assert list(table.onset) == [0, 0, 12]
+    assert list(table.pitch) == [60, 64, 63]
+    assert list(table.duration) == [1, 1, 0.5]
+    assert list(table.voice) == [1, 2, 1]
+
+    snapshot = read_project(io.StringIO(RPP))
+    track, = snapshot.tracks
+    assert (track.part_name, track.clef) == ('Flute', Clef.bass)
+    assert track.export_path.endswith('Flute.ly')
+    assert len(track.global_events) == 3
+
+
+def test_unpickle_state_is_restricted() -> None:
+    assert unpickle_state(state({'clef': Clef.bass})) == {'clef': Clef.bass}
+    for module, name in (
+        ('rea_score.lily_export', 'system'), ('os', 'system'),
+        ('copyreg', '_reconstructor')
+    ):
+        payload = f'c{module}\n{name}\n(S"echo unpickled"\ntR.'.encode()
+        with pytest.raises(pickle.UnpicklingError, match='not allowed'):
+            unpickle_state(base64.b64encode(payload).decode())
@@ -0,0 +1,91 @@
+import contextlib
+import io
+import os
+import pickle
+import struct
+import sys
+
+import pytest
+
+from rea_score.dom import Staff, Voice
+from rea_score.lily_convert import render_part
+from rea_score.dom import TrackType
+from rea_score.note_table import NoteTable
+from rea_score.notations_pitch import NotationTrill
+from rea_score.primitives import (
+    Event, Grace, GraceType, Length, Pitch, Position
+)
+from rea_score.serialize import SerializeError, dumps, loads
+
+from test_note_table import MIDI
+
+
+def make_staves():
+    voice = Voice().extend([
+        (Position(0), Event(Length(1), Pitch(60))),
+        (Position(0), Event(Length(1), Pitch(64))),
+        (Position(1), Event(Length(1 / 3), Pitch(62))),
+        (Position(4 / 3), Event(Length(1 / 3), Pitch(63))),
+        (Position(5 / 3), Event(Length(1 / 3), Pitch(62))),
+        (Position(2), Event(Length(5), Pitch(61, note_name='snare'))),
+    ])
+    voice = voice.finalized()
+    trill = NotationTrill(Pitch(61))
+    grace = Grace(grace_type=GraceType.acciaccatura,
+                  events=[Event(Length(0.5), Pitch(59))])
+    event = list(voice.events.values())[-1]
+    trill.apply_to_event(event)
+    event.prefix.append(grace)
+    staff = Staff(2)
+    staff.append(voice)
+    return [staff]
+
+
+def render(staves):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return render_part('P', staves, TrackType.default, 0)
+
+
+def test_staves_round_trip() -> None:
+    staves = make_staves()
+    data = dumps(staves)
+    loaded = loads(data)
+    assert loaded[0].staff_nr == 2
+    assert loaded[0].clef is staves[0].clef
+    original = list(staves[0][0].events.items())
+    restored = list(loaded[0][0].events.items())
+    assert [(p.position, p.bar, p.bar_position) for p, _ in original] == [
+        (p.position, p.bar, p.bar_position) for p, _ in restored
+    ]
+    assert [type(ev) for _, ev in original] == [type(ev) for _, ev in restored]
+    assert restored[-1][1].pitch.note_name == 'snare'
+    assert render(loaded)['definition'] == render(make_staves())['definition']
+
+
+def test_table_round_trip() -> None:
+    table = NoteTable.from_midi(MIDI, lambda ppq: ppq / 960)
+    loaded = loads(dumps(table))
+    for name in table.typecodes:
+        assert loaded.column(name) == table.column(name)
+    assert [type(n) for n in loaded.notations[0]
+            ] == [type(n) for n in table.notations[0]]
+    assert loaded.texts[0][1].text == 'pizz.'
+
+
+class Evil:
+
+    def __reduce__(self):
+        return (os.system, ('echo unpickled',))
+
+
+def test_attachments_are_restricted() -> None:
+    table = dumps(NoteTable.from_midi(MIDI, lambda ppq: ppq / 960))
+    # os.system call, and function of ReaScore module
+    service = b'crea_score.reascripts.ReaScore_service\nrun\n(tR.'
+    for blob in (pickle.dumps(Evil()), pickle.dumps(render), service):
+        header = table[:6] + struct.pack('<II', 0, 1)
+        data = header + struct.pack('<I', len(blob)) + blob
+        with pytest.raises(SerializeError, match='not allowed'):
+            loads(data)
+    # rejected before import
+    assert 'rea_score.reascripts.ReaScore_service' not in sys.modules
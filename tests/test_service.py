@@ -0,0 +1,58 @@
+import pytest
+
+import rea_score.service as service
+
+
+@pytest.fixture
+def ext_state(monkeypatch):
+    state = {}
+    monkeypatch.setattr(service, '_get_ext_state',
+                        lambda section, key: state.get((section, key), ''))
+    monkeypatch.setattr(
+        service, '_set_ext_state',
+        lambda section, key, value, persist: state.update({
+            (section, key): value
+        })
+    )
+    monkeypatch.setattr(service, '_delete_ext_state',
+                        lambda section, key, persist: state.pop(
+                            (section, key), None))
+    return state
+
+
+class FakeService(service.Service):
+
+    def __init__(self) -> None:
+        self.performed = []
+        self.deferred = 0
+        super().__init__(self.performed.append)
+        self.defer = self.count_defer
+        self.running = True
+
+    def count_defer(self, func) -> None:
+        self.deferred += 1
+
+
+def test_mailbox(ext_state, monkeypatch) -> None:
+    performed = []
+    monkeypatch.setattr(service, 'perform', performed.append)
+    service.send('set_voice_of_selected_notes(1)')
+    # service is not running: performed by the sender
+    assert performed == ['set_voice_of_selected_notes(1)']
+    assert service.receive() == []
+
+    resident = FakeService()
+    resident.step()
+    assert service.is_running()
+    service.send('set_voice_of_selected_notes(2)')
+    service.send(service.SHORTCUT)
+    resident.step()
+    assert resident.performed == [
+        'set_voice_of_selected_notes(2)', service.SHORTCUT
+    ]
+    assert resident.deferred == 2
+
+    service.run()  # running: asks to stop
+    resident.step()
+    assert not resident.running and not service.is_running()
+    assert resident.deferred == 2
@@ -0,0 +1,83 @@
+import contextlib
+import io
+
+from rea_score.dom import TrackPitchType, TrackType
+from rea_score.lily_convert import render_part
+from rea_score.note_table import NoteTable
+from rea_score.notation_events import NotationKeySignature
+from rea_score.primitives import Clef, Position
+from rea_score.scale import Key, Scale
+from rea_score.batch import export_project
+from rea_score.snapshot import (
+    Snapshot, TrackSnapshot, dump, dumps, export_names, loads
+)
+
+from test_note_table import MIDI
+
+BARS = [(0., 3., 3, 4), (3., 6., 3, 4)]
+
+
+def make_snapshot() -> Snapshot:
+    track = TrackSnapshot(
+        '{GUID}',
+        'Flute',
+        NoteTable.from_midi(MIDI, lambda ppq: ppq / 960),
+        {Position(0): [NotationKeySignature(Key('d', Scale.major))]},
+        track_type=TrackType.default,
+        pitch_type=TrackPitchType.default,
+        clef=Clef.bass,
+        octave_offset=1,
+        export_path='/tmp/score/Flute.ly',
+    )
+    return Snapshot(BARS, [track], '/tmp/project.rpp')
+
+
+def render(snapshot: Snapshot) -> str:
+    track = snapshot.tracks[0]
+    with snapshot.measure_map().activated():
+        staves = track.staves()
+        with contextlib.redirect_stdout(io.StringIO()):
+            return render_part(
+                track.part_name, staves, track.track_type,
+                track.octave_offset
+            )['definition']
+
+
+def test_snapshot_round_trip() -> None:
+    snapshot = make_snapshot()
+    loaded = loads(dumps(snapshot))
+    assert loaded.bars == BARS
+    assert loaded.project_path == '/tmp/project.rpp'
+    track = loaded.tracks[0]
+    assert (track.guid, track.part_name, track.clef, track.octave_offset) == (
+        '{GUID}', 'Flute', Clef.bass, 1
+    )
+    assert track.export_path == '/tmp/score/Flute.ly'
+    assert len(track.table) == len(snapshot.tracks[0].table)
+    assert render(loaded) == render(make_snapshot())
+
+
+def test_staves_use_snapshot_bars() -> None:
+    definition = render(make_snapshot())
+    # first bar is filled up to 3/4
+    assert "bis'4 r2" in definition
+    assert '\\key d \\major' in definition
+    assert '\\clef bass' in definition
+
+
+def test_export_names(tmp_path) -> None:
+    tracks = [make_snapshot().tracks[0] for _ in range(3)]
+    tracks[1].export_path = ''
+    tracks[2].export_path, tracks[2].part_name = '', 'Oboe'
+    assert export_names(tracks) == ['Flute-1', 'Flute-2', 'Oboe']
+    assert export_names(tracks[1:], reserved=['oboe']) == ['Flute', 'Oboe-2']
+
+    snapshot = make_snapshot()
+    snapshot.tracks.append(make_snapshot().tracks[0])
+    source = tmp_path.joinpath('project.rsnap')
+    dump(snapshot, source)
+    with contextlib.redirect_stdout(io.StringIO()):
+        outputs = export_project(source, tmp_path.joinpath('out'), False)
+    assert [path.name for path in outputs] == [
+        'Flute-1.ly', 'Flute-2.ly', 'project.ly'
+    ]